@@ -0,0 +1,5 @@
+"""Performance benchmarks for dowel.
+
+Run the suite with:
+    python -m benchmarks.run
+"""
@@ -0,0 +1,97 @@
+"""Benchmarks for `dowel.ColumnarOutput` and `dowel.ColumnarReader`."""
+import csv
+import os
+import tempfile
+
+from benchmarks.harness import benchmark
+from dowel import ColumnarOutput, ColumnarReader, CsvOutput, TabularInput
+
+
+class _ColumnarWorkload:
+    """Workload writing rows to a fresh ColumnarOutput in a temp directory.
+
+    :param rows: The number of rows written per call.
+    :param num_keys: The number of keys in each row.
+    """
+
+    def __init__(self, rows, num_keys):
+        self._rows = rows
+        self._num_keys = num_keys
+        self._log_dir = tempfile.TemporaryDirectory()
+        self._tabular = TabularInput()
+        self._calls = 0
+
+    def __call__(self):
+        """Write all rows to a new directory, dumping after every row."""
+        self._calls += 1
+        columnar_output = ColumnarOutput(
+            os.path.join(self._log_dir.name, str(self._calls)))
+        tabular = self._tabular
+        for row in range(self._rows):
+            for i in range(self._num_keys):
+                tabular.record('metric_{}'.format(i), row + i * 0.5)
+            columnar_output.record(tabular)
+            columnar_output.dump()
+            tabular.clear()
+        columnar_output.close()
+
+    def close(self):
+        """Delete the temp directory."""
+        self._log_dir.cleanup()
+
+
+class _ReadWorkload:
+    """Workload reading one column of a run, written as CSV and columnar.
+
+    :param rows: The number of rows of the run.
+    :param columnar: Whether to read the columnar files, or the CSV file.
+    """
+
+    def __init__(self, rows, columnar):
+        self._log_dir = tempfile.TemporaryDirectory()
+        self._csv_file = os.path.join(self._log_dir.name, 'progress.csv')
+        self._columnar = columnar
+        outputs = [
+            CsvOutput(self._csv_file),
+            ColumnarOutput(self._log_dir.name)
+        ]
+        tabular = TabularInput()
+        for row in range(rows):
+            for i in range(10):
+                tabular.record('metric_{}'.format(i), row + i * 0.5)
+            for output in outputs:
+                output.record(tabular)
+            tabular.clear()
+        for output in outputs:
+            output.close()
+
+    def __call__(self):
+        """Read the values of one metric."""
+        if self._columnar:
+            return ColumnarReader(self._log_dir.name)['metric_5'].sum()
+        with open(self._csv_file, 'r') as file:
+            return sum(float(row['metric_5']) for row in csv.DictReader(file))
+
+    def close(self):
+        """Delete the temp directory."""
+        self._log_dir.cleanup()
+
+
+@benchmark(number=1, rows=[1000], num_keys=[10, 100])
+def record(rows, num_keys):
+    """Write rows with a fixed set of keys."""
+    return _ColumnarWorkload(rows, num_keys)
+
+
+# Reading a column takes well under a millisecond, so it is timed over many
+# calls, after a warm-up, to be stable
+@benchmark(number=1000, rows=[100000])
+def read_column(rows):
+    """Read one metric of a run with ColumnarReader."""
+    return _ReadWorkload(rows, columnar=True)
+
+
+@benchmark(number=1, rows=[100000])
+def read_column_csv(rows):
+    """Read one metric of the same run from CSV, for comparison."""
+    return _ReadWorkload(rows, columnar=False)
@@ -0,0 +1,119 @@
+"""Benchmarks for `dowel.CsvOutput`."""
+import os
+import tempfile
+
+from benchmarks.harness import benchmark
+from dowel import CsvOutput, read_csv, TabularInput
+
+
+class _CsvWorkload:
+    """Workload writing rows to a fresh CsvOutput in a temp directory.
+
+    :param rows: The number of rows written per call.
+    :param num_keys: The number of keys in the first row.
+    :param new_key_every: Add a key to the table after this many rows.
+    :param append_only: Whether to create the CsvOutput with append_only.
+    :param compression: The compression of the CsvOutput.
+    """
+
+    def __init__(self,
+                 rows,
+                 num_keys,
+                 new_key_every=None,
+                 append_only=False,
+                 compression=None):
+        self._rows = rows
+        self._num_keys = num_keys
+        self._new_key_every = new_key_every
+        self._append_only = append_only
+        self._compression = compression
+        self._log_dir = tempfile.TemporaryDirectory()
+        self._tabular = TabularInput()
+        self._calls = 0
+
+    def __call__(self):
+        """Write all rows to a new CSV file."""
+        self._calls += 1
+        csv_output = CsvOutput(os.path.join(self._log_dir.name,
+                                            '{}.csv'.format(self._calls)),
+                               append_only=self._append_only,
+                               compression=self._compression)
+        tabular = self._tabular
+        num_keys = self._num_keys
+        for row in range(self._rows):
+            if self._new_key_every and row and row % self._new_key_every == 0:
+                num_keys += 1
+            for i in range(num_keys):
+                tabular.record('metric_{}'.format(i), row + i * 0.5)
+            csv_output.record(tabular)
+            tabular.clear()
+        csv_output.close()
+
+    def close(self):
+        """Delete the temp directory."""
+        self._log_dir.cleanup()
+
+
+@benchmark(number=1, rows=[1000], num_keys=[10, 100])
+def record(rows, num_keys):
+    """Write rows with a fixed set of keys."""
+    return _CsvWorkload(rows, num_keys)
+
+
+@benchmark(number=1, rows=[1000], compression=['gzip', 'lzma'])
+def record_compressed(rows, compression):
+    """Write rows of 100 keys to a compressed file, including closing it."""
+    return _CsvWorkload(rows, 100, compression=compression)
+
+
+@benchmark(number=1, repeat=1, rows=[100000], new_key_every=[10000])
+def schema_growth(rows, new_key_every):
+    """Write rows where a new key appears every new_key_every rows."""
+    return _CsvWorkload(rows, 10, new_key_every)
+
+
+@benchmark(number=1, repeat=1, rows=[100000], new_key_every=[10000])
+def schema_growth_append_only(rows, new_key_every):
+    """Write rows where keys appear late, with CsvOutput(append_only=True)."""
+    return _CsvWorkload(rows, 10, new_key_every, append_only=True)
+
+
+class _ReadWorkload:
+    """Workload reading columns of a CSV file with read_csv().
+
+    :param rows: The number of rows in the file.
+    :param columns: The columns to read, or None to read every column.
+    """
+
+    def __init__(self, rows, columns):
+        self._log_dir = tempfile.TemporaryDirectory()
+        self._file_name = os.path.join(self._log_dir.name, 'progress.csv')
+        self._columns = columns
+        csv_output = CsvOutput(self._file_name)
+        tabular = TabularInput()
+        for row in range(rows):
+            for i in range(10):
+                tabular.record('metric_{}'.format(i), row + i * 0.5)
+            csv_output.record(tabular)
+            tabular.clear()
+        csv_output.close()
+
+    def __call__(self):
+        """Read the columns."""
+        return read_csv(self._file_name, self._columns)
+
+    def close(self):
+        """Delete the temp directory."""
+        self._log_dir.cleanup()
+
+
+@benchmark(number=1, rows=[100000])
+def read_one_column(rows):
+    """Read one metric of a CSV file with read_csv()."""
+    return _ReadWorkload(rows, ['metric_5'])
+
+
+@benchmark(number=1, rows=[100000])
+def read_all_columns(rows):
+    """Read every metric of a CSV file with read_csv()."""
+    return _ReadWorkload(rows, None)
@@ -0,0 +1,65 @@
+"""Startup benchmark for `import dowel`.
+
+Measures the wall time of `import dowel` in fresh interpreters, and fails if
+the best time exceeds a budget. Heavy dependencies (matplotlib, scipy,
+tensorboardX and tensorflow) must not be imported by `import dowel` alone.
+
+Run with:
+    python -m benchmarks.bench_import [--budget SECONDS]
+"""
+import argparse
+import subprocess
+import sys
+
+# Time budget for `import dowel`, in seconds
+DEFAULT_BUDGET = 0.5
+
+_SCRIPT = '''
+import sys
+import time
+start = time.perf_counter()
+import dowel
+elapsed = time.perf_counter() - start
+heavy = ('matplotlib', 'scipy', 'tensorboardX', 'tensorflow')
+print(elapsed, ','.join(m for m in heavy if m in sys.modules))
+'''
+
+
+def time_import(repeat=5):
+    """Time `import dowel` in fresh interpreters.
+
+    :param repeat: The number of interpreters to start.
+    :return: The best import time in seconds, and the heavy modules which
+     were imported.
+    """
+    times = []
+    heavy = ''
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', _SCRIPT],
+                             check=True,
+                             stdout=subprocess.PIPE,
+                             universal_newlines=True).stdout.split()
+        times.append(float(out[0]))
+        if len(out) > 1:
+            heavy = out[1]
+    return min(times), heavy
+
+
+def main():
+    """Run the benchmark and exit with an error if it fails."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    elapsed, heavy = time_import(args.repeat)
+    print('import dowel: {:.3f}s (budget {:.3f}s)'.format(
+        elapsed, args.budget))
+    if heavy:
+        print('heavy modules imported: {}'.format(heavy))
+    if heavy or elapsed > args.budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Benchmarks for dispatching data through `dowel.Logger.log`.
+
+Run as a script to compare the cached dispatch table against the reference
+implementation which queries `types_accepted` of every output on every call:
+    python -m benchmarks.bench_logger
+"""
+import timeit
+
+from benchmarks.harness import benchmark
+from dowel import Logger, LogOutput, TabularInput
+
+
+class NullOutput(LogOutput):
+    """Output which accepts str and TabularInput but does nothing."""
+
+    @property
+    def types_accepted(self):
+        """Accept str and TabularInput objects."""
+        return (str, TabularInput)
+
+    def record(self, data, prefix=''):
+        """Mark tabular data as recorded."""
+        if isinstance(data, TabularInput):
+            data.mark_all()
+
+
+class _UncachedLogger(Logger):
+    """Logger which looks up accepting outputs on every call."""
+
+    def log(self, data, level=None):
+        """Log data without using the dispatch table."""
+        for output in self._outputs:
+            if isinstance(data, output.types_accepted):
+                output.record(data, prefix=self._prefix_str)
+
+
+def make_logger(num_outputs, logger_type=Logger):
+    """Create a logger with NullOutputs attached.
+
+    :param num_outputs: The number of outputs to attach.
+    :param logger_type: The Logger class to instantiate.
+    :return: The logger.
+    """
+    logger = logger_type()
+    for _ in range(num_outputs):
+        logger.add_output(NullOutput())
+    return logger
+
+
+@benchmark(number=20000, num_outputs=[1, 4, 16])
+def log_str(num_outputs):
+    """Log a string."""
+    logger = make_logger(num_outputs)
+    return lambda: logger.log('message')
+
+
+@benchmark(number=20000, num_outputs=[1, 4, 16])
+def log_tabular(num_outputs):
+    """Log a small table."""
+    logger = make_logger(num_outputs)
+    tabular = TabularInput()
+    tabular.record('itr', 1)
+    tabular.record('loss', 0.5)
+    return lambda: logger.log(tabular)
+
+
+def _time_per_call(logger, data, number):
+    """Return the best time per log() call in nanoseconds."""
+    timer = timeit.Timer(lambda: logger.log(data))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e9
+
+
+def main(number=20000):
+    """Compare cached and uncached dispatch, and print a table of results."""
+    tabular = TabularInput()
+    print('{:>8} {:>9} {:>14} {:>14} {:>8}'.format('outputs', 'data',
+                                                   'uncached (ns)',
+                                                   'cached (ns)', 'speedup'))
+    for num_outputs in (1, 4, 16):
+        cached = make_logger(num_outputs)
+        uncached = make_logger(num_outputs, _UncachedLogger)
+        for name, data in (('str', 'message'), ('tabular', tabular)):
+            before = _time_per_call(uncached, data, number)
+            after = _time_per_call(cached, data, number)
+            print('{:>8} {:>9} {:>14.0f} {:>14.0f} {:>7.2f}x'.format(
+                num_outputs, name, before, after, before / after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""Benchmarks for `dowel.TabularInput` with tables of 10 to 10,000 keys."""
+import numpy as np
+
+from benchmarks.harness import benchmark
+from dowel import ColumnarTabularInput, TabularInput
+
+TABLE_SIZES = [10, 100, 1000, 10000]
+
+
+def make_table(num_keys, table_type=TabularInput):
+    """Create a table of float entries.
+
+    :param num_keys: The number of keys in the table.
+    :param table_type: The TabularInput class to instantiate.
+    :return: The table, and its keys.
+    """
+    tabular = table_type()
+    tabular.disable_warnings()
+    keys = ['metric_{}'.format(i) for i in range(num_keys)]
+    for i, key in enumerate(keys):
+        tabular.record(key, i * 0.5)
+    return tabular, keys
+
+
+def _per_table(num_keys):
+    """Scale the number of calls so each timing touches 100k entries."""
+    return max(1, 100000 // num_keys)
+
+
+@benchmark(number=_per_table, num_keys=TABLE_SIZES)
+def record(num_keys, table_type=TabularInput):
+    """Record every key of a table under a prefix, then clear it."""
+    tabular, keys = make_table(num_keys, table_type)
+    values = [i * 0.5 for i in range(num_keys)]
+
+    def run():
+        with tabular.prefix('train/'):
+            for key, value in zip(keys, values):
+                tabular.record(key, value)
+        tabular.mark_all()
+        tabular.clear()
+
+    return run
+
+
+@benchmark(number=_per_table, num_keys=TABLE_SIZES)
+def as_primitive_dict(num_keys, table_type=TabularInput):
+    """Build the primitive view of a table after one of its entries changed.
+
+    Views are cached until the table changes, so one entry is recorded again
+    before each build.
+    """
+    tabular, keys = make_table(num_keys, table_type)
+
+    def run():
+        tabular.record(keys[0], 0.)
+        return tabular.as_primitive_dict
+
+    return run
+
+
+@benchmark(number=_per_table, num_keys=TABLE_SIZES)
+def record_array(num_keys, table_type=TabularInput):
+    """Record a vector of values under a prefix in one call, then clear."""
+    tabular, keys = make_table(num_keys, table_type)
+    values = np.arange(num_keys) * 0.5
+
+    def run():
+        with tabular.prefix('train/'):
+            tabular.record_array(keys, values)
+        tabular.mark_all()
+        tabular.clear()
+
+    return run
+
+
+@benchmark(number=_per_table, num_keys=TABLE_SIZES)
+def handle_set(num_keys):
+    """Record every key of a table through handles, then clear it."""
+    tabular, keys = make_table(num_keys)
+    with tabular.prefix('train/'):
+        handles = [tabular.handle(key) for key in keys]
+    values = [i * 0.5 for i in range(num_keys)]
+
+    def run():
+        for handle, value in zip(handles, values):
+            handle.set(value)
+        tabular.mark_all()
+        tabular.clear()
+
+    return run
+
+
+@benchmark(number=_per_table, num_keys=TABLE_SIZES)
+def log_row(num_keys, table_type=TabularInput, use_array=False):
+    """Record a row, read it as an output would, then clear the table.
+
+    This is the whole cycle of a logged row: recording every key, building
+    the primitive view, marking it as recorded, and clearing.
+    """
+    tabular, keys = make_table(num_keys, table_type)
+    values = [i * 0.5 for i in range(num_keys)]
+    array = np.array(values)
+
+    def run():
+        if use_array:
+            tabular.record_array(keys, array)
+        else:
+            for key, value in zip(keys, values):
+                tabular.record(key, value)
+        tabular.as_primitive_dict
+        tabular.mark_str()
+        tabular.clear()
+
+    return run
+
+
+@benchmark(number=_per_table, num_keys=TABLE_SIZES)
+def columnar_log_row(num_keys):
+    """Record, read and clear a row of a ColumnarTabularInput."""
+    return log_row(num_keys, ColumnarTabularInput)
+
+
+@benchmark(number=_per_table, num_keys=TABLE_SIZES)
+def columnar_log_row_array(num_keys):
+    """Record a row with record_array, read it and clear it."""
+    return log_row(num_keys, ColumnarTabularInput, use_array=True)
+
+
+@benchmark(number=_per_table, num_keys=TABLE_SIZES)
+def columnar_record(num_keys):
+    """Record every key of a ColumnarTabularInput, then clear it."""
+    return record(num_keys, ColumnarTabularInput)
+
+
+@benchmark(number=_per_table, num_keys=TABLE_SIZES)
+def columnar_as_primitive_dict(num_keys):
+    """Build the primitive view of a ColumnarTabularInput."""
+    return as_primitive_dict(num_keys, ColumnarTabularInput)
+
+
+@benchmark(number=_per_table, num_keys=TABLE_SIZES)
+def columnar_record_array(num_keys):
+    """Record a vector of values in a ColumnarTabularInput, then clear."""
+    return record_array(num_keys, ColumnarTabularInput)
+
+
+@benchmark(number=lambda num_keys: max(1, 10000 // num_keys),
+           num_keys=TABLE_SIZES)
+def render(num_keys):
+    """Render a table as text after one of its entries changed."""
+    tabular, keys = make_table(num_keys)
+
+    def run():
+        tabular.record(keys[0], 0.)
+        return str(tabular)
+
+    return run
+
+
+@benchmark(number=_per_table, num_keys=TABLE_SIZES)
+def record_misc_stat(num_keys):
+    """Record statistics of an array of values."""
+    tabular = TabularInput()
+    values = [i * 0.5 for i in range(num_keys)]
+    return lambda: tabular.record_misc_stat('Return', values)
+
+
+@benchmark(number=lambda num_keys: max(1, 1000 // num_keys),
+           num_keys=TABLE_SIZES)
+def record_misc_stat_axis(num_keys):
+    """Record per-column statistics of 100 samples of num_keys metrics."""
+    tabular = TabularInput()
+    values = np.random.default_rng(0).normal(size=(100, num_keys))
+    return lambda: tabular.record_misc_stat(
+        'Env', values, percentiles=[10, 90], axis=0)
+
+
+@benchmark(number=_per_table, num_keys=TABLE_SIZES)
+def accumulator(num_keys):
+    """Add values to an accumulator one at a time, then read and clear."""
+    tabular = TabularInput()
+    returns = tabular.accumulator('Return')
+    values = [i * 0.5 for i in range(num_keys)]
+
+    def run():
+        for value in values:
+            returns.add(value)
+        tabular.mark_all()
+        tabular.clear()
+
+    return run
@@ -0,0 +1,66 @@
+"""Benchmarks for `dowel.TensorBoardOutput`."""
+import tempfile
+
+import numpy as np
+
+from benchmarks.harness import benchmark
+from dowel import Histogram, TabularInput
+
+
+class _TensorBoardWorkload:
+    """Workload recording a table into a TensorBoardOutput and dumping it.
+
+    :param make_table: Function which fills in a TabularInput.
+    :param kwargs: Arguments for TensorBoardOutput.
+    """
+
+    def __init__(self, make_table, **kwargs):
+        # pylint: disable=import-outside-toplevel
+        from dowel import TensorBoardOutput
+        self._log_dir = tempfile.TemporaryDirectory()
+        self._output = TensorBoardOutput(self._log_dir.name, **kwargs)
+        self._tabular = TabularInput()
+        self._make_table = make_table
+
+    def __call__(self):
+        """Record and dump one row."""
+        self._make_table(self._tabular)
+        self._output.record(self._tabular)
+        self._output.dump()
+        self._tabular.clear()
+
+    def close(self):
+        """Close the output and delete the temp directory."""
+        self._output.close()
+        self._log_dir.cleanup()
+
+
+@benchmark(number=100, num_keys=[10, 100], additional_x_axes=[0, 2])
+def dump(num_keys, additional_x_axes):
+    """Dump scalars against an x-axis and additional x-axes."""
+    axes = ['axis_{}'.format(i) for i in range(additional_x_axes)]
+    keys = ['metric_{}'.format(i) for i in range(num_keys)]
+    row = iter(range(10**9))
+
+    def make_table(tabular):
+        step = next(row)
+        tabular.record('itr', step)
+        for axis in axes:
+            tabular.record(axis, step * 2)
+        for key in keys:
+            tabular.record(key, step * 0.5)
+
+    return _TensorBoardWorkload(make_table,
+                                x_axis='itr',
+                                additional_x_axes=axes)
+
+
+@benchmark(number=20, samples=[1000, 100000])
+def histogram(samples):
+    """Dump a histogram of normally distributed samples."""
+    hist = Histogram(np.random.normal(size=samples))
+
+    def make_table(tabular):
+        tabular.record('samples', hist)
+
+    return _TensorBoardWorkload(make_table)
@@ -0,0 +1,175 @@
+"""A minimal harness for registering, running and comparing benchmarks.
+
+A benchmark is a function which sets up a workload for one combination of
+its parameters, and returns a function with no arguments which runs it once:
+
+    @benchmark(num_outputs=[1, 4, 16])
+    def log_str(num_outputs):
+        logger = make_logger(num_outputs)
+        return lambda: logger.log('message')
+
+Each combination of parameters is reported as a separate result, named like
+'bench_logger.log_str[num_outputs=4]'.
+"""
+import collections
+import gc
+import itertools
+import json
+import platform
+import sys
+import time
+
+_REGISTRY = collections.OrderedDict()
+
+Benchmark = collections.namedtuple(
+    'Benchmark', ['name', 'setup', 'params', 'number', 'repeat'])
+
+
+def benchmark(number=1000, repeat=None, **params):
+    """Register a benchmark function.
+
+    If the returned workload function has a close() method, it is called
+    after the workload has been timed.
+
+    :param number: How many times to run the workload per timing, or a
+     function which computes this from the benchmark parameters.
+    :param repeat: How many timings to take. Defaults to the value passed to
+     run_all().
+    :param params: Lists of values for each keyword argument of the
+     benchmark function.
+    :return: A decorator which registers the function.
+    """
+
+    def decorator(setup):
+        module = setup.__module__.rsplit('.', 1)[-1]
+        name = '{}.{}'.format(module, setup.__name__)
+        _REGISTRY[name] = Benchmark(name, setup, params, number, repeat)
+        return setup
+
+    return decorator
+
+
+def expand(bench):
+    """Generate the parameter combinations of a benchmark.
+
+    :param bench: A registered Benchmark.
+    :return: An iterator of (result name, keyword arguments) pairs.
+    """
+    keys = sorted(bench.params)
+    for values in itertools.product(*(bench.params[k] for k in keys)):
+        kwargs = dict(zip(keys, values))
+        if kwargs:
+            name = '{}[{}]'.format(
+                bench.name,
+                ','.join('{}={}'.format(k, kwargs[k]) for k in keys))
+        else:
+            name = bench.name
+        yield name, kwargs
+
+
+def measure(run, number, repeat):
+    """Time a workload.
+
+    :param run: The workload function.
+    :param number: How many times to call run per timing.
+    :param repeat: How many timings to take.
+    :return: A dict with the best and mean time per call, in seconds.
+    """
+    if number > 1:
+        # Warm up caches before the first timing
+        for _ in range(min(number, 100)):
+            run()
+    times = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                run()
+            times.append((time.perf_counter() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return {
+        'best': min(times),
+        'mean': sum(times) / len(times),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def run_all(pattern='', repeat=5, scale=1.):
+    """Run all registered benchmarks.
+
+    :param pattern: Only run benchmarks whose result name contains this.
+    :param repeat: How many timings to take of each benchmark.
+    :param scale: Factor applied to the number of calls per timing.
+    :return: A dict of results, which can be saved with save().
+    """
+    results = collections.OrderedDict()
+    for bench in _REGISTRY.values():
+        for name, kwargs in expand(bench):
+            if pattern not in name:
+                continue
+            number = bench.number
+            if callable(number):
+                number = number(**kwargs)
+            number = max(1, int(number * scale))
+            run = bench.setup(**kwargs)
+            try:
+                results[name] = measure(run, number, bench.repeat or repeat)
+            finally:
+                close = getattr(run, 'close', None)
+                if close is not None:
+                    close()
+            print('{:<60} {:>12.3f} us'.format(name,
+                                               results[name]['best'] * 1e6))
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Compare results against a baseline.
+
+    :param results: Results returned by run_all().
+    :param baseline: Results loaded from a baseline file.
+    :param threshold: Maximum allowed relative slowdown, e.g. 0.2 for 20%.
+    :return: A list of (name, baseline time, new time) of each regression.
+    """
+    regressions = []
+    for name, result in results['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = result['best'] / base['best']
+        marker = ''
+        if ratio > 1 + threshold:
+            regressions.append((name, base['best'], result['best']))
+            marker = '  REGRESSION'
+        print('{:<60} {:>7.2f}x{}'.format(name, ratio, marker))
+    return regressions
+
+
+def save(results, file_name):
+    """Save results as JSON.
+
+    :param results: Results returned by run_all().
+    :param file_name: The file to write.
+    """
+    with open(file_name, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load(file_name):
+    """Load results saved with save().
+
+    :param file_name: The file to read.
+    :return: The results.
+    """
+    with open(file_name) as f:
+        return json.load(f)
@@ -0,0 +1,84 @@
+"""Run the dowel benchmark suite.
+
+Results are printed, and can be saved as JSON. If a baseline file exists, the
+results are compared against it, and the script exits with an error if any
+benchmark is slower than its baseline by more than the threshold.
+
+Examples:
+    # Run everything and compare against benchmarks/baseline.json
+    python -m benchmarks.run
+
+    # Record a new baseline on this machine
+    python -m benchmarks.run --save-baseline
+
+    # Quickly run only the CSV benchmarks
+    python -m benchmarks.run --filter bench_csv --scale 0.1
+"""
+import argparse
+import os
+import sys
+
+# pylint: disable=unused-import
+# Importing these modules registers their benchmarks
+from benchmarks import bench_columnar, bench_csv  # noqa: F401
+from benchmarks import bench_logger  # noqa: F401
+from benchmarks import bench_tabular, bench_tensorboard  # noqa: F401
+from benchmarks import harness
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def main(argv=None):
+    """Run the benchmarks.
+
+    :param argv: Command line arguments.
+    :return: The exit status.
+    """
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--filter',
+                        default='',
+                        help='only run benchmarks whose name contains this')
+    parser.add_argument('--output', help='file to save results to as JSON')
+    parser.add_argument('--baseline',
+                        default=DEFAULT_BASELINE,
+                        help='results file to compare against')
+    parser.add_argument('--save-baseline',
+                        action='store_true',
+                        help='save the results as the new baseline')
+    parser.add_argument('--threshold',
+                        type=float,
+                        default=0.25,
+                        help='allowed relative slowdown (default: 0.25)')
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=5,
+                        help='timings taken of each benchmark (default: 5)')
+    parser.add_argument('--scale',
+                        type=float,
+                        default=1.,
+                        help='factor applied to the calls per timing')
+    args = parser.parse_args(argv)
+
+    results = harness.run_all(args.filter, args.repeat, args.scale)
+    if args.output:
+        harness.save(results, args.output)
+    if args.save_baseline:
+        harness.save(results, args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('No baseline found at {}'.format(args.baseline))
+        return 0
+    print('\nComparison with {}:'.format(args.baseline))
+    regressions = harness.compare(results, harness.load(args.baseline),
+                                  args.threshold)
+    if regressions:
+        print('\n{} benchmark(s) regressed by more than {:.0%}'.format(
+            len(regressions), args.threshold))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,6 +5,7 @@ from setuptools import setup
 # Required dependencies
 required = [
     # Please keep alphabetized
+    'contextvars; python_version < "3.7"',
     'matplotlib',
     'numpy',
     'python-dateutil',
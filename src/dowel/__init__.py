@@ -1,27 +1,78 @@
 """Logger module.
 
-This module instantiates a global logger singleton.
+This module instantiates a global logger singleton. `logger` and `tabular`
+refer to the logger and tabular of the current session (see
+`dowel.context`).
+
+TensorBoardOutput is imported on first use, because it depends on
+tensorboardX, which is slow to import.
 """
+import sys
+
+from dowel.accumulators import (ExponentialMovingAverage, RollingWindow,
+                                StatAccumulator)
 from dowel.histogram import Histogram
-from dowel.logger import Logger, LoggerWarning, LogOutput
-from dowel.simple_outputs import StdOutput, TextOutput
+from dowel.logger import DEBUG, ERROR, INFO, NOTSET, WARNING
+from dowel.logger import lazy, LazyMessage, Logger, LoggerWarning
+from dowel.logger import LogOutput
+from dowel.simple_outputs import FlushPolicy, StdOutput, TextOutput
 from dowel.tabular_input import TabularInput
-from dowel.csv_output import CsvOutput  # noqa: I100
-from dowel.tensor_board_output import TensorBoardOutput
+from dowel.columnar_tabular_input import ColumnarTabularInput  # noqa: I100
+from dowel.thread_safe_tabular_input import ThreadSafeTabularInput
+from dowel.columnar_output import ColumnarOutput, ColumnarReader  # noqa: I100
+from dowel.csv_output import CsvOutput, read_csv
+from dowel.forwarding_output import ForwardingOutput, LogListener
+from dowel.context import current_logger, current_tabular  # noqa: I100
+from dowel.context import logger, session, tabular
 
-logger = Logger()
-tabular = TabularInput()
+if sys.version_info < (3, 7):
+    from dowel.tensor_board_output import TensorBoardOutput  # noqa: F401
 
 __all__ = [
+    'DEBUG',
+    'ERROR',
+    'INFO',
+    'NOTSET',
+    'WARNING',
+    'ExponentialMovingAverage',
     'Histogram',
+    'LazyMessage',
     'Logger',
+    'ColumnarOutput',
+    'ColumnarReader',
+    'ColumnarTabularInput',
     'CsvOutput',
+    'FlushPolicy',
+    'ForwardingOutput',
+    'LogListener',
+    'RollingWindow',
     'StdOutput',
     'TextOutput',
     'LogOutput',
     'LoggerWarning',
+    'StatAccumulator',
     'TabularInput',
     'TensorBoardOutput',
+    'ThreadSafeTabularInput',
+    'current_logger',
+    'current_tabular',
+    'lazy',
     'logger',
+    'read_csv',
+    'session',
     'tabular',
 ]
+
+
+def __getattr__(name):
+    """Import TensorBoardOutput lazily.
+
+    :param name: The attribute of the module being accessed.
+    :return: The attribute.
+    """
+    if name == 'TensorBoardOutput':
+        # pylint: disable=import-outside-toplevel
+        from dowel.tensor_board_output import TensorBoardOutput
+        return TensorBoardOutput
+    raise AttributeError('module {!r} has no attribute {!r}'.format(
+        __name__, name))
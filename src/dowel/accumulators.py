@@ -0,0 +1,403 @@
+"""Streaming statistics which are recorded into a `dowel.TabularInput`.
+
+record_misc_stat needs every value of an iteration at once. A StatAccumulator
+instead keeps a constant-size summary of the values it has been fed (count,
+mean, sum of squared deviations, min, max and a quantile sketch), so values
+can be added one at a time as they arrive:
+
+    returns = tabular.accumulator('Return')
+    for episode in ...:
+        returns.add(episode_return)
+    logger.log(tabular)  # records ReturnAverage, ReturnStd, ...
+
+Accumulators created with TabularInput.accumulator() record the same keys as
+record_misc_stat whenever the table is read, and are reset when the table is
+cleared.
+
+Accumulators can be pickled and merged, e.g. to combine the statistics of
+several worker processes in the parent process:
+
+    returns.merge(worker_returns)
+
+The mean and variance are combined exactly (with the parallel algorithm of
+Chan et al.). The median and percentiles are exact until more than
+sketch_size values have been added, after which they are estimated from a
+sketch whose size grows only logarithmically with the number of values.
+
+RollingWindow and ExponentialMovingAverage smooth a metric over iterations
+instead. They are created with TabularInput.rolling() and
+TabularInput.ema(), are updated in constant time per value, and keep their
+state when the table is cleared:
+
+    loss = tabular.ema('Loss', alpha=0.1)
+    for epoch in ...:
+        loss.add(compute_loss())
+        logger.log(tabular)  # records LossEMA
+"""
+import collections
+import math
+
+import numpy as np
+
+
+class StatAccumulator:
+    """Streaming summary statistics of a sequence of values.
+
+    :param percentiles: Percentiles between 0 and 100 to report, in addition
+     to the median.
+    :param sketch_size: Number of values kept per level of the quantile
+     sketch. Larger sketches give more accurate quantiles.
+    """
+
+    def __init__(self, percentiles=(), sketch_size=512):
+        self._percentiles = tuple(percentiles)
+        self._sketch = _QuantileSketch(sketch_size)
+        self.version = 0
+        self.count = 0
+        self.mean = math.nan
+        self._m2 = math.nan
+        self.min = math.nan
+        self.max = math.nan
+
+    @property
+    def names(self):
+        """The names of the statistics, as used in the table keys."""
+        return ['Average', 'Std', 'Median', 'Min', 'Max'
+                ] + ['P{:g}'.format(q) for q in self._percentiles]
+
+    @property
+    def std(self):
+        """The (population) standard deviation of the values."""
+        if not self.count:
+            return math.nan
+        return math.sqrt(self._m2 / self.count)
+
+    def add(self, value):
+        """Add a single value.
+
+        :param value: A number.
+        """
+        value = float(value)
+        if self.count:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (value - self.mean)
+            # Comparisons with NaN are always false, so use min and max
+            # only after checking for NaN.
+            if value != value or self.min != self.min:
+                self.min = self.max = math.nan
+            else:
+                self.min = min(self.min, value)
+                self.max = max(self.max, value)
+        else:
+            self.count = 1
+            self.mean = self.min = self.max = value
+            self._m2 = 0.
+        self._sketch.add(value)
+        self.version += 1
+
+    def add_batch(self, values):
+        """Add an array of values.
+
+        :param values: Array-like of numbers. It is flattened.
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        if not len(values):
+            return
+        mean = values.mean()
+        deviation = values - mean
+        self._combine(len(values), mean, float(np.dot(deviation, deviation)),
+                      values.min(), values.max())
+        self._sketch.add_batch(values)
+        self.version += 1
+
+    def merge(self, other):
+        """Add all values which were added to another accumulator.
+
+        :param other: A StatAccumulator.
+        """
+        if other.count:
+            self._combine(other.count, other.mean, other._m2, other.min,
+                          other.max)
+            self._sketch.merge(other._sketch)
+            self.version += 1
+
+    def reset(self):
+        """Remove all values."""
+        self._sketch = _QuantileSketch(self._sketch.size)
+        self.count = 0
+        self.mean = self._m2 = self.min = self.max = math.nan
+        self.version += 1
+
+    def quantile(self, q):
+        """Estimate a quantile of the values.
+
+        :param q: Quantile between 0 and 1, or an array of them.
+        :return: The quantile, or an array of them. NaN if there are no
+         values, or if any of them is NaN.
+        """
+        if not self.count or math.isnan(self.mean):
+            return np.full(np.shape(q), np.nan)[()]
+        return self._sketch.quantile(q)
+
+    def stats(self):
+        """Get the values of the statistics.
+
+        :return: A list of values, in the same order as names.
+        """
+        quantiles = self.quantile(np.array((50., ) + self._percentiles) /
+                                  100).tolist()
+        return [self.mean, self.std, quantiles[0], self.min, self.max
+                ] + quantiles[1:]
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        """Combine the moments of another set of values into this one.
+
+        :param count: Number of values in the other set.
+        :param mean: Mean of the other set.
+        :param m2: Sum of squared deviations from the mean of the other set.
+        :param minimum: Minimum of the other set.
+        :param maximum: Maximum of the other set.
+        """
+        if not self.count:
+            self.count = count
+            self.mean, self._m2 = float(mean), float(m2)
+            self.min, self.max = float(minimum), float(maximum)
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        if math.isnan(minimum) or math.isnan(self.min):
+            self.min = self.max = math.nan
+        else:
+            self.min = min(self.min, float(minimum))
+            self.max = max(self.max, float(maximum))
+
+
+class RollingWindow:
+    """Mean, minimum and maximum of the last values of a sequence.
+
+    The values are kept in a ring buffer. The sum is updated incrementally
+    (and recomputed once per window, to bound rounding errors), and the
+    minimum and maximum are kept at the front of monotonic queues, so each
+    update takes amortized constant time.
+
+    :param window: Number of most recent values to aggregate.
+    """
+
+    def __init__(self, window):
+        if window < 1:
+            raise ValueError('window must be positive')
+        self._window = window
+        self._values = [0.] * window
+        self._count = 0
+        self._nans = 0
+        self._sum = 0.
+        self._minima = collections.deque()
+        self._maxima = collections.deque()
+        self.version = 0
+
+    @property
+    def names(self):
+        """The names of the statistics, as used in the table keys."""
+        return ['RollingAverage', 'RollingMin', 'RollingMax']
+
+    def add(self, value):
+        """Add a value, dropping the oldest one if the window is full.
+
+        :param value: A number.
+        """
+        value = float(value)
+        window = self._window
+        index = self._count
+        slot = index % window
+        if index >= window:
+            oldest = self._values[slot]
+            if oldest != oldest:
+                self._nans -= 1
+            else:
+                self._sum -= oldest
+        self._values[slot] = value
+        self._count += 1
+
+        if value != value:
+            self._nans += 1
+        else:
+            self._sum += value
+            # The queues hold (index, value) pairs of the values which may
+            # still become the minimum (maximum) of the window, in order.
+            minima = self._minima
+            while minima and minima[-1][1] >= value:
+                minima.pop()
+            minima.append((index, value))
+            maxima = self._maxima
+            while maxima and maxima[-1][1] <= value:
+                maxima.pop()
+            maxima.append((index, value))
+        expired = index - window
+        for queue in (self._minima, self._maxima):
+            if queue and queue[0][0] <= expired:
+                queue.popleft()
+        if slot == window - 1:
+            self._sum = math.fsum(v for v in self._values if v == v)
+        self.version += 1
+
+    def reset(self):
+        """Remove all values."""
+        self._count = 0
+        self._nans = 0
+        self._sum = 0.
+        self._minima.clear()
+        self._maxima.clear()
+        self.version += 1
+
+    def stats(self):
+        """Get the values of the statistics.
+
+        :return: A list of values, in the same order as names. They are NaN
+         if there are no values, or if the window contains a NaN.
+        """
+        if not self._count or self._nans:
+            return [math.nan] * 3
+        size = min(self._count, self._window)
+        return [self._sum / size, self._minima[0][1], self._maxima[0][1]]
+
+
+class ExponentialMovingAverage:
+    """Exponential moving average of a sequence of values.
+
+    :param alpha: Weight of each new value, between 0 and 1. Smaller values
+     give smoother averages.
+    """
+
+    def __init__(self, alpha):
+        if not 0 < alpha <= 1:
+            raise ValueError('alpha must be in (0, 1]')
+        self._alpha = alpha
+        self._started = False
+        self.value = math.nan
+        self.version = 0
+
+    @property
+    def names(self):
+        """The names of the statistics, as used in the table keys."""
+        return ['EMA']
+
+    def add(self, value):
+        """Add a value.
+
+        :param value: A number.
+        """
+        value = float(value)
+        if self._started:
+            self.value += self._alpha * (value - self.value)
+        else:
+            self.value = value
+            self._started = True
+        self.version += 1
+
+    def reset(self):
+        """Forget all values."""
+        self._started = False
+        self.value = math.nan
+        self.version += 1
+
+    def stats(self):
+        """Get the values of the statistics.
+
+        :return: A list with the average.
+        """
+        return [self.value]
+
+
+class _QuantileSketch:
+    """A mergeable summary of values for estimating their quantiles.
+
+    The sketch is a stack of levels, where each value at level i stands for
+    2**i of the original values. When a level holds more than size values,
+    it is sorted and every other value is moved up one level (a compaction,
+    as in the KLL sketch). While nothing has been compacted, the sketch
+    holds every value and its quantiles are exact.
+
+    :param size: Maximum number of values per level.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._buffer = []
+        self._levels = []
+        self._offset = 0
+
+    def add(self, value):
+        """Add a single value.
+
+        :param value: A float.
+        """
+        self._buffer.append(value)
+        if len(self._buffer) > self.size:
+            self._compact()
+
+    def add_batch(self, values):
+        """Add an array of values.
+
+        :param values: A one-dimensional float array.
+        """
+        self._buffer.extend(values.tolist())
+        if len(self._buffer) > self.size:
+            self._compact()
+
+    def merge(self, other):
+        """Add the values summarized by another sketch.
+
+        :param other: A _QuantileSketch.
+        """
+        self._buffer.extend(other._buffer)
+        for i, level in enumerate(other._levels):
+            if i < len(self._levels):
+                self._levels[i] = np.concatenate((self._levels[i], level))
+            else:
+                self._levels.append(level)
+        self._compact()
+
+    def _compact(self):
+        """Compact every level which holds more than size values."""
+        levels = [np.array(self._buffer, dtype=np.float64)] + self._levels
+        for i, level in enumerate(levels):
+            if len(level) <= self.size:
+                continue
+            level = np.sort(level)
+            # Keep one value at this level if there is an odd number
+            end = len(level) - len(level) % 2
+            promoted = level[self._offset:end:2]
+            self._offset ^= 1
+            levels[i] = level[end:]
+            if i + 1 < len(levels):
+                levels[i + 1] = np.concatenate((levels[i + 1], promoted))
+            else:
+                levels.append(promoted)
+        self._buffer = levels[0].tolist()
+        self._levels = levels[1:]
+
+    def quantile(self, q):
+        """Estimate quantiles of the values.
+
+        :param q: Quantile between 0 and 1, or an array of them.
+        :return: The quantile, or an array of them.
+        """
+        if not any(len(level) for level in self._levels):
+            # Exact, with the same interpolation as record_misc_stat
+            return np.percentile(self._buffer, np.multiply(q, 100))
+        values = np.concatenate([self._buffer] + self._levels)
+        weights = np.concatenate([np.ones(len(self._buffer))] + [
+            np.full(len(level), 2.**(i + 1))
+            for i, level in enumerate(self._levels)
+        ])
+        order = np.argsort(values)
+        values = values[order]
+        # Each value represents the ranks around the middle of its weight
+        ranks = np.cumsum(weights[order]) - weights[order] / 2
+        return np.interp(np.multiply(q, ranks[-1] + weights[order][-1] / 2),
+                         ranks, values)
@@ -0,0 +1,482 @@
+"""A `dowel.logger.LogOutput` which stores tables in binary column files.
+
+Parsing a CSV file of millions of rows takes seconds, even to read a single
+metric. ColumnarOutput instead writes each key to its own file of raw
+float32, float64 or int64 values, so one metric can be loaded by mapping a
+single file into memory:
+
+    logger.add_output(dowel.ColumnarOutput('progress'))
+    ...
+    reader = dowel.ColumnarReader('progress')
+    loss = reader['Loss']  # a read-only np.memmap
+
+The directory holds:
+
+* manifest.json, which lists every column with its key, data type and
+  files. It is replaced atomically whenever a column is added or changes.
+* steps.int64, the step of each row, i.e. the step passed to dump(), or the
+  number of earlier calls to dump() if no step was given.
+* columns/<index>.<dtype>, the values of each column, one per row. Rows
+  which do not have the key hold NaN (0 for int64 columns).
+* columns/<index>.valid, a packed bitmap of the rows which have the key, for
+  columns which are missing from any row.
+
+Rows are buffered in memory, and written in chunks of many rows, since
+each write appends to every column file. A chunk is written once enough
+rows were dumped, or enough time passed since the last chunk, and on
+flush() and close(). The columns are appended to first, and steps.int64
+last, so a reader of a directory which is still being written to only sees
+complete rows.
+
+Only numbers are stored. bools and ints are stored as int64, unless a column
+also has floats, in which case it is converted to float64. Other values,
+such as strings, are skipped with a warning.
+"""
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+
+from dowel import LoggerWarning
+from dowel import LogOutput
+from dowel import TabularInput
+from dowel.utils import colorize, mkdir_p
+
+_MANIFEST = 'manifest.json'
+_STEPS = 'steps.int64'
+_COLUMNS = 'columns'
+
+_INT_TYPES = frozenset(
+    [int, bool, np.bool_, np.int64, np.int32, np.int16, np.int8, np.uint32,
+     np.uint16, np.uint8])  # yapf: disable
+_FLOAT_TYPES = frozenset([float, np.float64, np.float16])
+
+_FILL = {'float32': np.nan, 'float64': np.nan, 'int64': 0}
+
+# Columns past this many are opened and closed on every write
+_MAX_OPEN_COLUMNS = 256
+
+
+class ColumnarOutput(LogOutput):
+    """Binary columnar output for logger.
+
+    :param log_dir: The directory this output should log to. Files already
+     in it are overwritten.
+    :param chunk_rows: Write the dumped rows once there are this many.
+    :param chunk_seconds: Write the dumped rows on a dump this many seconds
+     after the last write.
+    """
+
+    def __init__(self, log_dir, chunk_rows=1024, chunk_seconds=10.):
+        mkdir_p(os.path.join(log_dir, _COLUMNS))
+        self._log_dir = log_dir
+        self._chunk_rows = chunk_rows
+        self._chunk_seconds = chunk_seconds
+        self._columns = {}
+        self._pending = []
+        self._pending_steps = []
+        self._written_at = time.monotonic()
+        self._rows = 0
+        self._default_step = 0
+        self._warned_once = set()
+        self._disable_warnings = False
+        # The steps are truncated first, since they count the rows which
+        # readers see
+        self._steps_file = open(os.path.join(log_dir, _STEPS), 'wb')
+        self._write_manifest()
+
+    @property
+    def types_accepted(self):
+        """Accept TabularInput objects only."""
+        return (TabularInput, )
+
+    def record(self, data, prefix=''):
+        """Add a row of tabular data, to be written on the next dump()."""
+        if isinstance(data, TabularInput):
+            # Primitive views are rebuilt rather than changed when the table
+            # changes, so they can be kept until dump().
+            row = data.as_primitive_dict
+            if row:
+                self._pending.append(row)
+            for key in row:
+                data.mark(key)
+        else:
+            raise ValueError('Unacceptable type.')
+
+    def dump(self, step=None):
+        """End the rows recorded since the last dump, and maybe write them.
+
+        The rows are written with the earlier dumped rows once there are
+        chunk_rows of them, or chunk_seconds passed since the last write.
+
+        :param step: The step of the rows. Defaults to the number of earlier
+         calls to dump().
+        """
+        if step is None:
+            step = self._default_step
+        self._default_step += 1
+        steps = self._pending_steps
+        steps.extend([step] * (len(self._pending) - len(steps)))
+        if not steps:
+            return
+        elapsed = time.monotonic() - self._written_at
+        if len(steps) >= self._chunk_rows or elapsed >= self._chunk_seconds:
+            self.flush()
+
+    def flush(self):
+        """Write the dumped rows."""
+        self._written_at = time.monotonic()
+        num_rows = len(self._pending_steps)
+        if not num_rows:
+            return
+        rows = self._pending[:num_rows]
+        del self._pending[:num_rows]
+        steps = np.array(self._pending_steps, dtype=np.int64)
+        self._pending_steps = []
+
+        # Collect the values of each column, by position in the batch
+        entries = {}
+        for i, row in enumerate(rows):
+            for key, value in row.items():
+                column_entries = entries.get(key)
+                if column_entries is None:
+                    column_entries = entries[key] = ([], [])
+                column_entries[0].append(i)
+                column_entries[1].append(value)
+
+        schema_changed = False
+        stale_files = []
+        for key, (indices, values) in entries.items():
+            dtype = self._dtype_of(key, values)
+            if dtype is None:
+                continue
+            column = self._columns.get(key)
+            if column is None:
+                column = self._add_column(key, dtype)
+                schema_changed = True
+            elif dtype != column.dtype and column.dtype == 'int64':
+                stale_files.append(column.convert(dtype))
+                schema_changed = True
+            column.pending = (indices, values)
+        for column in self._columns.values():
+            # Columns which gain a valid bitmap change the manifest too
+            schema_changed |= column.append_pending(len(rows))
+
+        # The manifest is replaced after the columns are written, and before
+        # the rows are counted in the steps
+        if schema_changed:
+            self._write_manifest()
+        for file_name in stale_files:
+            os.remove(os.path.join(self._log_dir, file_name))
+        self._steps_file.write(steps.tobytes())
+        self._steps_file.flush()
+        self._rows += len(rows)
+
+    def close(self):
+        """Write the rows which have not been written yet, and close files."""
+        self.dump()
+        self.flush()
+        for column in self._columns.values():
+            column.close()
+        self._steps_file.close()
+
+    def disable_warnings(self):
+        """Disable logger warnings for testing."""
+        self._disable_warnings = True
+
+    def _dtype_of(self, key, values):
+        """Choose the data type of the values of a column.
+
+        :param key: The key of the column.
+        :param values: The values of the column in a batch.
+        :return: 'int64', 'float32' or 'float64', or None if the values are
+         not all numbers.
+        """
+        types = set(map(type, values))
+        if types <= _INT_TYPES:
+            return 'int64'
+        if types == {np.float32}:
+            column = self._columns.get(key)
+            if column is None or column.dtype != 'int64':
+                return 'float32'
+            return 'float64'
+        if types <= _INT_TYPES | _FLOAT_TYPES | {np.float32}:
+            column = self._columns.get(key)
+            if column is not None and column.dtype == 'float32':
+                return 'float32'
+            return 'float64'
+        self._warn('{} has values which are not numbers, and is not stored '
+                   'by ColumnarOutput'.format(key))
+        return None
+
+    def _add_column(self, key, dtype):
+        """Add a column, with no value in the rows written so far.
+
+        :param key: The key of the column.
+        :param dtype: The data type of the column.
+        :return: The new _Column.
+        """
+        column = _Column(self._log_dir, key, len(self._columns), dtype)
+        self._columns[key] = column
+        if self._rows:
+            column.append(np.full(self._rows, _FILL[dtype], dtype=dtype),
+                          np.zeros(self._rows, dtype=bool))
+        return column
+
+    def _write_manifest(self):
+        """Atomically replace the manifest with the current columns."""
+        manifest = {
+            'steps': _STEPS,
+            'columns': [column.as_dict() for column in self._columns.values()],
+        }
+        file_name = os.path.join(self._log_dir, _MANIFEST)
+        with open(file_name + '.tmp', 'w') as file:
+            json.dump(manifest, file)
+        os.replace(file_name + '.tmp', file_name)
+
+    def _warn(self, msg):
+        """Warns the user using warnings.warn, once per message.
+
+        :param msg: The message.
+        """
+        if not self._disable_warnings and msg not in self._warned_once:
+            warnings.warn(colorize(msg, 'yellow'), LoggerWarning, stacklevel=3)
+        self._warned_once.add(msg)
+
+
+class ColumnarReader:
+    """Reader of the directories written by ColumnarOutput.
+
+    The reader sees the rows which were written when it was created. Columns
+    are mapped into memory rather than read, so only the parts of them which
+    are used are loaded.
+
+    :param log_dir: The directory of a ColumnarOutput.
+    """
+
+    def __init__(self, log_dir):
+        self._log_dir = log_dir
+        # The manifest is read before the steps, so it has every column of
+        # the rows which are counted.
+        with open(os.path.join(log_dir, _MANIFEST), 'r') as file:
+            manifest = json.load(file)
+        self._columns = {
+            column['key']: column
+            for column in manifest['columns']
+        }
+        self._steps = manifest['steps']
+        self._rows = os.path.getsize(os.path.join(log_dir, self._steps)) // 8
+
+    @property
+    def keys(self):
+        """The keys of the columns, in the order they were added."""
+        return list(self._columns)
+
+    @property
+    def steps(self):
+        """The step of every row."""
+        return self._map(self._steps, np.int64)
+
+    def __len__(self):
+        """The number of rows."""
+        return self._rows
+
+    def __contains__(self, key):
+        """Check if there is a column for a key."""
+        return key in self._columns
+
+    def __getitem__(self, key):
+        """Get the values of a column.
+
+        :param key: The key of the column.
+        :return: A read-only array with one value per row. Rows which do not
+         have the key hold NaN, or 0 in int64 columns.
+        :raises KeyError: If there is no column for the key.
+        """
+        column = self._columns[key]
+        return self._map(column['file'], column['dtype'])
+
+    def valid(self, key):
+        """Get which rows have a value for a key.
+
+        :param key: The key of the column.
+        :return: A boolean array with one element per row.
+        :raises KeyError: If there is no column for the key.
+        """
+        column = self._columns[key]
+        if column['valid'] is None:
+            return np.ones(self._rows, dtype=bool)
+        return _read_valid(os.path.join(self._log_dir, column['valid']),
+                           self._rows)
+
+    def _map(self, file_name, dtype):
+        """Map the first values of a file into memory.
+
+        :param file_name: The file, relative to the directory.
+        :param dtype: The data type of the values.
+        :return: A read-only np.memmap of one value per row.
+        """
+        if not self._rows:
+            # Empty files cannot be mapped
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self._log_dir, file_name),
+                         dtype=dtype,
+                         mode='r',
+                         shape=(self._rows, ))
+
+
+class _Column:
+    """A column of a ColumnarOutput.
+
+    The files of the first columns are kept open between writes. The files
+    of the others are opened on every write, to not run out of file
+    descriptors.
+
+    :param log_dir: The directory of the output.
+    :param key: The key of the column.
+    :param index: The position of the column, which names its files.
+    :param dtype: The data type of the values.
+    """
+
+    def __init__(self, log_dir, key, index, dtype):
+        self.key = key
+        self.index = index
+        self.dtype = dtype
+        self.rows = 0
+        self.pending = None
+        self.has_valid = False
+        self._log_dir = log_dir
+        self._keep_open = index < _MAX_OPEN_COLUMNS
+        self._values_file = None
+        self._valid_file = None
+        self._valid_bytes = 0
+        self._valid_tail = np.zeros(0, dtype=bool)
+        # Truncate the file, which may be left over from an earlier run
+        open(os.path.join(log_dir, self.file_name), 'wb').close()
+
+    @property
+    def file_name(self):
+        """The file of the values, relative to the directory."""
+        return os.path.join(_COLUMNS,
+                            '{:05d}.{}'.format(self.index, self.dtype))
+
+    @property
+    def valid_file_name(self):
+        """The file of the valid bitmap, relative to the directory."""
+        return os.path.join(_COLUMNS, '{:05d}.valid'.format(self.index))
+
+    def as_dict(self):
+        """Describe the column in the manifest.
+
+        :return: A dict of the key, data type and files of the column.
+        """
+        return {
+            'key': self.key,
+            'dtype': self.dtype,
+            'file': self.file_name,
+            'valid': self.valid_file_name if self.has_valid else None,
+        }
+
+    def append_pending(self, num_rows):
+        """Append the values of a batch of rows.
+
+        :param num_rows: The number of rows in the batch.
+        :return: True if the column gained a valid bitmap.
+        """
+        if self.pending is None:
+            values = np.full(num_rows, _FILL[self.dtype], dtype=self.dtype)
+            valid = np.zeros(num_rows, dtype=bool)
+        else:
+            indices, batch_values = self.pending
+            self.pending = None
+            if len(indices) == num_rows:
+                values = np.array(batch_values, dtype=self.dtype)
+                valid = None
+            else:
+                values = np.full(num_rows, _FILL[self.dtype], dtype=self.dtype)
+                values[indices] = batch_values
+                valid = np.zeros(num_rows, dtype=bool)
+                valid[indices] = True
+        return self.append(values, valid)
+
+    def append(self, values, valid):
+        """Append values to the column.
+
+        :param values: An array of values.
+        :param valid: A boolean array of which values are present, or None
+         if they all are.
+        :return: True if the column gained a valid bitmap.
+        """
+        if self._values_file is None:
+            self._values_file = open(
+                os.path.join(self._log_dir, self.file_name), 'ab')
+        self._values_file.write(values.tobytes())
+        self._values_file.flush()
+        created_valid = False
+        if valid is not None or self.has_valid:
+            if valid is None:
+                valid = np.ones(len(values), dtype=bool)
+            if not self.has_valid:
+                # The bitmap is created when a value is first missing
+                created_valid = self.has_valid = True
+                self._valid_file = open(
+                    os.path.join(self._log_dir, self.valid_file_name), 'wb')
+                valid = np.concatenate((np.ones(self.rows, dtype=bool), valid))
+            elif self._valid_file is None:
+                self._valid_file = open(
+                    os.path.join(self._log_dir, self.valid_file_name), 'r+b')
+            bits = np.concatenate((self._valid_tail, valid))
+            full_bytes = len(bits) // 8
+            # Rewrite the last byte if it was only partly used
+            self._valid_file.seek(self._valid_bytes)
+            self._valid_file.write(
+                np.packbits(bits, bitorder='little').tobytes())
+            self._valid_file.flush()
+            self._valid_bytes += full_bytes
+            self._valid_tail = bits[full_bytes * 8:]
+        self.rows += len(values)
+        if not self._keep_open:
+            self.close()
+        return created_valid
+
+    def convert(self, dtype):
+        """Convert the values written so far to another data type.
+
+        The values are written to a new file, so readers of the old manifest
+        can still read the old one until the manifest is replaced.
+
+        :param dtype: The new data type.
+        :return: The name of the old file, which can be removed once the
+         manifest is replaced.
+        """
+        self.close()
+        old_file_name = self.file_name
+        values = np.fromfile(os.path.join(self._log_dir, old_file_name),
+                             dtype=self.dtype).astype(dtype)
+        if self.has_valid:
+            values[
+                ~_read_valid(os.path.join(self._log_dir, self.valid_file_name
+                                          ), len(values))] = _FILL[dtype]
+        self.dtype = dtype
+        values.tofile(os.path.join(self._log_dir, self.file_name))
+        return old_file_name
+
+    def close(self):
+        """Close the files of the column, until values are appended."""
+        for file in (self._values_file, self._valid_file):
+            if file is not None:
+                file.close()
+        self._values_file = self._valid_file = None
+
+
+def _read_valid(file_name, rows):
+    """Read a valid bitmap.
+
+    :param file_name: The bitmap file.
+    :param rows: The number of rows to read.
+    :return: A boolean array.
+    """
+    bits = np.fromfile(file_name, dtype=np.uint8, count=(rows + 7) // 8)
+    return np.unpackbits(bits, count=rows, bitorder='little').astype(bool)
@@ -0,0 +1,388 @@
+"""A `dowel.TabularInput` which stores its entries in NumPy arrays."""
+import numpy as np
+
+from dowel.tabular_input import _as_vector, _KEY_CACHE_SIZE
+from dowel.tabular_input import TabularInput, TabularSnapshot
+
+# Slot states. A slot is valid if its state is not _EMPTY, and holds a
+# primitive value if its state is at most _PRIMITIVE.
+_EMPTY = 0
+_FLOAT = 1
+_INT = 2
+_PRIMITIVE = 3
+_OBJECT = 4
+
+_FLOAT_TYPES = frozenset([float, np.float64])
+_INT_TYPES = frozenset([int, np.int64, np.int32])
+
+
+class ColumnarTabularInput(TabularInput):
+    """A TabularInput for tables with many keys which are stable over time.
+
+    Each key is assigned a slot the first time it is recorded, and keeps it
+    after the table is cleared. Floats and ints are stored in preallocated
+    float64 and int64 arrays, and any other value in an object array. A state
+    array tracks which slots hold a value, and of which kind, and a mask
+    which slots were marked as recorded by an output. This makes clearing
+    the table, marking its keys, finding the entries no output accepted, and
+    filtering its primitive entries single vectorized operations, instead of
+    Python loops over every entry.
+
+    Values recorded with record() are kept in a dict until the table is
+    read, and are then stored into their slots all at once, which is faster
+    than storing each value into an array as it is recorded. For the whole
+    cycle of recording a row, logging it and clearing the table, this is
+    faster than a TabularInput for tables of hundreds of keys or more, and
+    fastest with record_array() (see benchmarks/bench_tabular.py).
+
+    The public API is the same as for TabularInput, with three differences:
+    floats and ints (including NumPy scalars) are returned as Python float
+    and int, as_dict returns a new dict which is rebuilt after each change,
+    so changes to it do not affect the table, and entries are ordered by
+    when their key was first recorded into the table, rather than into the
+    current row. Tables which record their keys in the same order every row
+    have the same order as a TabularInput.
+
+    :param capacity: The number of slots to preallocate. The arrays grow as
+     needed.
+    """
+
+    def __init__(self, capacity=64):
+        super().__init__()
+        self._dict = None
+        self._slots = {}
+        self._slot_cache = {}
+        self._size = 0
+        self._keys = np.empty(capacity, dtype=object)
+        self._floats = np.zeros(capacity, dtype=np.float64)
+        self._ints = np.zeros(capacity, dtype=np.int64)
+        self._objects = np.empty(capacity, dtype=object)
+        self._state = np.zeros(capacity, dtype=np.int8)
+        self._marked = np.zeros(capacity, dtype=bool)
+        self._pending = {}
+        self._deferred = True
+
+    def record(self, key, val):
+        """Save key/value entries for the table.
+
+        :param key: String key corresponding to the value.
+        :param val: Value that is to be stored in the table.
+        """
+        self._pending[self._prefix_str + str(key)] = val
+        self._version += 1
+
+    def handle(self, key):
+        """Get a handle for recording one key quickly.
+
+        The handle's set(value) method writes straight into the key's slot.
+
+        :param key: String key corresponding to the values.
+        :return: A handle with a set(value) method.
+        """
+        return _SlotHandle(self, self._slot_of(key))
+
+    def record_many(self, mapping):
+        """Save several key/value entries for the table.
+
+        The current prefix is applied to every key, as in record().
+
+        :param mapping: A dict, or an iterable of (key, value) pairs.
+        """
+        if self._pending:
+            self._store_pending()
+        if isinstance(mapping, dict):
+            items = zip(self._slots_of(mapping).tolist(), mapping.values())
+        else:
+            items = ((self._slot_of(key), val) for key, val in mapping)
+        for slot, val in items:
+            self._store(slot, val)
+        self._version += 1
+
+    def record_array(self, keys, values):
+        """Save a vector of values, one entry per key.
+
+        Float and integer vectors are copied into the value arrays with a
+        single vectorized assignment.
+
+        :param keys: Sequence of string keys.
+        :param values: One-dimensional array (or sequence) of values, of the
+         same length as keys.
+        :raises ValueError: If values is not one-dimensional, or its length
+         differs from the number of keys.
+        """
+        values = _as_vector(keys, values)
+        if self._pending:
+            self._store_pending()
+        kind = values.dtype.kind
+        if kind == 'f':
+            state = _FLOAT
+        elif kind == 'i' or (kind == 'u' and values.dtype.itemsize < 8):
+            state = _INT
+        else:
+            self.record_many(zip(keys, values.tolist()))
+            return
+        # Look up the slots first, since adding slots may grow the arrays
+        index = self._slots_of(keys)
+        array = self._floats if state == _FLOAT else self._ints
+        array[index] = values
+        self._state[index] = state
+        self._version += 1
+
+    def _slot_of(self, key):
+        """Get the slot of a key under the current prefix, adding it if new.
+
+        :param key: The key.
+        :return: The index of the slot.
+        """
+        return self._full_slot(self._prefix_str + str(key))
+
+    def _full_slot(self, key):
+        """Get the slot of a full key, including the prefix, adding it if new.
+
+        :param key: The full key.
+        :return: The index of the slot.
+        """
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._add_slot(key)
+        return slot
+
+    def _slots_of(self, keys, prefix=None):
+        """Get the slots of keys under a prefix, adding new ones.
+
+        Slots are never reassigned, so the result is cached like the prefixed
+        keys.
+
+        :param keys: Iterable of keys.
+        :param prefix: The prefix, or None for the current prefix.
+        :return: An integer array of slot indices.
+        """
+        if prefix is None:
+            prefix = self._prefix_str
+        cache_key = (prefix, tuple(keys))
+        index = self._slot_cache.get(cache_key)
+        if index is None:
+            if len(self._slot_cache) >= _KEY_CACHE_SIZE:
+                self._slot_cache.clear()
+            index = np.array(
+                [self._full_slot(prefix + str(key)) for key in cache_key[1]],
+                dtype=np.intp)
+            self._slot_cache[cache_key] = index
+        return index
+
+    def _store_pending(self):
+        """Store the values recorded with record() into their slots.
+
+        Floats, the most common values, are copied into the float array with
+        a single vectorized assignment.
+        """
+        pending = self._pending
+        self._pending = {}
+        index = self._slots_of(pending, '')
+        values = list(pending.values())
+        if set(map(type, values)) <= _FLOAT_TYPES:
+            self._floats[index] = values
+            self._state[index] = _FLOAT
+            return
+        for slot, val in zip(index.tolist(), values):
+            self._store(slot, val)
+
+    def _materialize(self):
+        """Record the deferred entries, i.e. pending values and statistics."""
+        if self._pending:
+            self._store_pending()
+        super()._materialize()
+
+    def _store(self, slot, val):
+        """Store a value in a slot.
+
+        :param slot: The index of the slot.
+        :param val: The value to store.
+        """
+        val_type = type(val)
+        if val_type in _FLOAT_TYPES:
+            self._floats[slot] = val
+            self._state[slot] = _FLOAT
+            return
+        if val_type in _INT_TYPES:
+            try:
+                self._ints[slot] = val
+                self._state[slot] = _INT
+                return
+            except OverflowError:
+                pass
+        self._objects[slot] = val
+        self._state[slot] = _PRIMITIVE if np.isscalar(val) else _OBJECT
+
+    def _add_slot(self, key):
+        """Assign the next free slot to a key, growing the arrays if needed.
+
+        :param key: The new key.
+        :return: The index of the slot.
+        """
+        slot = self._size
+        if slot == len(self._state):
+            self._grow(2 * slot)
+        self._keys[slot] = key
+        self._slots[key] = slot
+        self._size += 1
+        return slot
+
+    def _grow(self, capacity):
+        """Reallocate the arrays with a larger capacity.
+
+        :param capacity: The new number of slots.
+        """
+
+        def resized(array):
+            new = np.zeros(capacity, dtype=array.dtype)
+            new[:len(array)] = array
+            return new
+
+        self._keys = resized(self._keys)
+        self._floats = resized(self._floats)
+        self._ints = resized(self._ints)
+        self._objects = resized(self._objects)
+        self._state = resized(self._state)
+        self._marked = resized(self._marked)
+
+    def copy(self):
+        """Return a shallow copy of the table.
+
+        The copy has the same entries and recorded keys, and shares warning
+        state with this table.
+
+        :return: A new TabularInput.
+        """
+        other = super().copy()
+        n = self._size
+        other._recorded.update(self._keys[:n][self._marked[:n]].tolist())
+        return other
+
+    def mark(self, key):
+        """Mark key as recorded."""
+        if self._pending:
+            self._store_pending()
+        slot = self._slots.get(key)
+        if slot is None:
+            self._recorded.add(key)
+        else:
+            self._marked[slot] = True
+
+    def mark_str(self):
+        """Mark keys in the primitive dict."""
+        if self._deferred:
+            self._materialize()
+        state = self._state[:self._size]
+        self._marked[:self._size] |= (state != _EMPTY) & (state <= _PRIMITIVE)
+
+    def mark_all(self):
+        """Mark all keys."""
+        if self._deferred:
+            self._materialize()
+        self._marked[:self._size] |= self._state[:self._size] != _EMPTY
+
+    def _mark_keys(self, keys):
+        """Mark keys as recorded.
+
+        :param keys: A set-like view of keys.
+        """
+        for key in keys:
+            self.mark(key)
+
+    def _unrecorded_items(self):
+        """Find the entries whose keys were not marked as recorded.
+
+        :return: An iterable of (key, value) pairs.
+        """
+        if self._deferred:
+            self._materialize()
+        n = self._size
+        unrecorded = (self._state[:n] != _EMPTY) & ~self._marked[:n]
+        if not unrecorded.any():
+            return ()
+        return self._select(unrecorded).items()
+
+    def _clear_entries(self):
+        """Remove all entries from the table, keeping the key slots."""
+        n = self._size
+        self._state[:n] = _EMPTY
+        self._objects[:n] = None
+        self._marked[:n] = False
+        self._pending.clear()
+
+    def _select(self, mask):
+        """Build a dict of the entries in the slots selected by a mask.
+
+        The values are gathered for each kind of slot, and the entries are
+        added in slot order, i.e. in the order the keys were first recorded.
+
+        :param mask: Boolean array over the used slots.
+        :return: A dict of the selected entries.
+        """
+        n = self._size
+        state = self._state[:n]
+        # Converting to an object array turns the values into Python floats
+        # and ints
+        values = self._floats[:n].astype(object)
+        for kind_mask, kind_values in ((state == _INT, self._ints),
+                                       (state >= _PRIMITIVE, self._objects)):
+            if kind_mask.any():
+                values[kind_mask] = kind_values[:n][kind_mask]
+        return dict(zip(self._keys[:n][mask].tolist(), values[mask].tolist()))
+
+    def _primitive_dict(self):
+        """Build the dictionary of primitive entries.
+
+        :return: A new dict of the entries with primitive values.
+        """
+        state = self._state[:self._size]
+        return self._select((state != _EMPTY) & (state <= _PRIMITIVE))
+
+    def _snapshot(self):
+        """Take a new snapshot of the table.
+
+        :return: A TabularSnapshot of the dict of the current entries, which
+         is rebuilt rather than modified when the table changes.
+        """
+        return TabularSnapshot(self, self.as_dict)
+
+    @property
+    def as_dict(self):
+        """Return a dictionary of the tabular items."""
+        return self._cached(
+            'dict', lambda: self._select(self._state[:self._size] != _EMPTY))
+
+
+class _SlotHandle:
+    """Handle for recording one key of a ColumnarTabularInput.
+
+    :param table: The ColumnarTabularInput.
+    :param slot: The slot of the key.
+    """
+
+    __slots__ = ('_table', '_slot')
+
+    def __init__(self, table, slot):
+        self._table = table
+        self._slot = slot
+
+    @property
+    def key(self):
+        """The full key, including the prefix."""
+        return self._table._keys[self._slot]
+
+    def set(self, value):
+        """Record a value for the key.
+
+        :param value: Value that is to be stored in the table.
+        """
+        table = self._table
+        if table._pending:
+            table._store_pending()
+        if type(value) in _FLOAT_TYPES:
+            table._floats[self._slot] = value
+            table._state[self._slot] = _FLOAT
+        else:
+            table._store(self._slot, value)
+        table._version += 1
@@ -0,0 +1,321 @@
+"""Streaming compression of the files written by `dowel.FileOutput`.
+
+A CompressedTextFile buffers the text written to it, and compresses it on a
+background thread as a single stream, so that the whole file shares one
+compression dictionary.
+
+* gzip streams are flushed with Z_SYNC_FLUSH, so a file which is still
+  being written to can be decompressed up to its last sync flush. Each
+  sync flush costs about 25 bytes, which is a lot next to a row of a CSV
+  file, so flushes sync the stream at most once a second.
+* bz2 and xz have no equivalent, so their files are split into several
+  streams instead. A stream is ended by the first flush after it holds
+  4 MiB of text, or after it was started a minute ago.
+  A file which is still being written to can only be decompressed up to
+  the end of its last stream.
+
+fileno(), which FileOutput calls to fsync the file, always syncs or ends the
+stream, so files with FlushPolicy(fsync=True) can be read up to the last
+flush, at the cost of a lower compression ratio.
+
+Files made of several streams can be read by gzip.open(), bz2.open(),
+lzma.open() and the usual command line tools.
+"""
+import bz2
+import collections
+import concurrent.futures
+import io
+import lzma
+import os
+import time
+import zlib
+
+_SUFFIXES = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'lzma'}
+_DECOMPRESSORS = {
+    'gzip': lambda: zlib.decompressobj(wbits=zlib.MAX_WBITS | 16),
+    'bz2': bz2.BZ2Decompressor,
+    'lzma': lzma.LZMADecompressor,
+}
+_COMPRESSORS = {'bz2': bz2.BZ2Compressor, 'lzma': lzma.LZMACompressor}
+
+# Buffered text is compressed once it reaches this size, even without flush
+_DEFAULT_BUFFER_SIZE = 1 << 20
+# Number of chunks which may wait to be compressed before write() blocks
+_MAX_PENDING = 16
+# gzip streams are synced by the first flush this many seconds after the
+# last sync
+_SYNC_SECONDS = 1.
+# bz2 and xz streams are ended on the first flush after they hold this many
+# bytes, or after this many seconds
+_STREAM_SIZE = 1 << 22
+_STREAM_SECONDS = 60.
+
+
+def compression_of(file_name, compression=None):
+    """Get the compression of a file.
+
+    :param file_name: The file.
+    :param compression: 'gzip', 'bz2' or 'lzma', or None to choose by the
+     suffix of the file name (.gz, .bz2 or .xz).
+    :return: The compression, or None for uncompressed files.
+    :raises ValueError: If compression is not supported.
+    """
+    if compression is None:
+        return _SUFFIXES.get(os.path.splitext(file_name)[1])
+    if compression not in _DECOMPRESSORS:
+        raise ValueError('Unsupported compression {!r}, expected one of '
+                         '{}'.format(compression, ', '.join(_DECOMPRESSORS)))
+    return compression
+
+
+def open_text(file_name, compression=None):
+    """Open a possibly compressed text file for reading.
+
+    Compressed files are decompressed into memory, up to their last complete
+    line, so files which are still being written to can be read too.
+
+    :param file_name: The file.
+    :param compression: The compression, as for compression_of().
+    :return: A text file object, which does not translate newlines.
+    """
+    compression = compression_of(file_name, compression)
+    if compression is None:
+        return open(file_name, 'r', newline='')
+    with open(file_name, 'rb') as file:
+        data = decompress(file.read(), compression)
+    return io.StringIO(data.decode(CompressedTextFile.encoding), newline='')
+
+
+def decompress(data, compression):
+    """Decompress a compressed file, which may still be written to.
+
+    :param data: The contents of the file.
+    :param compression: 'gzip', 'bz2' or 'lzma'.
+    :return: The decompressed bytes. If the last stream is not finished,
+     only its complete lines are included.
+    """
+    chunks = []
+    while data:
+        decompressor = _DECOMPRESSORS[compression]()
+        chunk = decompressor.decompress(data)
+        if not decompressor.eof:
+            chunks.append(chunk[:chunk.rfind(b'\n') + 1])
+            break
+        chunks.append(chunk)
+        data = decompressor.unused_data
+    return b''.join(chunks)
+
+
+class CompressedTextFile:
+    """A text file which is compressed as it is written.
+
+    :param file_name: The file to write to.
+    :param mode: File open mode ('a' or 'w').
+    :param compression: 'gzip', 'bz2' or 'lzma'.
+    :param buffer_size: Compress the buffered text once it reaches this many
+     characters, or -1 for the default size.
+    """
+
+    encoding = 'utf-8'
+
+    def __init__(self, file_name, mode, compression, buffer_size=-1):
+        self.name = file_name
+        self._file = open(file_name, mode + 'b')
+        if compression == 'gzip':
+            self._stream = _GzipStream()
+        else:
+            self._stream = _SplitStream(_COMPRESSORS[compression])
+        self._buffer_size = (buffer_size
+                             if buffer_size > 0 else _DEFAULT_BUFFER_SIZE)
+        self._buffer = []
+        self._buffered = 0
+        self.bytes_encoded = 0
+        self._pending = collections.deque()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='dowel-compress')
+
+    @property
+    def closed(self):
+        """Whether the file is closed."""
+        return self._file.closed
+
+    def write(self, s):
+        """Write a string to the buffer.
+
+        :param s: The string.
+        :return: The number of characters written.
+        """
+        self._buffer.append(s)
+        self._buffered += len(s)
+        if self._buffered >= self._buffer_size:
+            self._submit(self._stream.compress)
+        return len(s)
+
+    def flush(self):
+        """Compress the buffered text on the background thread, and flush it.
+
+        The compressed text is appended to the file once it is compressed.
+        Use fileno() to wait for it.
+        """
+        self._submit(self._stream.flush)
+
+    def fileno(self):
+        """Sync or end the stream, and wait for it to be written.
+
+        :return: The file descriptor, e.g. to fsync the file.
+        """
+        self._submit(self._stream.sync)
+        self._wait(0)
+        return self._file.fileno()
+
+    def close(self):
+        """Compress the buffered text, end the stream, and close the file."""
+        if self.closed:
+            return
+        try:
+            self._submit(self._stream.finish)
+            self._wait(0)
+        finally:
+            self._executor.shutdown()
+            self._file.close()
+
+    def _submit(self, compress):
+        """Compress the buffered text on the background thread.
+
+        :param compress: The method of the stream to compress the text with.
+        """
+        self._wait(_MAX_PENDING - 1)
+        data = ''.join(self._buffer).encode(self.encoding)
+        self.bytes_encoded += len(data)
+        self._buffer = []
+        self._buffered = 0
+        self._pending.append(
+            self._executor.submit(self._append, compress, data))
+
+    def _append(self, compress, data):
+        """Compress data, and append it to the file.
+
+        This runs on the background thread, one chunk at a time.
+
+        :param compress: The method of the stream to compress data with.
+        :param data: The bytes to compress.
+        """
+        compressed = compress(data)
+        if compressed:
+            self._file.write(compressed)
+            self._file.flush()
+
+    def _wait(self, max_pending):
+        """Wait until few chunks are pending, re-raising their errors.
+
+        :param max_pending: The number of chunks which may stay pending.
+        """
+        while self._pending and (len(self._pending) > max_pending
+                                 or self._pending[0].done()):
+            self._pending.popleft().result()
+
+
+class _GzipStream:
+    """A gzip stream, which is flushed with Z_SYNC_FLUSH."""
+
+    def __init__(self):
+        # The level of gzip.open()
+        self._compressor = zlib.compressobj(9, zlib.DEFLATED,
+                                            zlib.MAX_WBITS | 16)
+        self._synced = time.monotonic()
+
+    def compress(self, data):
+        """Compress data.
+
+        :param data: The bytes to compress.
+        :return: Compressed bytes, if any are ready.
+        """
+        return self._compressor.compress(data)
+
+    def flush(self, data):
+        """Compress data, and sync the stream if it was not synced lately.
+
+        :param data: The bytes to compress.
+        :return: Compressed bytes, if any are ready.
+        """
+        if time.monotonic() - self._synced >= _SYNC_SECONDS:
+            return self.sync(data)
+        return self._compressor.compress(data)
+
+    def sync(self, data):
+        """Compress data, and flush the stream to a byte boundary.
+
+        :param data: The bytes to compress.
+        :return: The compressed bytes, which can be decompressed along with
+         the ones returned before.
+        """
+        self._synced = time.monotonic()
+        return (self._compressor.compress(data) +
+                self._compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    def finish(self, data):
+        """Compress data, and end the stream.
+
+        :param data: The bytes to compress.
+        :return: The rest of the stream.
+        """
+        return (self._compressor.compress(data) +
+                self._compressor.flush(zlib.Z_FINISH))
+
+
+class _SplitStream:
+    """A bz2 or xz file, which is split into streams of a few MiB.
+
+    :param compressor_type: The compressor class, e.g. bz2.BZ2Compressor.
+    """
+
+    def __init__(self, compressor_type):
+        self._compressor_type = compressor_type
+        self._compressor = None
+        self._size = 0
+        self._started = 0.
+
+    def compress(self, data):
+        """Compress data.
+
+        :param data: The bytes to compress.
+        :return: Compressed bytes, if any are ready.
+        """
+        if not data:
+            return b''
+        if self._compressor is None:
+            self._compressor = self._compressor_type()
+            self._started = time.monotonic()
+        self._size += len(data)
+        return self._compressor.compress(data)
+
+    def flush(self, data):
+        """Compress data, and end the stream if it is large or old enough.
+
+        :param data: The bytes to compress.
+        :return: Compressed bytes, if any are ready.
+        """
+        compressed = self.compress(data)
+        if self._compressor is None:
+            return compressed
+        age = time.monotonic() - self._started
+        if self._size >= _STREAM_SIZE or age >= _STREAM_SECONDS:
+            compressed += self.finish(b'')
+        return compressed
+
+    def finish(self, data):
+        """Compress data, and end the stream.
+
+        A new stream is started by the next data.
+
+        :param data: The bytes to compress.
+        :return: The rest of the stream.
+        """
+        compressed = self.compress(data)
+        if self._compressor is not None:
+            compressed += self._compressor.flush()
+            self._compressor = None
+            self._size = 0
+        return compressed
+
+    sync = finish
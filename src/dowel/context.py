@@ -0,0 +1,123 @@
+"""Context-local logger and tabular for running many experiments at once.
+
+`dowel.logger` and `dowel.tabular` are proxies which forward every attribute
+access to the Logger and TabularInput of the current context. By default,
+these are a pair of global instances. Inside a `with dowel.session():` block,
+they are a new pair of instances, which is only visible to the current thread
+or asyncio task (and to tasks it creates). This lets several trials log
+concurrently in one process without sharing prefixes, tables or outputs:
+
+    def trial(params):
+        with dowel.session():
+            logger.add_output(dowel.CsvOutput('{}/progress.csv'.format(...)))
+            ...
+            tabular.record('loss', loss)
+            logger.log(tabular)
+
+    threads = [threading.Thread(target=trial, args=(p, )) for p in grid]
+
+On Python 3.6, the contextvars backport does not give asyncio tasks their
+own context, so sessions are only isolated per thread there.
+
+Forwarding costs an extra lookup per attribute access. Code which logs in a
+tight loop can bind the current instances once with current_logger() and
+current_tabular().
+"""
+import contextlib
+import contextvars
+
+from dowel.logger import Logger
+from dowel.tabular_input import TabularInput
+
+_logger = contextvars.ContextVar('dowel_logger', default=Logger())
+_tabular = contextvars.ContextVar('dowel_tabular', default=TabularInput())
+
+
+def current_logger():
+    """Get the Logger of the current context.
+
+    :return: The Logger which dowel.logger currently refers to.
+    """
+    return _logger.get()
+
+
+def current_tabular():
+    """Get the TabularInput of the current context.
+
+    :return: The TabularInput which dowel.tabular currently refers to.
+    """
+    return _tabular.get()
+
+
+@contextlib.contextmanager
+def session(logger=None, tabular=None):
+    """Use a separate logger and tabular in the current context.
+
+    Sessions may be nested. When the block exits, dowel.logger and
+    dowel.tabular refer to the previous instances again. The session's
+    outputs are not closed automatically.
+
+    :param logger: The Logger to use. Defaults to a new Logger with no
+     outputs.
+    :param tabular: The TabularInput to use. Defaults to a new TabularInput.
+    :return: A context manager which yields the session's logger and tabular.
+    """
+    if logger is None:
+        logger = Logger()
+    if tabular is None:
+        tabular = TabularInput()
+    logger_token = _logger.set(logger)
+    tabular_token = _tabular.set(tabular)
+    try:
+        yield logger, tabular
+    finally:
+        _tabular.reset(tabular_token)
+        _logger.reset(logger_token)
+
+
+class _LoggerProxy(Logger):
+    """A Logger which forwards to the Logger of the current context."""
+
+    # pylint: disable=super-init-not-called
+    def __init__(self):
+        pass
+
+    def __getattribute__(self, name):
+        """Get an attribute of the current Logger."""
+        return getattr(_logger.get(), name)
+
+    def __setattr__(self, name, value):
+        """Set an attribute of the current Logger."""
+        setattr(_logger.get(), name, value)
+
+    def __repr__(self):
+        """Represent the current Logger."""
+        return repr(_logger.get())
+
+
+class _TabularProxy(TabularInput):
+    """A TabularInput which forwards to the table of the current context."""
+
+    # pylint: disable=super-init-not-called
+    def __init__(self):
+        pass
+
+    def __getattribute__(self, name):
+        """Get an attribute of the current TabularInput."""
+        return getattr(_tabular.get(), name)
+
+    def __setattr__(self, name, value):
+        """Set an attribute of the current TabularInput."""
+        setattr(_tabular.get(), name, value)
+
+    def __str__(self):
+        """Render the current TabularInput."""
+        return str(_tabular.get())
+
+    def __repr__(self):
+        """Represent the current TabularInput."""
+        return repr(_tabular.get())
+
+
+logger = _LoggerProxy()
+tabular = _TabularProxy()
@@ -1,22 +1,60 @@
 """A `dowel.logger.LogOutput` for CSV files."""
 import csv
+import io
+import json
+import mmap
 import os
 
+import numpy as np
+
 from dowel import TabularInput
+from dowel.compression import compression_of, decompress, open_text
 from dowel.simple_outputs import FileOutput
 
+# Number of bytes read_csv() parses at once
+_CHUNK_SIZE = 1 << 22
+
 
 class CsvOutput(FileOutput):
     """CSV file output for logger.
 
+    By default, the whole file is rewritten with a new header whenever a key
+    appears which is not in the header yet. This takes time proportional to
+    the size of the file, so with append_only=True, new columns are instead
+    appended to the end of the rows which are written after them. The columns
+    added after the header is written are listed in a schema file next to the
+    CSV file (file_name + '.schema'), and the file is rewritten only once,
+    with the full header, when the output is closed. Use read_csv_rows() to
+    read a file whose schema file is still there, e.g. one which is still
+    being written to.
+
     :param file_name: The file this output should log to.
+    :param append_only: Whether to never rewrite the file until it is closed.
+    :param flush_policy: A FlushPolicy, which decides when the file is
+     flushed. By default, it is flushed on every dump().
+    :param compression: 'gzip', 'bz2' or 'lzma' to compress the file, or
+     None to choose by the suffix of the file name.
     """
 
-    def __init__(self, file_name):
-        super().__init__(file_name)
+    def __init__(self,
+                 file_name,
+                 append_only=False,
+                 flush_policy=None,
+                 compression=None):
+        super().__init__(file_name,
+                         flush_policy=flush_policy,
+                         compression=compression)
         self._writer = None
         self._fieldnames = None
+        self._fieldset = None
         self._filename = file_name
+        self._append_only = append_only
+        self._schema_file_name = _schema_file_name(file_name)
+        self._schema_changed = False
+        self._rows = 0
+        if append_only and os.path.exists(self._schema_file_name):
+            # Left over from an earlier file, which has been truncated
+            os.remove(self._schema_file_name)
 
     @property
     def types_accepted(self):
@@ -29,40 +67,363 @@ class CsvOutput(FileOutput):
             to_csv = data.as_primitive_dict
 
             if not self._writer:
-                self._fieldnames = set(to_csv.keys())
-                self._writer = csv.DictWriter(self._log_file,
-                                              fieldnames=self._fieldnames,
-                                              restval='',
-                                              extrasaction='raise')
+                self._fieldnames = list(to_csv.keys())
+                self._fieldset = set(self._fieldnames)
+                self._writer = self._dict_writer()
                 self._writer.writeheader()
 
-            if to_csv.keys() != self._fieldnames:
-                # Close existing log file
-                super().close()
-
-                # Move log file to temp file
-                temp_file_name = '{}.tmp'.format(self._filename)
-                os.replace(self._filename, temp_file_name)
-
+            if not to_csv.keys() <= self._fieldset:
                 # Add new keys to fieldnames
-                self._fieldnames = (set(self._fieldnames) | set(to_csv.keys()))
-
-                # Open a new copy of the log file
-                self._log_file = open(self._filename, 'w')
-                self._writer = csv.DictWriter(self._log_file,
-                                              fieldnames=self._fieldnames,
-                                              restval='',
-                                              extrasaction='raise')
-
-                # Transfer data from temp file
-                with open(temp_file_name, 'r') as temp_file:
-                    self._writer.writeheader()
-                    for row in csv.DictReader(temp_file):
-                        self._writer.writerow(row)
+                new_fieldnames = [
+                    key for key in to_csv.keys() if key not in self._fieldset
+                ]
+                self._fieldnames.extend(new_fieldnames)
+                self._fieldset.update(new_fieldnames)
+                if self._append_only:
+                    self._append_schema(new_fieldnames)
+                else:
+                    self._rewrite()
+                self._writer = self._dict_writer()
 
             self._writer.writerow(to_csv)
+            self._rows += 1
 
             for k in to_csv.keys():
                 data.mark(k)
         else:
             raise ValueError('Unacceptable type.')
+
+    def close(self):
+        """Close the file, rewriting it with the full header if needed."""
+        if self._schema_changed:
+            self._rewrite()
+            os.remove(self._schema_file_name)
+        super().close()
+
+    def _dict_writer(self):
+        """Create a writer for rows with the current fieldnames.
+
+        :return: A csv.DictWriter.
+        """
+        return csv.DictWriter(self._log_file,
+                              fieldnames=self._fieldnames,
+                              restval='',
+                              extrasaction='raise')
+
+    def _append_schema(self, fieldnames):
+        """Record columns which are appended after the header.
+
+        The schema file is written before any row with the new columns, so
+        readers never find a row with more columns than they know of.
+
+        :param fieldnames: The new columns, in order.
+        """
+        # Rows written so far must reach the file after the schema change
+        self._log_file.flush()
+        with open(self._schema_file_name, 'a') as schema_file:
+            schema_file.write(
+                json.dumps({
+                    'row': self._rows,
+                    'fieldnames': fieldnames
+                }) + '\n')
+        self._schema_changed = True
+
+    def _rewrite(self):
+        """Rewrite the log file with a header of the current fieldnames.
+
+        Rows are copied in a single pass. Columns are only ever added at the
+        end, so shorter rows are padded with empty values.
+        """
+        self._schema_changed = False
+        # Close existing log file
+        super().close()
+
+        # Move log file to temp file
+        temp_file_name = '{}.tmp'.format(self._filename)
+        os.replace(self._filename, temp_file_name)
+
+        # Open a new copy of the log file
+        self._reopen(self._filename, 'w')
+
+        # Transfer data from temp file
+        with open_text(temp_file_name, self._compression) as temp_file:
+            reader = csv.reader(temp_file)
+            next(reader, None)
+            writer = csv.writer(self._log_file)
+            writer.writerow(self._fieldnames)
+            width = len(self._fieldnames)
+            writer.writerows(row + [''] * (width - len(row)) for row in reader
+                             if row)
+        os.remove(temp_file_name)
+
+
+def read_csv_rows(file_name):
+    """Read the rows of a file written by CsvOutput.
+
+    Unlike csv.DictReader, this reads the columns which were appended to the
+    file by CsvOutput(append_only=True) after the header was written.
+
+    :param file_name: The CSV file, which may be compressed (see
+     `dowel.compression`).
+    :return: An iterator of dicts from every column name to its value, which
+     is an empty string if the row has no value in the column.
+    """
+    with open_text(file_name) as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return
+        fieldnames = _fieldnames(header, file_name)
+        for row in reader:
+            if not row:
+                continue
+            if len(row) > len(fieldnames):
+                # The file is being written to, and gained columns since
+                # the schema file was read
+                fieldnames = _fieldnames(header, file_name)
+            padding = [''] * (len(fieldnames) - len(row))
+            yield dict(zip(fieldnames, row + padding))
+
+
+def read_csv(file_name, columns=None):
+    """Read the columns of a file written by CsvOutput into arrays.
+
+    Only complete rows are read, so the file may still be being written to.
+    Columns appended by CsvOutput(append_only=True) are read too.
+
+    The file is mapped into memory and read in chunks of rows. The fields of
+    each chunk are located and converted to numbers with NumPy, without
+    creating an object per field, and only the requested columns are
+    converted. Compressed files are decompressed into memory instead.
+
+    :param file_name: The CSV file, which may be compressed (see
+     `dowel.compression`).
+    :param columns: Names of the columns to read. Defaults to every column.
+    :return: A dict from each column name to an array with one value per
+     row. Columns of numbers are float64 arrays, where empty values are NaN.
+     Other columns are str arrays.
+    :raises KeyError: If a requested column is not in the file.
+    """
+    compression = compression_of(file_name)
+    with open(file_name, 'rb') as file:
+        if compression is not None:
+            return _read_csv(decompress(file.read(), compression), file_name,
+                             columns)
+        if not os.fstat(file.fileno()).st_size:
+            return {}
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _read_csv(data, file_name, columns)
+
+
+def _read_csv(data, file_name, columns):
+    """Read the columns of the contents of a CSV file into arrays.
+
+    :param data: The contents of the file, as bytes or a mmap.
+    :param file_name: The CSV file.
+    :param columns: Names of the columns to read, or None for every column.
+    :return: A dict from each column name to an array, as for read_csv().
+    :raises KeyError: If a requested column is not in the file.
+    """
+    header_end = data.find(b'\n') + 1
+    if not header_end:
+        return {}
+    header = next(csv.reader([data[:header_end].decode()]), [])
+    fieldnames = _fieldnames(header, file_name)
+    if columns is None:
+        columns = fieldnames
+    missing = [name for name in columns if name not in fieldnames]
+    if missing:
+        raise KeyError('{} not in {}'.format(', '.join(missing), file_name))
+    indices = [fieldnames.index(name) for name in columns]
+    # Skip a row which is still being written
+    end = data.rfind(b'\n') + 1
+
+    if data.find(b'"', header_end, end) >= 0:
+        # Quoted fields may contain separators, so use the csv module
+        text = io.StringIO(data[header_end:end].decode(), newline='')
+        rows = _Rows([row for row in csv.reader(text) if row])
+
+        def chunks():
+            return [rows]
+    else:
+
+        def chunks():
+            return _split_chunks(data, header_end, end)
+
+    parts = [[] for _ in columns]
+    text_columns = set()
+    for chunk in chunks():
+        for i, index in enumerate(indices):
+            values = _to_floats(chunk.column(index))
+            if values is None:
+                text_columns.add(i)
+            parts[i].append(values)
+    if text_columns:
+        # Read the columns which are not all numbers again, as text
+        for i in text_columns:
+            parts[i] = []
+        for chunk in chunks():
+            for i in text_columns:
+                parts[i].append(np.char.decode(chunk.column(indices[i])))
+    return {
+        name: np.concatenate(part) if part else np.zeros(0)
+        for name, part in zip(columns, parts)
+    }
+
+
+def _split_chunks(data, start, end):
+    """Split the rows of a CSV file without quoted fields into chunks.
+
+    :param data: The contents of the file.
+    :param start: The offset of the first row.
+    :param end: The offset after the last complete row.
+    :return: An iterator of the _Fields of each chunk of rows.
+    """
+    while start < end:
+        chunk_end = data.find(b'\n', min(start + _CHUNK_SIZE, end) - 1) + 1
+        yield _Fields(np.frombuffer(data[start:chunk_end], dtype=np.uint8))
+        start = chunk_end
+
+
+class _Fields:
+    """The fields of rows of a CSV file without quoted fields.
+
+    Fields are located by the offsets of the separators, so a column can be
+    extracted without splitting the other columns.
+
+    :param buf: A uint8 array of complete rows, each ending with a newline.
+    """
+
+    def __init__(self, buf):
+        is_newline = buf == ord('\n')
+        # Every field ends at a comma or a newline
+        ends = np.flatnonzero(is_newline | (buf == ord(',')))
+        starts = np.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+        ends_row = is_newline[ends]
+        # The csv module ends rows with \r\n
+        ends -= ends_row & (buf[ends - 1] == ord('\r'))
+        # Position of each field in its row
+        row_firsts = np.flatnonzero(ends_row) + 1
+        widths = np.diff(row_firsts, prepend=0)
+        numbers = np.arange(len(ends)) - np.repeat(row_firsts - widths, widths)
+        # Empty records are written as empty lines
+        rows = (widths > 1) | (ends[row_firsts - 1] > starts[row_firsts - 1])
+        # Pad the buffer, so that every field can be gathered with the width
+        # of the longest one
+        self._buf = np.concatenate(
+            (buf, np.zeros(int((ends - starts).max()), dtype=np.uint8)))
+        self._starts = starts
+        self._ends = ends
+        self._numbers = numbers
+        self._rows = np.repeat(np.cumsum(rows) - 1, widths)
+        self._has_row = np.repeat(rows, widths)
+        self._width = widths[0] if np.all(widths == widths[0]) else None
+        self.num_rows = int(np.count_nonzero(rows))
+
+    def column(self, index):
+        """Get the fields of a column.
+
+        :param index: The index of the column.
+        :return: A bytes array with one field per row, which is empty if the
+         row does not have the column yet.
+        """
+        if self._width is not None and self.num_rows == len(
+                self._starts) // self._width:
+            # Every row has the same width, and none is empty
+            if index >= self._width:
+                return np.zeros(self.num_rows, dtype='S1')
+            selected = slice(index, None, self._width)
+            return self._gather(self._starts[selected], self._ends[selected])
+        selected = np.flatnonzero((self._numbers == index) & self._has_row)
+        values = np.zeros(self.num_rows, dtype='S1')
+        if len(selected):
+            fields = self._gather(self._starts[selected], self._ends[selected])
+            values = values.astype(fields.dtype)
+            values[self._rows[selected]] = fields
+        return values
+
+    def _gather(self, starts, ends):
+        """Copy fields into a fixed-width bytes array.
+
+        :param starts: Offsets of the first bytes of the fields.
+        :param ends: Offsets after the last bytes of the fields.
+        :return: A bytes array of the fields.
+        """
+        lengths = ends - starts
+        width = max(int(lengths.max(initial=0)), 1)
+        chars = self._buf[starts[:, None] + np.arange(width)]
+        # NumPy strips the null bytes which pad shorter fields
+        chars[np.arange(width) >= lengths[:, None]] = 0
+        return chars.view('S{}'.format(width)).reshape(-1)
+
+
+class _Rows:
+    """The fields of rows of a CSV file parsed by the csv module.
+
+    :param rows: A list of lists of fields.
+    """
+
+    def __init__(self, rows):
+        self._rows = rows
+        self.num_rows = len(rows)
+
+    def column(self, index):
+        """Get the fields of a column.
+
+        :param index: The index of the column.
+        :return: A bytes array with one field per row, which is empty if the
+         row does not have the column yet.
+        """
+        return np.array([
+            row[index].encode() if index < len(row) else b''
+            for row in self._rows
+        ],
+                        dtype=bytes).reshape(-1)
+
+
+def _to_floats(values):
+    """Convert fields to floats.
+
+    :param values: A bytes array.
+    :return: A float64 array, where empty fields are NaN, or None if the
+     fields are not all numbers.
+    """
+    try:
+        return np.where(values == b'', b'nan', values).astype(np.float64)
+    except ValueError:
+        return None
+
+
+def _fieldnames(header, file_name):
+    """Get the columns of a CSV file, including those added after its header.
+
+    :param header: The column names in the header of the file.
+    :param file_name: The CSV file.
+    :return: A list of column names.
+    """
+    try:
+        with open(_schema_file_name(file_name), 'r') as schema_file:
+            # Skip a line which is still being written
+            segments = [
+                json.loads(line) for line in schema_file if line.endswith('\n')
+            ]
+    except FileNotFoundError:
+        return header
+    fieldnames = list(header)
+    for segment in segments:
+        # The header already has every column if the file was rewritten
+        # before the schema file was removed
+        fieldnames.extend(name for name in segment['fieldnames']
+                          if name not in header)
+    return fieldnames
+
+
+def _schema_file_name(file_name):
+    """Get the name of the schema file of a CSV file.
+
+    :param file_name: The CSV file.
+    :return: The name of the schema file.
+    """
+    return file_name + '.schema'
@@ -0,0 +1,274 @@
+"""Forward log data from worker processes to a parent process logger.
+
+A worker process (for example, a parallel sampler) adds a ForwardingOutput to
+its own logger. The parent process creates a LogListener, which replays the
+forwarded strings and tables into the parent's logger, and hence into its
+real outputs, with a per-worker prefix.
+
+    # Parent
+    listener = LogListener()
+    conn = listener.pipe(prefix='worker0/')
+    Process(target=worker, args=(conn, )).start()
+    ...
+    listener.poll()  # e.g. once per iteration
+
+    # Worker
+    def worker(conn):
+        logger.add_output(ForwardingOutput(conn))
+        ...
+        logger.log(tabular)
+        logger.dump_all()
+
+To keep the per-message cost low, the worker buffers entries and sends them
+in batches, and each batch is serialized with a single pickle call. The keys
+of each distinct TabularInput layout are sent only once per connection, and
+rows are sent as tuples of values.
+"""
+import multiprocessing
+import multiprocessing.connection
+import pickle
+import threading
+
+from dowel.logger import Logger, LogOutput
+from dowel.tabular_input import TabularInput
+
+_HELLO = 0
+_STR = 1
+_SCHEMA = 2
+_ROW = 3
+
+
+class ForwardingOutput(LogOutput):
+    """Worker-side output which forwards log data to a LogListener.
+
+    Strings and the primitive entries of TabularInputs are forwarded. Entries
+    are sent when batch_size of them are buffered, and on dump() and close().
+
+    :param connection: A multiprocessing Connection created by
+     LogListener.pipe(), or the address of a LogListener to connect to.
+    :param name: Name which the listener uses to prefix this worker's data,
+     if it accepted the connection on its address.
+    :param batch_size: Number of entries buffered before a batch is sent.
+    :param authkey: The key to authenticate with when connecting to an
+     address, which must match the listener's. Defaults to the authkey of
+     the current process, which child processes inherit from their parent.
+    """
+
+    def __init__(self, connection, name=None, batch_size=256, authkey=None):
+        # close() is called on deletion, even if connecting fails
+        self._connection = None
+        if not hasattr(connection, 'send_bytes'):
+            if authkey is None:
+                authkey = multiprocessing.current_process().authkey
+            connection = multiprocessing.connection.Client(connection,
+                                                           authkey=authkey)
+        self._connection = connection
+        self._batch_size = batch_size
+        self._batch = []
+        self._schemas = {}
+        if name is not None:
+            self._batch.append((_HELLO, name))
+
+    @property
+    def types_accepted(self):
+        """Accept str and TabularInput objects."""
+        return (str, TabularInput)
+
+    def record(self, data, prefix=''):
+        """Buffer data to be forwarded."""
+        if isinstance(data, str):
+            self._batch.append((_STR, prefix + data))
+        elif isinstance(data, TabularInput):
+            primitives = data.as_primitive_dict
+            keys = tuple(primitives.keys())
+            schema = self._schemas.get(keys)
+            if schema is None:
+                schema = len(self._schemas)
+                self._schemas[keys] = schema
+                self._batch.append((_SCHEMA, schema, keys))
+            self._batch.append((_ROW, schema, tuple(primitives.values())))
+            for key in keys:
+                data.mark(key)
+        else:
+            raise ValueError('Unacceptable type.')
+
+        if len(self._batch) >= self._batch_size:
+            self._send()
+
+    def dump(self, step=None):
+        """Send all buffered data to the listener."""
+        self._send()
+
+    def close(self):
+        """Send all buffered data and close the connection."""
+        if self._connection is not None and not self._connection.closed:
+            try:
+                self._send()
+            finally:
+                self._connection.close()
+
+    def _send(self):
+        """Send the buffered batch as a single message."""
+        if self._batch:
+            self._connection.send_bytes(
+                pickle.dumps(self._batch, protocol=pickle.HIGHEST_PROTOCOL))
+            self._batch = []
+
+
+class LogListener:
+    """Parent-side receiver which replays forwarded data into a logger.
+
+    Connections are created with pipe(), or accepted on address if one is
+    given. Data is only replayed when poll() is called, so that it does not
+    interleave with the parent's own use of the logger's prefix stack.
+
+    :param logger: The Logger to replay data into. Defaults to the global
+     dowel.logger.
+    :param address: Optional address (e.g. a Unix socket path) on which to
+     accept connections from ForwardingOutputs.
+    :param family: The multiprocessing.connection family of address.
+    :param authkey: The key which connections to address must authenticate
+     with before any data is received from them, since the data is
+     unpickled. Defaults to the authkey of the current process.
+    """
+
+    def __init__(self, logger=None, address=None, family=None, authkey=None):
+        if logger is None:
+            import dowel  # pylint: disable=import-outside-toplevel
+            logger = dowel.logger
+        elif not isinstance(logger, Logger):
+            raise ValueError('logger must be a dowel.Logger')
+        self._logger = logger
+        self._workers = {}
+        self._accepted = 0
+        self._lock = threading.Lock()
+        self._listener = None
+        if address is not None:
+            if authkey is None:
+                authkey = multiprocessing.current_process().authkey
+            self._listener = multiprocessing.connection.Listener(
+                address, family=family, authkey=authkey)
+            threading.Thread(target=self._accept,
+                             name='dowel-log-listener',
+                             daemon=True).start()
+
+    @property
+    def address(self):
+        """The address on which connections are accepted, if any."""
+        if self._listener is None:
+            return None
+        return self._listener.address
+
+    def pipe(self, prefix=''):
+        """Create a connection for a worker process.
+
+        :param prefix: The prefix for log data forwarded on this connection.
+        :return: The worker end of the connection, to be passed to a
+         ForwardingOutput.
+        """
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self.add_connection(receiver, prefix)
+        return sender
+
+    def add_connection(self, connection, prefix=''):
+        """Replay data received on an existing connection.
+
+        :param connection: A multiprocessing Connection.
+        :param prefix: The prefix for log data forwarded on this connection.
+        """
+        with self._lock:
+            self._workers[connection] = _WorkerState(prefix)
+
+    def poll(self, timeout=0.):
+        """Replay all forwarded data which has arrived.
+
+        :param timeout: How long to wait for data if none is available.
+        :return: The number of log() calls replayed.
+        """
+        with self._lock:
+            connections = list(self._workers)
+        count = 0
+        for connection in multiprocessing.connection.wait(connections,
+                                                          timeout=timeout):
+            worker = self._workers[connection]
+            try:
+                while True:
+                    count += self._replay(
+                        worker, pickle.loads(connection.recv_bytes()))
+                    if not connection.poll():
+                        break
+            except (EOFError, OSError):
+                connection.close()
+                with self._lock:
+                    del self._workers[connection]
+        return count
+
+    def close(self):
+        """Stop accepting connections and close all of them."""
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        with self._lock:
+            for connection in self._workers:
+                connection.close()
+            self._workers.clear()
+
+    def _accept(self):
+        """Accept connections on the listener address until closed."""
+        while True:
+            try:
+                connection = self._listener.accept()
+            except (multiprocessing.AuthenticationError, EOFError):
+                # The client did not authenticate, or disconnected during
+                # the handshake
+                continue
+            except (AttributeError, OSError):
+                return
+            with self._lock:
+                # Workers are numbered in the order they connect, so that
+                # a worker never reuses the number of another one
+                prefix = 'worker{}/'.format(self._accepted)
+                self._accepted += 1
+                self._workers[connection] = _WorkerState(prefix)
+
+    def _replay(self, worker, batch):
+        """Log one batch of entries received from a worker.
+
+        :param worker: The _WorkerState of the sending worker.
+        :param batch: The list of entries sent by the worker.
+        :return: The number of log() calls made.
+        """
+        logger = self._logger
+        tabular = worker.tabular
+        count = 0
+        for entry in batch:
+            kind = entry[0]
+            if kind == _ROW:
+                keys = worker.schemas[entry[1]]
+                with tabular.prefix(worker.prefix):
+                    for key, value in zip(keys, entry[2]):
+                        tabular.record(key, value)
+                logger.log(tabular)
+                tabular.clear()
+                count += 1
+            elif kind == _STR:
+                with logger.prefix(worker.prefix):
+                    logger.log(entry[1])
+                count += 1
+            elif kind == _SCHEMA:
+                worker.schemas[entry[1]] = entry[2]
+            elif kind == _HELLO:
+                worker.prefix = '{}/'.format(entry[1])
+        return count
+
+
+class _WorkerState:
+    """Per-connection state of a LogListener.
+
+    :param prefix: The prefix for log data from this worker.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.schemas = {}
+        self.tabular = TabularInput()
@@ -132,11 +132,35 @@ foo  bar
 
 """
 import abc
+import atexit
+import collections
+import concurrent.futures
 import contextlib
+import sys
+import threading
+import time
 import warnings
 
+from dowel.tabular_input import TabularInput, TabularSnapshot
 from dowel.utils import colorize
 
+# Severity levels of log data, matching those of the logging module
+NOTSET = 0
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+# Prefix of the keys under which Logger.enable_stats() records output stats
+STATS_PREFIX = 'dowel/'
+
+try:
+    _perf_counter_ns = time.perf_counter_ns
+except AttributeError:  # Python < 3.7
+
+    def _perf_counter_ns():
+        return int(time.perf_counter() * 1e9)
+
 
 class LogOutput(abc.ABC):
     """Abstract class for Logger Outputs."""
@@ -177,48 +201,189 @@ class LogOutput(abc.ABC):
 
 
 class Logger:
-    """This is the class that handles logging."""
+    """This is the class that handles logging.
+
+    By default, all outputs are recorded and dumped on the thread which calls
+    log() and dump_all(). Call enable_async() to hand this work off to a
+    background writer thread instead.
+    """
 
     def __init__(self):
         self._outputs = []
+        self._dispatch = {}
         self._prefixes = []
         self._prefix_str = ''
         self._warned_once = set()
         self._disable_warnings = False
-
-    def log(self, data):
+        self._writer = None
+        self._dump_pool = None
+        self._dump_latency = {}
+        self._stats = None
+        self._stats_tabular = None
+        self._stats_prefix = STATS_PREFIX
+        self._throttles = {}
+        self._level = NOTSET
+        self._output_levels = {}
+
+    def log(self, data, level=INFO):
         """Magic method that takes in all different types of input.
 
         This method is the main API for the logger. Any data to be logged goes
         through this method.
 
         Any data sent to this method is sent to all outputs that accept its
-        type (defined in the types_accepted property).
+        type (defined in the types_accepted property), unless level is below
+        the level of the logger or of the output.
+
+        Data which is expensive to build can be passed lazily, as a LazyMessage
+        or a function wrapped with lazy(). Either one is treated as a str, and
+        only evaluated if an output would accept it at this level. The result
+        of a function wrapped with lazy() is logged as whatever type it
+        returns:
+
+        logger.log(lazy(lambda: 'weights: {}'.format(weights)), level=DEBUG)
 
         :param data: Data to be logged. This can be any type specified in the
          types_accepted property of any of the logger outputs.
+        :param level: The severity of data, such as DEBUG, INFO or WARNING.
         """
+        if level < self._level:
+            return
         if not self._outputs:
             self._warn('No outputs have been added to the logger.')
+        if data is self._stats_tabular and data is not None:
+            self._record_stats(data)
 
-        at_least_one_logged = False
-        for output in self._outputs:
-            if isinstance(data, output.types_accepted):
-                output.record(data, prefix=self._prefix_str)
-                at_least_one_logged = True
-
-        if not at_least_one_logged:
+        data_type = type(data)
+        try:
+            outputs = self._dispatch[data_type]
+        except KeyError:
+            outputs = self._outputs_accepting(data_type)
+
+        if data_type is LazyMessage or data_type is _LazyResult:
+            try:
+                outputs = self._dispatch[str]
+            except KeyError:
+                outputs = self._outputs_accepting(str)
+            if outputs and not self._filter_level(outputs, level):
+                return
+            if outputs or data_type is _LazyResult:
+                data = data()
+                data_type = type(data)
+                if data_type is not str:
+                    try:
+                        outputs = self._dispatch[data_type]
+                    except KeyError:
+                        outputs = self._outputs_accepting(data_type)
+            else:
+                data_type = str
+
+        if not outputs:
             warning = (
                 'Log data of type {} was not accepted by any output'.format(
-                    type(data).__name__))
+                    data_type.__name__))
             self._warn(warning)
+            return
+        if self._output_levels:
+            outputs = self._filter_level(outputs, level)
+
+        if self._writer is None:
+            self._record_outputs(outputs, data, self._prefix_str)
+        elif outputs:
+            if isinstance(data, TabularInput):
+                # The caller is free to mutate or clear the table as soon as
+                # we return, so the writer gets a snapshot. The snapshot is
+                # marked on the writer thread, so mark the original here.
+                data.mark_all()
+                data = data.snapshot()
+            self._writer.put(
+                _WriterTask('record', outputs, data, self._prefix_str))
+
+    def set_level(self, level):
+        """Set the minimum level of data to be logged.
+
+        Calls to log() with a lower level return immediately.
+
+        :param level: The minimum level, such as DEBUG, INFO or WARNING.
+        """
+        self._level = level
+
+    def set_output_level(self, output_type, level):
+        """Set the minimum level of data logged to outputs of a given type.
+
+        :param output_type: A LogOutput subclass type.
+        :param level: The minimum level, such as DEBUG, INFO or WARNING.
+        """
+        for output in self._outputs:
+            if isinstance(output, output_type):
+                self._output_levels[output] = level
+
+    def _filter_level(self, outputs, level):
+        """Select the outputs which accept data of a given level.
+
+        :param outputs: The outputs to select from.
+        :param level: The level of the data.
+        :return: A tuple of outputs.
+        """
+        return tuple(output for output in outputs
+                     if level >= self._output_levels.get(output, level))
+
+    def log_throttled(self,
+                      data,
+                      *args,
+                      every_n=None,
+                      every_secs=None,
+                      key=None,
+                      level=INFO):
+        """Log data, but at most once every N calls or T seconds.
+
+        Calls are throttled separately for each call site, or for each key if
+        one is given. If both every_n and every_secs are given, data is only
+        logged when both limits allow it. The first call is always logged.
+
+        Suppressed calls are counted, and the count is logged as a single
+        '[last message repeated K times]' line right before the next logged
+        message from the same call site or key, or on the next dump_all().
 
-    def add_output(self, output):
+        Example:
+        for step in range(1000000):
+            logger.log_throttled('step {} reward {:.3f}', step, reward,
+                                 every_secs=5)
+
+        :param data: Data to be logged, or a format string.
+        :param args: Arguments to format data with. Formatting is skipped for
+         suppressed calls, so prefer this to formatting in the caller.
+        :param every_n: Log at most one of every every_n calls.
+        :param every_secs: Log at most once every every_secs seconds.
+        :param key: Hashable key to throttle by instead of the call site.
+        :param level: The severity of data.
+        :return: True if data was logged, and False if it was suppressed.
+        """
+        if key is None:
+            frame = sys._getframe(1)  # pylint: disable=protected-access
+            key = (frame.f_code, frame.f_lineno)
+        throttle = self._throttles.get(key)
+        if throttle is None:
+            throttle = _Throttle(every_n, every_secs)
+            self._throttles[key] = throttle
+        if not throttle.allow():
+            throttle.level = level
+            return False
+
+        self._log_suppressed(throttle)
+        if args:
+            data = LazyMessage(data, *args)
+        self.log(data, level=level)
+        return True
+
+    def add_output(self, output, level=None):
         """Add a new output to the logger.
 
         All data that is compatible with this output will be sent there.
 
         :param output: An instantiation of a LogOutput subclass to be added.
+        :param level: If given, only data of at least this level is sent to
+         the output.
         """
         if isinstance(output, type):
             msg = 'Output object must be instantiated - don\'t pass a type.'
@@ -226,10 +391,18 @@ class Logger:
         elif not isinstance(output, LogOutput):
             raise ValueError('Output object must be a subclass of LogOutput')
         self._outputs.append(output)
+        self._dispatch.clear()
+        if level is not None:
+            self._output_levels[output] = level
 
     def remove_all(self):
         """Remove all outputs that have been added to this logger."""
         self._outputs.clear()
+        self._dispatch.clear()
+        self._dump_latency.clear()
+        self._output_levels.clear()
+        if self._stats:
+            self._stats.clear()
 
     def remove_output_type(self, output_type):
         """Remove all outputs of a given type.
@@ -240,6 +413,17 @@ class Logger:
             output for output in self._outputs
             if not isinstance(output, output_type)
         ]
+        self._dispatch.clear()
+        self._output_levels = {
+            output: level
+            for output, level in self._output_levels.items()
+            if not isinstance(output, output_type)
+        }
+        self._dump_latency = {
+            output: latency
+            for output, latency in self._dump_latency.items()
+            if not isinstance(output, output_type)
+        }
 
     def reset_output(self, output):
         """Removes, then re-adds a given output to the logger.
@@ -265,17 +449,260 @@ class Logger:
         :param output_type: A LogOutput subclass type to be dumped.
         :param step: The current run step.
         """
-        for output in self._outputs:
-            if isinstance(output, output_type):
-                output.dump(step=step)
+        outputs = [
+            output for output in self._outputs
+            if isinstance(output, output_type)
+        ]
+        self._dump(outputs, step)
 
     def dump_all(self, step=None):
         """Dump all outputs connected to the logger.
 
         :param step: The current run step.
         """
+        for throttle in self._throttles.values():
+            self._log_suppressed(throttle)
+        self._dump(list(self._outputs), step)
+
+    def enable_async(self, max_queue_size=1024, backpressure='block'):
+        """Record and dump outputs on a background writer thread.
+
+        After this is called, log() and dump_all() only enqueue their work and
+        return immediately. A TabularInput passed to log() is copied, so it
+        may be mutated or cleared right away. Because the copy is recorded
+        later, keys of an async-logged TabularInput are always considered
+        recorded, and unrecorded key warnings are not emitted for it.
+
+        Errors raised by an output on the writer thread are re-raised by the
+        next call to log(), dump_all(), flush() or close().
+
+        :param max_queue_size: The maximum number of pending log() and dump()
+         calls.
+        :param backpressure: What to do when the queue is full. One of
+         'block' (wait for the writer to catch up), 'drop_oldest' (discard
+         the oldest pending log() call) or 'coalesce' (merge a TabularInput
+         into the newest pending TabularInput, keeping the newest value of
+         each key, and block otherwise). If the pending TabularInput is
+         followed by a dump_all(), the merged row is dumped with the step of
+         the next dump_all() instead.
+        """
+        choices = _BackgroundWriter.BACKPRESSURE
+        if backpressure not in choices:
+            raise ValueError('backpressure must be one of {}'.format(
+                ', '.join(choices)))
+        if max_queue_size < 1:
+            raise ValueError('max_queue_size must be at least 1')
+        if self._writer is not None:
+            self._writer.close()
+        self._writer = _BackgroundWriter(self._execute, max_queue_size,
+                                         backpressure)
+
+    def set_dump_workers(self, num_workers):
+        """Dump outputs concurrently on a pool of threads.
+
+        Dumping an output is often independent I/O (flushing a file or a
+        TensorBoard writer), so dumping outputs concurrently makes
+        dump_all() take about as long as the slowest output rather than the
+        sum of all of them. dump_all() still returns only after every output
+        has been dumped, so each output sees its record() and dump() calls in
+        the same order as before. If any output raises, the exception of the
+        first such output (in the order outputs were added) is re-raised.
+
+        :param num_workers: The number of dump threads. With 0 or 1, outputs
+         are dumped one after another on the calling thread.
+        """
+        if self._dump_pool is not None:
+            self._dump_pool.shutdown()
+            self._dump_pool = None
+        if num_workers > 1:
+            self._dump_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=num_workers, thread_name_prefix='dowel-dump')
+
+    @property
+    def dump_latency(self):
+        """Seconds each output took in its most recent dump.
+
+        :return: A dict mapping each output to its latest dump time.
+        """
+        return {
+            output: latency / 1e9
+            for output, latency in self._dump_latency.items()
+        }
+
+    def enable_stats(self, tabular=None, prefix=STATS_PREFIX):
+        """Collect timing statistics for each output.
+
+        Every record() and dump() call of every output is timed. Collecting
+        stats adds two clock reads per output to each log() call, and nothing
+        while stats are disabled.
+
+        :param tabular: If given, the stats are recorded into this
+         TabularInput whenever it is passed to log(), so that they are logged
+         along with each row of the table.
+        :param prefix: The prefix for keys of the stats recorded in tabular.
+        """
+        if self._stats is None:
+            self._stats = {}
+        self._stats_tabular = tabular
+        self._stats_prefix = prefix
+
+    def disable_stats(self):
+        """Stop collecting output stats, and discard those collected."""
+        self._stats = None
+        self._stats_tabular = None
+
+    def stats(self):
+        """Get the timing statistics of each output.
+
+        Times are in nanoseconds. For outputs which count the bytes they
+        write, such as FileOutput, bytes_written, bytes_flushed and
+        flush_count are included too.
+
+        :return: A dict which maps a name for each output (its type name,
+         followed by an index if there are several of that type) to a dict of
+         its statistics.
+        """
+        if self._stats is None:
+            return {}
+        names = collections.Counter()
+        all_stats = {}
         for output in self._outputs:
-            output.dump(step=step)
+            name = type(output).__name__
+            if names[name]:
+                name = '{}_{}'.format(name, names[name])
+            names[type(output).__name__] += 1
+            stats = self._output_stats(output).as_dict()
+            for counter in ('bytes_written', 'bytes_flushed', 'flush_count'):
+                value = getattr(output, counter, None)
+                if value is not None:
+                    stats[counter] = value
+            all_stats[name] = stats
+        return all_stats
+
+    def flush(self, wait=True):
+        """Wait until the background writer has processed all pending calls.
+
+        This is a no-op if the logger is not in async mode.
+
+        :param wait: If False, only raise errors from the writer thread,
+         without waiting for the queue to drain.
+        """
+        if self._writer is not None:
+            self._writer.flush(wait=wait)
+
+    def close(self):
+        """Drain and stop the background writer, then close all outputs.
+
+        The logger returns to synchronous mode afterwards.
+        """
+        writer, self._writer = self._writer, None
+        try:
+            if writer is not None:
+                writer.close()
+        finally:
+            self.set_dump_workers(0)
+            for output in self._outputs:
+                output.close()
+
+    def _dump(self, outputs, step):
+        """Dump outputs now, or enqueue the dump in async mode.
+
+        :param outputs: The outputs to be dumped.
+        :param step: The current run step.
+        """
+        if self._writer is None:
+            self._dump_outputs(outputs, step)
+        else:
+            self._writer.put(_WriterTask('dump', outputs, None, step))
+
+    def _execute(self, task):
+        """Run a task from the background writer queue.
+
+        :param task: The _WriterTask to be executed.
+        """
+        if task.kind == 'record':
+            self._record_outputs(task.outputs, task.data, task.arg)
+        else:
+            self._dump_outputs(task.outputs, task.arg)
+
+    def _record_outputs(self, outputs, data, prefix):
+        """Pass data to each of the given outputs.
+
+        :param outputs: The outputs which should record data.
+        :param data: The data to be logged.
+        :param prefix: The logger prefix at the time data was logged.
+        """
+        if self._stats is None:
+            for output in outputs:
+                output.record(data, prefix=prefix)
+        else:
+            for output in outputs:
+                start = _perf_counter_ns()
+                output.record(data, prefix=prefix)
+                self._output_stats(output).add_record(_perf_counter_ns() -
+                                                      start)
+
+    def _dump_outputs(self, outputs, step):
+        """Dump each of the given outputs.
+
+        :param outputs: The outputs to be dumped.
+        :param step: The current run step.
+        """
+        if self._dump_pool is None or len(outputs) < 2:
+            for output in outputs:
+                self._dump_latency[output] = _timed_dump(output, step)
+                self._add_dump_stats(output)
+        else:
+            futures = [
+                self._dump_pool.submit(_timed_dump, output, step)
+                for output in outputs
+            ]
+            concurrent.futures.wait(futures)
+            for output, future in zip(outputs, futures):
+                self._dump_latency[output] = future.result()
+                self._add_dump_stats(output)
+
+    def _add_dump_stats(self, output):
+        """Add the latest dump time of an output to its stats.
+
+        :param output: The output which was dumped.
+        """
+        if self._stats is not None:
+            self._output_stats(output).add_dump(self._dump_latency[output])
+
+    def _output_stats(self, output):
+        """Get the stats of an output, creating them if needed.
+
+        :param output: A LogOutput.
+        :return: The _OutputStats of output.
+        """
+        try:
+            return self._stats[output]
+        except KeyError:
+            return self._stats.setdefault(output, _OutputStats())
+
+    def _log_suppressed(self, throttle):
+        """Log how many calls a throttle has suppressed, if any.
+
+        The count is logged at the level of the suppressed calls.
+
+        :param throttle: The _Throttle to report on.
+        """
+        if throttle.suppressed:
+            message = '[last message repeated {} times]'.format(
+                throttle.suppressed)
+            self.log(message, level=throttle.level)
+            throttle.suppressed = 0
+
+    def _record_stats(self, tabular):
+        """Record output stats into a TabularInput.
+
+        :param tabular: The TabularInput to record the stats into.
+        """
+        for name, stats in self.stats().items():
+            for key, value in stats.items():
+                tabular.record('{}{}/{}'.format(self._stats_prefix, name, key),
+                               value)
 
     @contextlib.contextmanager
     def prefix(self, prefix):
@@ -310,6 +737,21 @@ class Logger:
         del self._prefixes[-1]
         self._prefix_str = ''.join(self._prefixes)
 
+    def _outputs_accepting(self, data_type):
+        """Build the dispatch table entry for a type of log data.
+
+        The outputs accepting each type are looked up once and cached until
+        the set of outputs changes, so that log() does not have to query
+        types_accepted of every output on every call.
+
+        :param data_type: The type of the data being logged.
+        :return: A tuple of the outputs which accept data_type.
+        """
+        outputs = tuple(output for output in self._outputs
+                        if issubclass(data_type, output.types_accepted))
+        self._dispatch[data_type] = outputs
+        return outputs
+
     def _warn(self, msg):
         """Warns the user using warnings.warn.
 
@@ -326,5 +768,327 @@ class Logger:
         self._disable_warnings = True
 
 
+def _timed_dump(output, step):
+    """Dump an output.
+
+    :param output: The output to be dumped.
+    :param step: The current run step.
+    :return: The time the dump took, in nanoseconds.
+    """
+    start = _perf_counter_ns()
+    output.dump(step=step)
+    return _perf_counter_ns() - start
+
+
+class _OutputStats:
+    """Counters for the record() and dump() calls of one output."""
+
+    __slots__ = ('record_calls', 'record_total_ns', 'record_max_ns',
+                 'dump_calls', 'dump_total_ns', 'dump_max_ns')
+
+    def __init__(self):
+        self.record_calls = 0
+        self.record_total_ns = 0
+        self.record_max_ns = 0
+        self.dump_calls = 0
+        self.dump_total_ns = 0
+        self.dump_max_ns = 0
+
+    def add_record(self, elapsed_ns):
+        """Count a record() call.
+
+        :param elapsed_ns: The time the call took.
+        """
+        self.record_calls += 1
+        self.record_total_ns += elapsed_ns
+        if elapsed_ns > self.record_max_ns:
+            self.record_max_ns = elapsed_ns
+
+    def add_dump(self, elapsed_ns):
+        """Count a dump() call.
+
+        :param elapsed_ns: The time the call took.
+        """
+        self.dump_calls += 1
+        self.dump_total_ns += elapsed_ns
+        if elapsed_ns > self.dump_max_ns:
+            self.dump_max_ns = elapsed_ns
+
+    def as_dict(self):
+        """Return the counters and mean times as a dict."""
+        return {
+            'record_calls': self.record_calls,
+            'record_total_ns': self.record_total_ns,
+            'record_mean_ns':
+            (self.record_total_ns / max(self.record_calls, 1)),
+            'record_max_ns': self.record_max_ns,
+            'dump_calls': self.dump_calls,
+            'dump_total_ns': self.dump_total_ns,
+            'dump_mean_ns': self.dump_total_ns / max(self.dump_calls, 1),
+            'dump_max_ns': self.dump_max_ns,
+        }
+
+
+class LazyMessage:
+    """A str log message which is only formatted if it is logged.
+
+    Pass this to Logger.log() to skip the formatting of messages which no
+    output accepts, for example because of their level:
+
+    logger.log(LazyMessage('q-values: {}', q_values), level=DEBUG)
+
+    :param fmt: A format string, as for str.format().
+    :param args: Positional arguments to format with.
+    :param kwargs: Keyword arguments to format with.
+    """
+
+    __slots__ = ('fmt', 'args', 'kwargs')
+
+    def __init__(self, fmt, *args, **kwargs):
+        self.fmt = fmt
+        self.args = args
+        self.kwargs = kwargs
+
+    def __call__(self):
+        """Format the message."""
+        return self.fmt.format(*self.args, **self.kwargs)
+
+    def __str__(self):
+        """Format the message."""
+        return self()
+
+
+class _LazyResult(LazyMessage):
+    """Log data which is built by a function, if it is logged.
+
+    See lazy().
+
+    :param fn: A function with no arguments, which returns the data.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, fn):
+        super().__init__(fn)
+
+    def __call__(self):
+        """Build the data."""
+        return self.fmt()
+
+    def __str__(self):
+        """Build the data, as a str."""
+        return str(self())
+
+
+def lazy(fn):
+    """Mark a function as building log data, to be called only if logged.
+
+    Logger.log() calls fn if an output accepting str would log it at the
+    given level, and logs its result, which may be of any type:
+
+    logger.log(lazy(lambda: 'weights: {}'.format(weights)), level=DEBUG)
+
+    :param fn: A function with no arguments, which returns the data.
+    :return: An object to pass to Logger.log().
+    """
+    return _LazyResult(fn)
+
+
+class _Throttle:
+    """Rate limit state of one call site or key of Logger.log_throttled().
+
+    :param every_n: Allow at most one of every every_n calls.
+    :param every_secs: Allow at most one call every every_secs seconds.
+    """
+
+    __slots__ = ('every_n', 'every_secs', 'suppressed', 'calls', 'last_time',
+                 'level')
+
+    def __init__(self, every_n, every_secs):
+        self.every_n = every_n
+        self.every_secs = every_secs
+        self.suppressed = 0
+        self.level = INFO
+        self.calls = None
+        self.last_time = None
+
+    def allow(self):
+        """Count a call, and check if it should be logged.
+
+        :return: True if the call should be logged.
+        """
+        if self.calls is not None:
+            self.calls += 1
+            if self.every_n is not None and self.calls < self.every_n:
+                self.suppressed += 1
+                return False
+            if self.every_secs is not None:
+                now = time.monotonic()
+                if now - self.last_time < self.every_secs:
+                    self.suppressed += 1
+                    return False
+                self.last_time = now
+        elif self.every_secs is not None:
+            self.last_time = time.monotonic()
+        self.calls = 0
+        return True
+
+
+_WriterTask = collections.namedtuple('_WriterTask',
+                                     ['kind', 'outputs', 'data', 'arg'])
+
+
+class _BackgroundWriter:
+    """A thread which drains a bounded queue of logger tasks.
+
+    :param execute: Function called with each task on the writer thread.
+    :param max_queue_size: The maximum number of pending tasks.
+    :param backpressure: The policy for put() when the queue is full. See
+     Logger.enable_async().
+    """
+
+    BACKPRESSURE = ('block', 'drop_oldest', 'coalesce')
+
+    def __init__(self, execute, max_queue_size, backpressure):
+        self._execute = execute
+        self._max_queue_size = max_queue_size
+        self._backpressure = backpressure
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._unfinished = 0
+        self._closed = False
+        self._error = None
+        self.dropped = 0
+        self.coalesced = 0
+        self._merged_dump = None
+        self._thread = threading.Thread(target=self._run,
+                                        name='dowel-writer',
+                                        daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, task):
+        """Add a task to the queue, applying backpressure if it is full.
+
+        :param task: The _WriterTask to be executed.
+        """
+        with self._cond:
+            self._raise_error()
+            merged_dump, self._merged_dump = self._merged_dump, None
+            if (merged_dump is not None and task.kind == 'dump' and self._queue
+                    and self._queue[-1] is merged_dump
+                    and task.outputs == merged_dump.outputs):
+                # The row logged before this dump was merged into the row of
+                # the pending dump, which now takes this dump's step
+                self._queue[-1] = task
+                return
+            while len(self._queue) >= self._max_queue_size:
+                if self._backpressure == 'drop_oldest' and self._drop_oldest():
+                    break
+                if self._backpressure == 'coalesce' and self._coalesce(task):
+                    return
+                self._cond.wait()
+                self._raise_error()
+            self._queue.append(task)
+            self._unfinished += 1
+            self._cond.notify_all()
+
+    def flush(self, wait=True):
+        """Wait for all queued tasks to finish.
+
+        :param wait: Whether to wait for the queue to drain.
+        """
+        with self._cond:
+            while wait and self._unfinished:
+                self._cond.wait()
+            self._raise_error()
+
+    def close(self):
+        """Process all queued tasks and stop the thread."""
+        atexit.unregister(self.close)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        with self._cond:
+            self._raise_error()
+
+    def _drop_oldest(self):
+        """Discard the oldest pending record task.
+
+        Dump tasks are never dropped.
+
+        :return: True if a task was dropped.
+        """
+        for i, queued in enumerate(self._queue):
+            if queued.kind == 'record':
+                del self._queue[i]
+                self._unfinished -= 1
+                self.dropped += 1
+                return True
+        return False
+
+    def _coalesce(self, task):
+        """Merge a TabularInput task into the newest pending row.
+
+        The newest pending row is either the last task in the queue, or the
+        record task right before a final dump of the same outputs. In the
+        latter case, the next dump of those outputs replaces the pending one,
+        so that the merged row is dumped with the newest step.
+
+        :param task: The _WriterTask being added.
+        :return: True if task was merged into the queue.
+        """
+        if task.kind != 'record' or not isinstance(task.data, TabularInput):
+            return False
+        index = len(self._queue) - 1
+        dump = None
+        if self._queue[index].kind == 'dump' and index > 0:
+            dump = self._queue[index]
+            index -= 1
+            if not set(task.outputs) <= set(dump.outputs):
+                return False
+        last = self._queue[index]
+        if (last.kind != 'record' or not isinstance(last.data, TabularInput)
+                or last.outputs != task.outputs or last.arg != task.arg):
+            return False
+        merged = last.data
+        if isinstance(merged, TabularSnapshot):
+            merged = merged.copy()
+            self._queue[index] = last._replace(data=merged)
+        merged.record_many(task.data.as_dict)
+        self._merged_dump = dump
+        self.coalesced += 1
+        return True
+
+    def _run(self):
+        """Execute tasks until the writer is closed and the queue is empty."""
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                task = self._queue.popleft()
+                self._cond.notify_all()
+            try:
+                self._execute(task)
+            except Exception as e:  # pylint: disable=broad-except
+                with self._cond:
+                    if self._error is None:
+                        self._error = e
+            finally:
+                with self._cond:
+                    self._unfinished -= 1
+                    self._cond.notify_all()
+
+    def _raise_error(self):
+        """Re-raise the first error raised on the writer thread, if any."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+
 class LoggerWarning(UserWarning):
     """Warning class for the Logger."""
@@ -6,10 +6,12 @@ import abc
 import datetime
 import os
 import sys
+import time
 
 import dateutil.tz
 
 from dowel import LogOutput
+from dowel.compression import CompressedTextFile, compression_of
 from dowel.tabular_input import TabularInput
 from dowel.utils import mkdir_p
 
@@ -49,17 +51,133 @@ class StdOutput(LogOutput):
         sys.stdout.flush()
 
 
+class FlushPolicy:
+    """Decides when a FileOutput flushes its file.
+
+    By default, the file is flushed on every dump(), as with a plain file
+    object. On network filesystems, it may be better to flush periodically
+    instead, every few rows, bytes or seconds (whichever comes first), and to
+    fsync for durability. On local disks, a large buffer and no flush on
+    dump() reduce the number of system calls.
+
+    The periodic conditions are checked whenever data is written to the
+    file. Subclasses can override periodic and due() for other conditions.
+
+    :param every_rows: Flush after this many writes, i.e. rows of a CSV
+     file, or messages and tables of a text file.
+    :param every_bytes: Flush after this many bytes, counting each
+     character as one byte.
+    :param every_seconds: Flush when data is written this many seconds after
+     the last flush.
+    :param on_dump: Whether to flush on every dump().
+    :param fsync: Whether to also fsync the file on every flush.
+    :param buffer_size: The buffer size of the file in bytes, or -1 for the
+     default size.
+    """
+
+    def __init__(self,
+                 every_rows=None,
+                 every_bytes=None,
+                 every_seconds=None,
+                 on_dump=True,
+                 fsync=False,
+                 buffer_size=-1):
+        self.every_rows = every_rows
+        self.every_bytes = every_bytes
+        self.every_seconds = every_seconds
+        self.on_dump = on_dump
+        self.fsync = fsync
+        self.buffer_size = buffer_size
+
+    @property
+    def periodic(self):
+        """Whether due() needs to be checked after every write."""
+        return (self.every_rows is not None or self.every_bytes is not None
+                or self.every_seconds is not None)
+
+    def due(self, rows, num_bytes, seconds):
+        """Check if the file should be flushed after a write.
+
+        :param rows: Number of writes since the last flush.
+        :param num_bytes: Number of bytes written since the last flush.
+        :param seconds: Seconds since the last flush.
+        :return: True if the file should be flushed.
+        """
+        return (
+            (self.every_rows is not None and rows >= self.every_rows)
+            or (self.every_bytes is not None and num_bytes >= self.every_bytes)
+            or
+            (self.every_seconds is not None and seconds >= self.every_seconds))
+
+
 class FileOutput(LogOutput, metaclass=abc.ABCMeta):
     """File output abstract class for logger.
 
     :param file_name: The file this output should log to.
     :param mode: File open mode ('a', 'w', etc).
+    :param flush_policy: A FlushPolicy, which decides when the file is
+     flushed. By default, it is flushed on every dump().
+    :param compression: 'gzip', 'bz2' or 'lzma' to compress the file as it
+     is written (see `dowel.compression`), or None to choose by the suffix
+     of the file name (.gz, .bz2 or .xz).
     """
 
-    def __init__(self, file_name, mode='w'):
+    def __init__(self,
+                 file_name,
+                 mode='w',
+                 flush_policy=None,
+                 compression=None):
         mkdir_p(os.path.dirname(file_name))
+        self._flush_policy = flush_policy or FlushPolicy()
+        self._compression = compression_of(file_name, compression)
         # Open the log file in child class
-        self._log_file = open(file_name, mode)
+        self._log_file = _LogFile(self._open(file_name, mode),
+                                  self._flush_policy)
+
+    @property
+    def bytes_written(self):
+        """The number of bytes written to the log file so far.
+
+        This is exact as of the last flush. Text written since then counts
+        one byte per character, until the file is flushed. For compressed
+        files, this counts the bytes before compression.
+        """
+        return self._log_file.bytes_written
+
+    @property
+    def flush_count(self):
+        """The number of times the log file was flushed."""
+        return self._log_file.flush_count
+
+    @property
+    def bytes_flushed(self):
+        """The number of bytes written to the log file and flushed."""
+        return self._log_file.bytes_flushed
+
+    def _open(self, file_name, mode):
+        """Open a file with the buffer size of the flush policy.
+
+        :param file_name: The file to open.
+        :param mode: File open mode ('a', 'w', etc).
+        :return: The file object, which compresses what is written to it if
+         the output is compressed.
+        """
+        if self._compression is not None:
+            return CompressedTextFile(file_name, mode, self._compression,
+                                      self._flush_policy.buffer_size)
+        return open(file_name, mode, buffering=self._flush_policy.buffer_size)
+
+    def _reopen(self, file_name, mode):
+        """Close the log file, then open a new one.
+
+        The counts of bytes written and flushed carry over to the new file.
+
+        :param file_name: The file to open.
+        :param mode: File open mode ('a', 'w', etc).
+        """
+        self.close()
+        self._log_file = _LogFile(self._open(file_name, mode),
+                                  self._flush_policy, self._log_file)
 
     def close(self):
         """Close any files used by the output."""
@@ -67,8 +185,9 @@ class FileOutput(LogOutput, metaclass=abc.ABCMeta):
             self._log_file.close()
 
     def dump(self, step=None):
-        """Flush data to log file."""
-        self._log_file.flush()
+        """Flush data to log file, unless the flush policy says otherwise."""
+        if self._flush_policy.on_dump:
+            self._log_file.flush()
 
 
 class TextOutput(FileOutput):
@@ -76,10 +195,18 @@ class TextOutput(FileOutput):
 
     :param file_name: The file this output should log to.
     :param with_timestamp: Whether to log a timestamp before the data.
+    :param flush_policy: A FlushPolicy, which decides when the file is
+     flushed. By default, it is flushed on every dump().
+    :param compression: 'gzip', 'bz2' or 'lzma' to compress the file, or
+     None to choose by the suffix of the file name.
     """
 
-    def __init__(self, file_name, with_timestamp=True):
-        super().__init__(file_name, 'a')
+    def __init__(self,
+                 file_name,
+                 with_timestamp=True,
+                 flush_policy=None,
+                 compression=None):
+        super().__init__(file_name, 'a', flush_policy, compression)
         self._with_timestamp = with_timestamp
         self._delimiter = ' | '
 
@@ -103,3 +230,80 @@ class TextOutput(FileOutput):
             raise ValueError('Unacceptable type.')
 
         self._log_file.write(out + '\n')
+
+
+class _LogFile:
+    """A text file which counts the bytes written to it, and flushes it.
+
+    Writes are counted in characters, since encoding every string just to
+    measure it would slow down every write. The exact number of bytes is
+    taken from the file when it is flushed.
+
+    :param file: The text file object to write to.
+    :param flush_policy: The FlushPolicy deciding when to flush the file.
+    :param previous: A _LogFile whose counts carry over to this one.
+    """
+
+    def __init__(self, file, flush_policy, previous=None):
+        self._file = file
+        self._write = file.write
+        self._flush_policy = flush_policy
+        self._periodic = flush_policy.periodic
+        self.bytes_flushed = previous.bytes_flushed if previous else 0
+        self.flush_count = previous.flush_count if previous else 0
+        self._chars = 0
+        self._position = self._byte_position()
+        self._rows = 0
+        self._flushed_at = time.monotonic()
+
+    @property
+    def bytes_written(self):
+        """The bytes flushed, plus the characters written since."""
+        return self.bytes_flushed + self._chars
+
+    def write(self, s):
+        """Write a string to the file, flushing it if the policy says so."""
+        self._chars += len(s)
+        result = self._write(s)
+        if self._periodic:
+            self._rows += 1
+            if self._flush_policy.due(self._rows, self._chars,
+                                      time.monotonic() - self._flushed_at):
+                self.flush()
+        return result
+
+    def flush(self):
+        """Flush the file, and fsync it if the policy says so."""
+        self._file.flush()
+        if self._flush_policy.fsync:
+            os.fsync(self._file.fileno())
+        position = self._byte_position()
+        self.flush_count += 1
+        self.bytes_flushed += position - self._position
+        self._position = position
+        self._chars = 0
+        self._rows = 0
+        self._flushed_at = time.monotonic()
+
+    def close(self):
+        """Flush and close the file."""
+        if self._chars:
+            self.flush()
+        self._file.close()
+
+    def _byte_position(self):
+        """Get the number of bytes written to the file.
+
+        This is exact right after a flush, when the text file has no
+        buffered text left.
+
+        :return: The position in the binary file, or the number of bytes to
+         compress for compressed files.
+        """
+        if isinstance(self._file, CompressedTextFile):
+            return self._file.bytes_encoded
+        return self._file.buffer.tell()
+
+    def __getattr__(self, name):
+        """Delegate everything else to the file."""
+        return getattr(self._file, name)
@@ -3,29 +3,50 @@ import contextlib
 import warnings
 
 import numpy as np
-import tabulate
 
+from dowel.accumulators import (ExponentialMovingAverage, RollingWindow,
+                                StatAccumulator)
+from dowel.tabular_renderer import TabularRenderer
 from dowel.utils import colorize
 
+# Number of distinct key sequences whose prefixed keys are cached
+_KEY_CACHE_SIZE = 64
+
 
 class TabularInput:
     """This class allows the user to create tables for easy display.
 
     TabularInput may be passed to the logger via its log() method.
+
+    Views of the table (such as as_primitive_dict and its string rendering)
+    are computed at most once per version of the table. The version changes
+    whenever an entry is recorded or the table is cleared, so outputs may
+    also use it to detect that a table has not changed.
     """
 
     def __init__(self):
         self._dict = {}
+        self._shared = False
+        self._row = 0
         self._recorded = set()
         self._prefixes = []
         self._prefix_str = ''
         self._warned_once = set()
         self._disable_warnings = False
+        self._version = 0
+        self._cache = {}
+        self._cache_version = 0
+        self._key_cache = {}
+        self._providers = []
+        # Whether some entries are only recorded when the table is read
+        self._deferred = False
+        self._renderer = TabularRenderer()
 
     def __str__(self):
         """Return a string representation of the table for the logger."""
-        return tabulate.tabulate(
-            sorted(self.as_primitive_dict.items(), key=lambda x: x[0]))
+        return self._cached(
+            'str', lambda: self._renderer.render(self.primitive_keys, self.
+                                                 as_primitive_dict))
 
     def record(self, key, val):
         """Save key/value entries for the table.
@@ -33,7 +54,174 @@ class TabularInput:
         :param key: String key corresponding to the value.
         :param val: Value that is to be stored in the table.
         """
+        if self._shared:
+            self._unshare()
         self._dict[self._prefix_str + str(key)] = val
+        self._version += 1
+
+    def record_many(self, mapping):
+        """Save several key/value entries for the table.
+
+        The current prefix is applied to every key, as in record().
+
+        :param mapping: A dict, or an iterable of (key, value) pairs.
+        """
+        if self._shared:
+            self._unshare()
+        if isinstance(mapping, dict):
+            self._dict.update(
+                zip(self._prefixed_keys(mapping), mapping.values()))
+        else:
+            prefix = self._prefix_str
+            self._dict.update((prefix + str(key), val) for key, val in mapping)
+        self._version += 1
+
+    def record_array(self, keys, values):
+        """Save a vector of values, one entry per key.
+
+        :param keys: Sequence of string keys.
+        :param values: One-dimensional array (or sequence) of values, of the
+         same length as keys.
+        :raises ValueError: If values is not one-dimensional, or its length
+         differs from the number of keys.
+        """
+        values = _as_vector(keys, values)
+        if self._shared:
+            self._unshare()
+        self._dict.update(zip(self._prefixed_keys(keys), values.tolist()))
+        self._version += 1
+
+    def _prefixed_keys(self, keys):
+        """Apply the current prefix to a sequence of keys.
+
+        The result is cached, since bulk records usually repeat the same keys
+        under the same prefix every iteration. Reusing the same key strings
+        also makes their dict lookups cheaper.
+
+        :param keys: Iterable of keys.
+        :return: A list of the full keys.
+        """
+        cache_key = (self._prefix_str, tuple(keys))
+        prefixed = self._key_cache.get(cache_key)
+        if prefixed is None:
+            if len(self._key_cache) >= _KEY_CACHE_SIZE:
+                self._key_cache.clear()
+            prefix = self._prefix_str
+            prefixed = [prefix + str(key) for key in cache_key[1]]
+            self._key_cache[cache_key] = prefixed
+        return prefixed
+
+    def handle(self, key):
+        """Get a handle for recording one key quickly.
+
+        The handle's set(value) method is equivalent to record(key, value),
+        with the prefix which is active now, but skips building the full key
+        on every call. Handles stay valid after clear().
+
+            loss = tabular.handle('Loss')
+            for epoch in ...:
+                loss.set(compute_loss())
+                logger.log(tabular)
+
+        :param key: String key corresponding to the values.
+        :return: A handle with a set(value) method.
+        """
+        return _DictHandle(self, self._prefix_str + str(key))
+
+    def accumulator(self,
+                    key,
+                    percentiles=(),
+                    placement='back',
+                    sketch_size=512):
+        """Get an accumulator whose statistics are recorded in the table.
+
+        Whenever the table is read, the accumulator records the same keys as
+        record_misc_stat would for all the values added to it, with the
+        prefix which is active now. It is reset when the table is cleared.
+
+        :param key: String key corresponding to the values.
+        :param percentiles: Percentiles between 0 and 100 to record.
+        :param placement: Whether to put the prefix in front or in the back.
+        :param sketch_size: Size of the quantile sketch of the accumulator.
+        :return: A dowel.StatAccumulator.
+        """
+        accumulator = StatAccumulator(percentiles, sketch_size)
+        self._add_provider(accumulator, key, placement, reset=True)
+        return accumulator
+
+    def rolling(self, key, window, placement='back'):
+        """Get a rolling window whose statistics are recorded in the table.
+
+        Whenever the table is read, the mean, minimum and maximum of the last
+        window values added to it are recorded as RollingAverage, RollingMin
+        and RollingMax, with the prefix which is active now. The window keeps
+        its values when the table is cleared.
+
+        :param key: String key corresponding to the values.
+        :param window: Number of most recent values to aggregate.
+        :param placement: Whether to put the prefix in front or in the back.
+        :return: A dowel.RollingWindow.
+        """
+        rolling = RollingWindow(window)
+        self._add_provider(rolling, key, placement, reset=False)
+        return rolling
+
+    def ema(self, key, alpha, placement='back'):
+        """Get an exponential moving average which is recorded in the table.
+
+        Whenever the table is read, the average of the values added to it is
+        recorded as EMA, with the prefix which is active now. The average is
+        kept when the table is cleared.
+
+        :param key: String key corresponding to the values.
+        :param alpha: Weight of each new value, between 0 and 1.
+        :param placement: Whether to put the prefix in front or in the back.
+        :return: A dowel.ExponentialMovingAverage.
+        """
+        average = ExponentialMovingAverage(alpha)
+        self._add_provider(average, key, placement, reset=False)
+        return average
+
+    def _add_provider(self, source, key, placement, reset):
+        """Record the statistics of an object whenever the table is read.
+
+        :param source: An object with names and version attributes, and a
+         stats() method which returns a value for each name.
+        :param key: String key corresponding to the statistics.
+        :param placement: Whether to put the prefix in front or in the back.
+        :param reset: Whether to reset source when the table is cleared.
+        """
+        if placement == 'front':
+            keys = [name + key for name in source.names]
+        else:
+            keys = [key + name for name in source.names]
+        self._deferred = True
+        self._providers.append(
+            _Provider(source, [self.handle(k) for k in keys], reset))
+
+    def _materialize(self):
+        """Record the deferred entries, i.e. statistics of providers."""
+        for provider in self._providers:
+            source = provider.source
+            if provider.version != source.version:
+                provider.version = source.version
+                for handle, value in zip(provider.handles, source.stats()):
+                    handle.set(value)
+
+    def copy(self):
+        """Return a shallow copy of the table.
+
+        The copy has the same entries and recorded keys, and shares warning
+        state with this table.
+
+        :return: A new TabularInput.
+        """
+        other = TabularInput()
+        other._dict = dict(self.as_dict)
+        other._recorded = set(self._recorded)
+        other._warned_once = self._warned_once
+        other._disable_warnings = self._disable_warnings
+        return other
 
     def mark(self, key):
         """Mark key as recorded."""
@@ -41,37 +229,64 @@ class TabularInput:
 
     def mark_str(self):
         """Mark keys in the primitive dict."""
-        self._recorded |= self.as_primitive_dict.keys()
+        self._mark_keys(self.as_primitive_dict.keys())
 
     def mark_all(self):
         """Mark all keys."""
-        self._recorded |= self._dict.keys()
+        self._mark_keys(self.as_dict.keys())
+
+    def _mark_keys(self, keys):
+        """Mark keys as recorded.
+
+        :param keys: A set-like view of keys.
+        """
+        self._recorded |= keys
 
-    def record_misc_stat(self, key, values, placement='back'):
+    def record_misc_stat(self,
+                         key,
+                         values,
+                         placement='back',
+                         percentiles=(),
+                         axis=None):
         """Record statistics of an array.
 
-        :param key: String key corresponding to the values.
-        :param values: Array of values to be analyzed.
+        The average, standard deviation, median, minimum and maximum of the
+        values are recorded, followed by the requested percentiles. If there
+        are no values, all of them are recorded as NaN.
+
+        With axis, the statistics are computed along that axis, e.g. axis=0
+        computes per-column statistics of a 2-D array. Each statistic is then
+        recorded for several keys at once.
+
+        :param key: String key corresponding to the values. If the statistics
+         are computed along an axis, either a sequence with one key per
+         result, or a string, to which the index of each result is appended.
+        :param values: Array, sequence or iterable of values to be analyzed.
         :param placement: Whether to put the prefix in front or in the back.
+        :param percentiles: Percentiles between 0 and 100 to record, e.g.
+         [10, 90] records the keys 'P10' and 'P90' with the key as prefix.
+        :param axis: Axis along which to compute the statistics. By default,
+         they are computed over all values.
         """
         if placement == 'front':
-            front = ''
-            back = key
-        else:
-            front = key
-            back = ''
-        if values:
-            self.record(front + 'Average' + back, np.average(values))
-            self.record(front + 'Std' + back, np.std(values))
-            self.record(front + 'Median' + back, np.median(values))
-            self.record(front + 'Min' + back, np.min(values))
-            self.record(front + 'Max' + back, np.max(values))
+
+            def stat_key(stat, key):
+                return stat + key
         else:
-            self.record(front + 'Average' + back, np.nan)
-            self.record(front + 'Std' + back, np.nan)
-            self.record(front + 'Median' + back, np.nan)
-            self.record(front + 'Min' + back, np.nan)
-            self.record(front + 'Max' + back, np.nan)
+
+            def stat_key(stat, key):
+                return key + stat
+
+        for stat, result in _misc_stats(values, percentiles, axis):
+            if np.ndim(result) == 0:
+                self.record(stat_key(stat, key), result)
+                continue
+            result = result.reshape(-1)
+            if isinstance(key, str):
+                keys = [key + str(i) for i in range(len(result))]
+            else:
+                keys = key
+            self.record_array([stat_key(stat, k) for k in keys], result)
 
     @contextlib.contextmanager
     def prefix(self, prefix):
@@ -94,16 +309,67 @@ class TabularInput:
     def clear(self):
         """Clear the tabular."""
         # Warn if something wasn't logged
-        for k, v in self._dict.items():
-            if k not in self._recorded:
-                warning = (
-                    'TabularInput {{{}: type({})}} was not accepted by any '
-                    'output'.format(k,
-                                    type(v).__name__))
-                self._warn(warning)
-
-        self._dict.clear()
+        for k, v in self._unrecorded_items():
+            warning = ('TabularInput {{{}: type({})}} was not accepted by any '
+                       'output'.format(k,
+                                       type(v).__name__))
+            self._warn(warning)
+
+        self._clear_entries()
         self._recorded.clear()
+        self._version += 1
+        self._row += 1
+        for provider in self._providers:
+            provider.version = None
+            if provider.reset:
+                provider.source.reset()
+
+    def _unrecorded_items(self):
+        """Find the entries whose keys were not marked as recorded.
+
+        :return: An iterable of (key, value) pairs.
+        """
+        recorded = self._recorded
+        return [(k, v) for k, v in self.as_dict.items() if k not in recorded]
+
+    def _clear_entries(self):
+        """Remove all entries from the table."""
+        if self._shared:
+            # Leave the entries to the snapshots
+            self._dict = {}
+            self._shared = False
+        else:
+            self._dict.clear()
+
+    def snapshot(self):
+        """Return a read-only view of the current entries of the table.
+
+        The view keeps its entries when the table changes, so it can be held
+        by outputs which use the table later, e.g. when they are dumped or on
+        a background thread. Taking a snapshot does not copy the entries:
+        the table copies them before its next change, unless that change is
+        clear(). Snapshots taken while the table is unchanged are the same
+        object.
+
+        Marking keys of a snapshot also marks them in the table, as long as
+        the table has not been cleared since the snapshot was taken.
+
+        :return: A TabularSnapshot.
+        """
+        return self._cached('snapshot', self._snapshot)
+
+    def _snapshot(self):
+        """Take a new snapshot of the table.
+
+        :return: A TabularSnapshot which shares the table's entries.
+        """
+        self._shared = True
+        return TabularSnapshot(self, self._dict)
+
+    def _unshare(self):
+        """Copy the entries, which are shared with a snapshot."""
+        self._dict = dict(self._dict)
+        self._shared = False
 
     def push_prefix(self, prefix):
         """Push prefix to be appended before printed table.
@@ -118,17 +384,75 @@ class TabularInput:
         del self._prefixes[-1]
         self._prefix_str = ''.join(self._prefixes)
 
+    @property
+    def version(self):
+        """The version of the table.
+
+        The version changes whenever the entries of the table may have
+        changed, i.e. on each call to record() or clear().
+        """
+        if self._deferred:
+            self._materialize()
+        return self._version
+
+    def _cached(self, name, build):
+        """Get a view of the table, computing it once per version.
+
+        :param name: Name of the view.
+        :param build: Function which computes the view.
+        :return: The view for the current version.
+        """
+        if self._deferred:
+            self._materialize()
+        return self._cached_at(self._version, name, build)
+
+    def _cached_at(self, version, name, build):
+        """Get a view of the table, computing it once per version.
+
+        :param version: The version of the table to get the view for.
+        :param name: Name of the view.
+        :param build: Function which computes the view.
+        :return: The view for the version.
+        """
+        if self._cache_version != version:
+            self._cache.clear()
+            self._cache_version = version
+        try:
+            return self._cache[name]
+        except KeyError:
+            value = self._cache[name] = build()
+            return value
+
     @property
     def as_primitive_dict(self):
-        """Return the dictionary, excluding all nonprimitive types."""
+        """Return the dictionary, excluding all nonprimitive types.
+
+        The dictionary is shared until the table changes, and must not be
+        modified.
+        """
+        return self._cached('primitive_dict', self._primitive_dict)
+
+    def _primitive_dict(self):
+        """Build the dictionary of primitive entries.
+
+        :return: A new dict of the entries with primitive values.
+        """
         return {
             key: val
             for key, val in self._dict.items() if np.isscalar(val)
         }
 
+    @property
+    def primitive_keys(self):
+        """Return the sorted keys of the primitive dictionary."""
+        return self._cached('primitive_keys',
+                            lambda: tuple(sorted(self.as_primitive_dict)))
+
     @property
     def as_dict(self):
         """Return a dictionary of the tabular items."""
+        if self._deferred:
+            self._materialize()
         return self._dict
 
     def _warn(self, msg):
@@ -149,6 +473,215 @@ class TabularInput:
         self._disable_warnings = True
 
 
+class TabularSnapshot(TabularInput):
+    """A read-only view of the entries of a TabularInput.
+
+    Snapshots are created with TabularInput.snapshot(). Recording entries
+    into a snapshot, or clearing it, raises a TypeError. Use copy() to get a
+    modifiable table with the same entries.
+
+    :param origin: The TabularInput of which this is a snapshot.
+    :param entries: The dict of entries. It must not be modified.
+    """
+
+    def __init__(self, origin, entries):
+        super().__init__()
+        self._dict = entries
+        self._origin = origin
+        self._row = origin._row
+        self._warned_once = origin._warned_once
+        self._disable_warnings = origin._disable_warnings
+        self._renderer = origin._renderer
+
+    def mark(self, key):
+        """Mark key as recorded, in the snapshot and its table."""
+        self._recorded.add(key)
+        origin = self._origin
+        if origin._row == self._row:
+            origin.mark(key)
+
+    def mark_str(self):
+        """Mark keys in the primitive dict, in the snapshot and its table."""
+        self._mark_keys(self.as_primitive_dict.keys())
+
+    def mark_all(self):
+        """Mark all keys, in the snapshot and its table."""
+        self._mark_keys(self.as_dict.keys())
+
+    def _mark_keys(self, keys):
+        """Mark keys as recorded, in the snapshot and its table.
+
+        :param keys: A set-like view of keys.
+        """
+        self._recorded |= keys
+        origin = self._origin
+        if origin._row == self._row:
+            origin._mark_keys(keys)
+
+    def snapshot(self):
+        """Return the snapshot itself, since it is already read-only."""
+        return self
+
+    def record(self, key, val):
+        """Raise a TypeError, since snapshots are read-only."""
+        raise TypeError('TabularSnapshot is read-only')
+
+    def record_many(self, mapping):
+        """Raise a TypeError, since snapshots are read-only."""
+        raise TypeError('TabularSnapshot is read-only')
+
+    def record_array(self, keys, values):
+        """Raise a TypeError, since snapshots are read-only."""
+        raise TypeError('TabularSnapshot is read-only')
+
+    def handle(self, key):
+        """Raise a TypeError, since snapshots are read-only."""
+        raise TypeError('TabularSnapshot is read-only')
+
+    def _add_provider(self, source, key, placement, reset):
+        """Raise a TypeError, since snapshots are read-only."""
+        raise TypeError('TabularSnapshot is read-only')
+
+    def clear(self):
+        """Raise a TypeError, since snapshots are read-only."""
+        raise TypeError('TabularSnapshot is read-only')
+
+
+class _Provider:
+    """An object whose statistics are recorded in a TabularInput.
+
+    :param source: The object.
+    :param handles: The handles of the keys of its statistics.
+    :param reset: Whether to reset source when the table is cleared.
+    """
+
+    __slots__ = ('source', 'handles', 'reset', 'version')
+
+    def __init__(self, source, handles, reset):
+        self.source = source
+        self.handles = handles
+        self.reset = reset
+        self.version = None
+
+
+class _DictHandle:
+    """Handle for recording one key of a TabularInput.
+
+    :param table: The TabularInput.
+    :param key: The full key, including the prefix.
+    """
+
+    __slots__ = ('_table', 'key')
+
+    def __init__(self, table, key):
+        self._table = table
+        self.key = key
+
+    def set(self, value):
+        """Record a value for the key.
+
+        :param value: Value that is to be stored in the table.
+        """
+        table = self._table
+        if table._shared:
+            table._unshare()
+        table._dict[self.key] = value
+        table._version += 1
+
+
+def _misc_stats(values, percentiles=(), axis=None):
+    """Compute the statistics recorded by TabularInput.record_misc_stat.
+
+    The mean and the standard deviation take a pass over the values each. A
+    single partition of a copy of the values finds the minimum, maximum,
+    median and percentiles together, without fully sorting them.
+
+    :param values: Array, sequence or iterable of values, or None.
+    :param percentiles: Percentiles between 0 and 100.
+    :param axis: Axis along which to compute the statistics, or None to use
+     all values.
+    :return: A list of (name, statistic) pairs. Each statistic is a scalar,
+     or an array if axis is given.
+    """
+    if values is None:
+        values = []
+    elif not hasattr(values, '__len__'):
+        values = list(values)
+    values = np.asarray(values)
+    if values.dtype.kind == 'b':
+        values = values.astype(np.int64)
+    if axis is None:
+        values = values.reshape(-1)
+    else:
+        values = np.moveaxis(values, axis, -1)
+    names = ['Average', 'Std', 'Median', 'Min', 'Max']
+    names.extend('P{:g}'.format(q) for q in percentiles)
+
+    n = values.shape[-1]
+    if n == 0:
+        nan = np.full(values.shape[:-1], np.nan)[()]
+        return [(name, nan) for name in names]
+
+    mean = values.mean(axis=-1)
+    deviation = values - mean[..., np.newaxis]
+    np.square(deviation, out=deviation)
+    std = np.sqrt(deviation.mean(axis=-1))
+
+    positions = [0.5 * (n - 1)]
+    positions.extend(q / 100 * (n - 1) for q in percentiles)
+    kth = {0, n - 1}
+    for position in positions:
+        kth.update((int(np.floor(position)), int(np.ceil(position))))
+    ordered = np.partition(values, sorted(kth), axis=-1)
+    minimum = ordered[..., 0]
+    maximum = ordered[..., n - 1]
+    quantiles = []
+    for position in positions:
+        lower = int(np.floor(position))
+        upper = int(np.ceil(position))
+        low = ordered[..., lower]
+        if upper == lower:
+            quantiles.append(low + 0.)
+            continue
+        # Linear interpolation, as in np.percentile
+        high = ordered[..., upper]
+        diff = np.subtract(high, low, dtype=np.float64)
+        t = position - lower
+        if t < 0.5:
+            quantiles.append(low + diff * t)
+        else:
+            quantiles.append(high - diff * (1 - t))
+
+    if values.dtype.kind in 'fc':
+        # Partitioning moves NaNs to the end, where they only show in the
+        # maximum. Propagate them like np.min and np.median would.
+        has_nan = np.isnan(maximum)
+        if has_nan.any():
+            minimum = np.where(has_nan, np.nan, minimum)
+            quantiles = [np.where(has_nan, np.nan, q) for q in quantiles]
+
+    stats = [mean, std, quantiles[0], minimum, maximum] + quantiles[1:]
+    return [(name, stat[()]) for name, stat in zip(names, stats)]
+
+
+def _as_vector(keys, values):
+    """Check that values is a vector with one value per key.
+
+    :param keys: Sequence of keys.
+    :param values: Array-like of values.
+    :raises ValueError: If the shapes do not match.
+    :return: values as a one-dimensional ndarray. Sequences other than
+     ndarrays are converted to an object array, so that their values keep
+     their types.
+    """
+    if not isinstance(values, np.ndarray):
+        values = np.array(values, dtype=object)
+    if values.ndim != 1 or len(values) != len(keys):
+        raise ValueError('Expected a vector of {} values, got shape {}'.format(
+            len(keys), values.shape))
+    return values
+
+
 class TabularInputWarning(UserWarning):
     """Warning class for the TabularInput."""
 
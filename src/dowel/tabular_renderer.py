@@ -0,0 +1,159 @@
+"""Fast text rendering of `dowel.TabularInput` tables.
+
+TabularInput.__str__ renders its primitive entries as a two-column table in
+the "simple" format of tabulate. tabulate infers the type and alignment of
+every cell on every call, which dominates the cost of logging large tables to
+text outputs. TabularRenderer produces the same text, but:
+
+* The key column only depends on the set of keys, which rarely changes
+  between iterations. Its padded cells are cached until the keys change.
+* Values which are ints and floats (the common case) are formatted directly,
+  with the same rules as tabulate: a column of ints is right-aligned, and a
+  column with any float is formatted with 'g' and aligned on the decimal
+  point.
+
+Tables which the fast path does not handle exactly like tabulate (e.g. with
+string values, non-ASCII keys, or only keys which look like numbers) are
+rendered with tabulate.
+"""
+import numpy as np
+
+_FLOAT_TYPES = frozenset([float, np.float64, np.float32, np.float16])
+_INT_TYPES = frozenset([int, np.int64, np.int32, np.int16, np.int8])
+
+
+class TabularRenderer:
+    """Renders tables of key/value pairs like tabulate.tabulate(rows).
+
+    A renderer may be shared by tables which are rendered on different
+    threads, so the keys and their cells are cached as a single tuple.
+    """
+
+    def __init__(self):
+        self._cache = (None, None)
+
+    def render(self, keys, entries):
+        """Render a table.
+
+        :param keys: Tuple of the keys, in the order of the rows.
+        :param entries: Dict from keys to primitive values.
+        :return: The rendered table.
+        """
+        if not keys:
+            return ''
+        cached_keys, key_cells = self._cache
+        if keys != cached_keys:
+            key_cells = _key_cells(keys)
+            self._cache = (keys, key_cells)
+        values = [entries[key] for key in keys]
+        value_cells = None
+        if key_cells is not None:
+            value_cells = _value_cells(values)
+        if value_cells is None:
+            # tabulate is slow to import, so only import it when it is needed
+            import tabulate  # pylint: disable=import-outside-toplevel
+            return tabulate.tabulate(list(zip(keys, values)))
+
+        rule = '-' * len(key_cells[0]) + '  ' + '-' * len(value_cells[0])
+        lines = [rule]
+        # Like tabulate, strip the padding after decimal-aligned values
+        lines.extend([(key + '  ' + value).rstrip()
+                      for key, value in zip(key_cells, value_cells)])
+        lines.append(rule)
+        return '\n'.join(lines)
+
+
+def _key_cells(keys):
+    """Pad the keys to the width of the key column.
+
+    :param keys: Tuple of keys.
+    :return: A list of padded keys, or None if tabulate might render the keys
+     differently, i.e. if they are not all plain text.
+    """
+    if not all(
+            type(key) is str and key and _is_ascii(key) and key.isprintable()
+            and key == key.strip() for key in keys):
+        return None
+    # tabulate aligns the column as numbers if every key looks like a number
+    if all(_is_numeric(key) for key in keys):
+        return None
+    width = max(map(len, keys))
+    return [key.ljust(width) for key in keys]
+
+
+def _is_ascii(key):
+    """Check if a key only has ASCII characters.
+
+    str.isascii() needs Python 3.7.
+
+    :param key: A string.
+    :return: True if key is ASCII.
+    """
+    try:
+        key.encode('ascii')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _is_numeric(key):
+    """Check if tabulate would parse a key as a number or a bool.
+
+    :param key: A string.
+    :return: True if key might not be treated as a string.
+    """
+    if key in ('True', 'False'):
+        return True
+    try:
+        float(key.replace(',', ''))
+    except ValueError:
+        return False
+    return True
+
+
+def _value_cells(values):
+    """Format the values and align them like tabulate.
+
+    :param values: List of values.
+    :return: A list of padded cells, or None if the values are not all ints
+     and floats.
+    """
+    has_float = False
+    for value in values:
+        value_type = type(value)
+        if value_type in _FLOAT_TYPES:
+            has_float = True
+        elif value_type not in _INT_TYPES:
+            return None
+
+    if has_float:
+        try:
+            cells = [format(float(value), 'g') for value in values]
+        except OverflowError:
+            return None
+        # Align on the decimal point (or the exponent, if there is none)
+        decimals = [_after_point(cell) for cell in cells]
+        max_decimals = max(decimals)
+        cells = [
+            cell + ' ' * (max_decimals - decimal)
+            for cell, decimal in zip(cells, decimals)
+        ]
+    else:
+        cells = [str(value) for value in values]
+    width = max(map(len, cells))
+    return [cell.rjust(width) for cell in cells]
+
+
+def _after_point(cell):
+    """Count the characters after the decimal point of a formatted float.
+
+    :param cell: A float formatted with 'g'.
+    :return: The number of characters after the point, or after the 'e' if
+     there is no point, or -1 if there is neither.
+    """
+    point = cell.rfind('.')
+    if point < 0:
+        point = cell.rfind('e')
+        if point < 0:
+            return -1
+    return len(cell) - point - 1
@@ -8,18 +8,20 @@ Note:
     distributions. We add this feature by sampling data from a
     `tfp.distributions.Distribution` object.
 
+Note:
+    This module does not import matplotlib, scipy or tensorflow, which are
+    slow to import. A value can only be a matplotlib figure, a scipy
+    distribution or a tensorflow graph if the user has imported that library
+    already, so these types are only checked against if their module is in
+    `sys.modules`.
+
 """
 import functools
+import sys
 import warnings
 
-import matplotlib.pyplot as plt
 import numpy as np
-import scipy.stats
 import tensorboardX as tbX
-try:
-    import tensorflow as tf
-except ImportError:
-    tf = None
 
 from dowel import Histogram
 from dowel import LoggerWarning
@@ -63,12 +65,23 @@ class TensorBoardOutput(LogOutput):
         self._histogram_samples = int(histogram_samples)
         self._added_graph = False
         self._waiting_for_dump = []
-        # Used in tests to emulate Tensorflow not being installed.
-        self._tf = tf
+        self._tf_module = _IMPORTED
 
         self._warned_once = set()
         self._disable_warnings = False
 
+    @property
+    def _tf(self):
+        """The tensorflow module, or None if it has not been imported."""
+        if self._tf_module is _IMPORTED:
+            return sys.modules.get('tensorflow')
+        return self._tf_module
+
+    @_tf.setter
+    def _tf(self, tf):
+        # Used in tests to emulate Tensorflow not being installed.
+        self._tf_module = tf
+
     @property
     def types_accepted(self):
         """Return the types that the logger may pass to this output."""
@@ -86,8 +99,11 @@ class TensorBoardOutput(LogOutput):
 
         """
         if isinstance(data, TabularInput):
+            # The table is usually changed or cleared before dump(), so keep a
+            # snapshot. Every key is written, so mark them now.
+            data.mark_all()
             self._waiting_for_dump.append(
-                functools.partial(self._record_tabular, data))
+                functools.partial(self._record_tabular, data.snapshot()))
         elif self._tf is not None and isinstance(data, self._tf.Graph):
             self._record_graph(data)
         else:
@@ -122,16 +138,18 @@ class TensorBoardOutput(LogOutput):
     def _record_kv(self, key, value, step):
         if isinstance(value, np.ScalarType):
             self._writer.add_scalar(key, value, step)
-        elif isinstance(value, plt.Figure):
+        elif isinstance(value, Histogram):
+            self._writer.add_histogram(key, value, step)
+        elif _is_instance(value, 'matplotlib.figure', 'Figure'):
             self._writer.add_figure(key, value, step)
-        elif isinstance(value, scipy.stats._distn_infrastructure.rv_frozen):
+        elif _is_instance(value, 'scipy.stats._distn_infrastructure',
+                          'rv_frozen'):
             shape = (self._histogram_samples, ) + value.mean().shape
             self._writer.add_histogram(key, value.rvs(shape), step)
-        elif isinstance(value, scipy.stats._multivariate.multi_rv_frozen):
+        elif _is_instance(value, 'scipy.stats._multivariate',
+                          'multi_rv_frozen'):
             self._writer.add_histogram(key, value.rvs(self._histogram_samples),
                                        step)
-        elif isinstance(value, Histogram):
-            self._writer.add_histogram(key, value, step)
 
     def _record_graph(self, graph):
         graph_def = graph.as_graph_def(add_shapes=True)
@@ -170,5 +188,27 @@ class TensorBoardOutput(LogOutput):
         return msg
 
 
+# Marks that TensorBoardOutput._tf should be looked up in sys.modules
+_IMPORTED = object()
+
+
+def _is_instance(value, module_name, class_name):
+    """Check the type of value against a class, without importing it.
+
+    Args:
+        value: The object to check.
+        module_name(str): The module defining the class.
+        class_name(str): The name of the class.
+
+    Returns:
+        bool: False if the module has not been imported, and otherwise
+            whether value is an instance of the class.
+
+    """
+    module = sys.modules.get(module_name)
+    return module is not None and isinstance(value, getattr(
+        module, class_name))
+
+
 class NonexistentAxesWarning(LoggerWarning):
     """Raise when the specified x axes do not exist in the tabular."""
@@ -0,0 +1,228 @@
+"""A `dowel.TabularInput` which many threads can record into at once."""
+import collections
+import threading
+import weakref
+
+from dowel.tabular_input import _as_vector, TabularInput
+
+
+class ThreadSafeTabularInput(TabularInput):
+    """A TabularInput for recording from several threads.
+
+    Each thread has its own prefix stack, so prefix() in one thread does not
+    change the keys recorded by another. Recorded entries are appended to a
+    per-thread queue (a shard) without locking, and are merged into the table
+    under a single short lock whenever the table is read, e.g. when it is
+    passed to logger.log().
+
+    Entries recorded while the table is being cleared belong either to the
+    cleared row, or to the next one. Among entries with the same key, the
+    last one recorded by a thread wins over earlier ones by the same thread;
+    entries from different threads are merged in no particular order.
+
+    The shard of a thread is dropped once the thread has exited and its
+    entries were merged, so tables recorded into by many short-lived threads
+    do not keep a shard per thread.
+    """
+
+    def __init__(self):
+        self._state = _ThreadState()
+        super().__init__()
+        self._lock = threading.RLock()
+        self._shards = []
+        self._exited = []
+        self._deferred = True
+
+    @property
+    def _prefixes(self):
+        """The prefix stack of the current thread."""
+        return self._state.prefixes
+
+    @_prefixes.setter
+    def _prefixes(self, prefixes):
+        self._state.prefixes = prefixes
+
+    @property
+    def _prefix_str(self):
+        """The joined prefixes of the current thread."""
+        return self._state.prefix_str
+
+    @_prefix_str.setter
+    def _prefix_str(self, prefix_str):
+        self._state.prefix_str = prefix_str
+
+    def record(self, key, val):
+        """Save key/value entries for the table.
+
+        :param key: String key corresponding to the value.
+        :param val: Value that is to be stored in the table.
+        """
+        state = self._state
+        shard = state.shard
+        if shard is None:
+            shard = self._add_shard()
+        shard.append((state.prefix_str + str(key), val))
+
+    def record_many(self, mapping):
+        """Save several key/value entries for the table.
+
+        The current prefix is applied to every key, as in record().
+
+        :param mapping: A dict, or an iterable of (key, value) pairs.
+        """
+        items = mapping.items() if isinstance(mapping, dict) else mapping
+        prefix = self._state.prefix_str
+        entries = [(prefix + str(key), val) for key, val in items]
+        shard = self._state.shard
+        if shard is None:
+            shard = self._add_shard()
+        shard.extend(entries)
+
+    def record_array(self, keys, values):
+        """Save a vector of values, one entry per key.
+
+        :param keys: Sequence of string keys.
+        :param values: One-dimensional array (or sequence) of values, of the
+         same length as keys.
+        :raises ValueError: If values is not one-dimensional, or its length
+         differs from the number of keys.
+        """
+        values = _as_vector(keys, values)
+        self.record_many(zip(keys, values.tolist()))
+
+    def handle(self, key):
+        """Get a handle for recording one key quickly.
+
+        The handle may be used from any thread, and records into the shard of
+        the thread which uses it.
+
+        :param key: String key corresponding to the values.
+        :return: A handle with a set(value) method.
+        """
+        return _ShardHandle(self, self._state.prefix_str + str(key))
+
+    def clear(self):
+        """Clear the tabular."""
+        with self._lock:
+            super().clear()
+
+    def _add_shard(self):
+        """Create the shard of the current thread.
+
+        :return: The new shard.
+        """
+        state = self._state
+        shard = state.shard = collections.deque()
+        # The token is deleted with the thread-local state when the thread
+        # exits. Appends are atomic, so the finalizer does not need the lock.
+        state.token = _ThreadToken()
+        weakref.finalize(state.token, self._exited.append, shard)
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+    @property
+    def as_dict(self):
+        """Return a dictionary of the tabular items.
+
+        Other threads may record into the table while the dictionary is in
+        use, so it is not modified after it is returned.
+        """
+        with self._lock:
+            self._materialize()
+            self._shared = True
+            return self._dict
+
+    def _cached(self, name, build):
+        """Get a view of the table, computing it once per version.
+
+        :param name: Name of the view.
+        :param build: Function which computes the view.
+        :return: The view for the current version.
+        """
+        with self._lock:
+            if self._providers:
+                super()._materialize()
+            self._merge_shards()
+            return self._cached_at(self._version, name, build)
+
+    def _materialize(self):
+        """Record the deferred entries, including the contents of shards."""
+        with self._lock:
+            super()._materialize()
+            self._merge_shards()
+
+    def _merge_shards(self):
+        """Move the entries recorded by all threads into the table.
+
+        Recording threads do not change the version of the table, since they
+        do not hold the lock. Instead, the version changes here whenever
+        entries are merged. The shards of threads which have exited are
+        removed once they are merged.
+        """
+        with self._lock:
+            exited = []
+            while self._exited:
+                exited.append(self._exited.pop())
+            merged = False
+            for shard in self._shards:
+                if not shard:
+                    continue
+                merged = True
+                if self._shared:
+                    self._unshare()
+                # Entries are only removed while holding the lock, and
+                # appends are atomic, so no concurrent record is lost.
+                while shard:
+                    key, val = shard.popleft()
+                    self._dict[key] = val
+            if merged:
+                self._version += 1
+            if exited:
+                exited_ids = {id(shard) for shard in exited}
+                self._shards = [
+                    shard for shard in self._shards
+                    if id(shard) not in exited_ids
+                ]
+
+
+class _ThreadState(threading.local):
+    """The per-thread state of a ThreadSafeTabularInput."""
+
+    def __init__(self):
+        super().__init__()
+        self.prefixes = []
+        self.prefix_str = ''
+        self.shard = None
+        self.token = None
+
+
+class _ThreadToken:
+    """A per-thread object, whose finalizer tells that its thread exited."""
+
+    __slots__ = ('__weakref__', )
+
+
+class _ShardHandle:
+    """Handle for recording one key of a ThreadSafeTabularInput.
+
+    :param table: The ThreadSafeTabularInput.
+    :param key: The full key, including the prefix.
+    """
+
+    __slots__ = ('_table', 'key')
+
+    def __init__(self, table, key):
+        self._table = table
+        self.key = key
+
+    def set(self, value):
+        """Record a value for the key.
+
+        :param value: Value that is to be stored in the table.
+        """
+        table = self._table
+        shard = table._state.shard
+        if shard is None:
+            shard = table._add_shard()
+        shard.append((self.key, value))
@@ -0,0 +1,146 @@
+import math
+import pickle
+
+import numpy as np
+import pytest
+
+from dowel import ExponentialMovingAverage, RollingWindow, StatAccumulator
+
+
+class TestStatAccumulator:
+
+    def setup_method(self):
+        self.rng = np.random.default_rng(0)
+        self.acc = StatAccumulator(percentiles=[10, 90])
+
+    def check_stats(self, values):
+        expected = [
+            np.mean(values),
+            np.std(values),
+            np.median(values),
+            np.min(values),
+            np.max(values),
+            np.percentile(values, 10),
+            np.percentile(values, 90),
+        ]
+        assert self.acc.count == len(values)
+        assert self.acc.stats() == pytest.approx(expected)
+
+    def test_empty(self):
+        assert self.acc.names == [
+            'Average', 'Std', 'Median', 'Min', 'Max', 'P10', 'P90'
+        ]
+        assert all(math.isnan(stat) for stat in self.acc.stats())
+
+    def test_add(self):
+        values = self.rng.normal(size=101)
+        for value in values:
+            self.acc.add(value)
+        self.check_stats(values)
+
+    def test_add_batch(self):
+        values = self.rng.normal(size=(10, 11))
+        self.acc.add_batch(values[:3])
+        self.acc.add(values[3, 0])
+        self.acc.add_batch(values.reshape(-1)[11:])
+        self.acc.add_batch([])
+        values = np.concatenate(
+            (values[:3].reshape(-1), values[3, :1], values.reshape(-1)[11:]))
+        self.check_stats(values)
+
+    def test_merge(self):
+        values = self.rng.normal(loc=5., size=300)
+        other = StatAccumulator()
+        self.acc.add_batch(values[:100])
+        other.add_batch(values[100:])
+        self.acc.merge(pickle.loads(pickle.dumps(other)))
+        self.acc.merge(StatAccumulator())
+        self.check_stats(values)
+
+    def test_nan(self):
+        self.acc.add_batch([1., 2.])
+        self.acc.add(math.nan)
+        self.acc.add(3.)
+        assert all(math.isnan(stat) for stat in self.acc.stats())
+
+    def test_reset(self):
+        self.acc.add_batch([1., 2.])
+        version = self.acc.version
+        self.acc.reset()
+        assert self.acc.version != version
+        assert self.acc.count == 0
+        self.acc.add(3.)
+        assert self.acc.stats()[:5] == [3., 0., 3., 3., 3.]
+
+    def test_sketch_bounded(self):
+        acc = StatAccumulator(percentiles=[10, 90], sketch_size=128)
+        values = self.rng.normal(size=100000)
+        for chunk in np.split(values, 100):
+            part = StatAccumulator(sketch_size=128)
+            part.add_batch(chunk)
+            acc.merge(part)
+        sketch = acc._sketch
+        assert sum(len(level) for level in sketch._levels) < 128 * 12
+        assert acc.mean == pytest.approx(np.mean(values))
+        assert acc.std == pytest.approx(np.std(values))
+        quantiles = acc.quantile([0.1, 0.5, 0.9])
+        expected = np.quantile(values, [0.1, 0.5, 0.9])
+        assert np.abs(quantiles - expected).max() < 0.05
+
+
+class TestRollingWindow:
+
+    def test_empty(self):
+        rolling = RollingWindow(3)
+        assert rolling.names == ['RollingAverage', 'RollingMin', 'RollingMax']
+        assert all(math.isnan(stat) for stat in rolling.stats())
+
+    def test_window(self):
+        values = np.random.default_rng(0).normal(size=50)
+        rolling = RollingWindow(7)
+        for i, value in enumerate(values):
+            rolling.add(value)
+            window = values[max(0, i - 6):i + 1]
+            assert rolling.stats() == pytest.approx(
+                [window.mean(), window.min(),
+                 window.max()])
+
+    def test_nan(self):
+        rolling = RollingWindow(2)
+        rolling.add(1.)
+        rolling.add(math.nan)
+        assert all(math.isnan(stat) for stat in rolling.stats())
+        rolling.add(2.)
+        assert all(math.isnan(stat) for stat in rolling.stats())
+        rolling.add(4.)
+        assert rolling.stats() == [3., 2., 4.]
+
+    def test_reset(self):
+        rolling = RollingWindow(2)
+        for value in (5., 6., 7.):
+            rolling.add(value)
+        rolling.reset()
+        rolling.add(1.)
+        assert rolling.stats() == [1., 1., 1.]
+
+    def test_invalid_window(self):
+        with pytest.raises(ValueError):
+            RollingWindow(0)
+
+
+class TestExponentialMovingAverage:
+
+    def test_average(self):
+        average = ExponentialMovingAverage(0.5)
+        assert math.isnan(average.stats()[0])
+        average.add(2.)
+        assert average.stats() == [2.]
+        average.add(4.)
+        average.add(0.)
+        assert average.stats() == [1.5]
+        average.reset()
+        assert math.isnan(average.value)
+
+    def test_invalid_alpha(self):
+        with pytest.raises(ValueError):
+            ExponentialMovingAverage(0.)
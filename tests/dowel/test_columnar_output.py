@@ -0,0 +1,164 @@
+import math
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from dowel import ColumnarOutput, ColumnarReader, LoggerWarning, TabularInput
+
+
+class TestColumnarOutput:
+
+    def setup_method(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.columnar_output = ColumnarOutput(self.log_dir.name, chunk_rows=1)
+        self.tabular = TabularInput()
+
+    def teardown_method(self):
+        self.log_dir.cleanup()
+
+    def record_rows(self, rows, step=None):
+        for row in rows:
+            for key, value in row.items():
+                self.tabular.record(key, value)
+            self.columnar_output.record(self.tabular)
+            self.tabular.clear()
+        self.columnar_output.dump(step)
+
+    def test_record(self):
+        self.record_rows([{'itr': i, 'loss': 1. / (i + 1)} for i in range(3)])
+        self.record_rows([{'itr': 3, 'loss': 0.25}])
+
+        reader = ColumnarReader(self.log_dir.name)
+        assert len(reader) == 4
+        assert reader.keys == ['itr', 'loss']
+        assert reader['itr'].dtype == np.int64
+        assert reader['itr'].tolist() == [0, 1, 2, 3]
+        assert reader['loss'].dtype == np.float64
+        assert reader['loss'].tolist() == [1., 0.5, 1. / 3, 0.25]
+        assert reader.steps.tolist() == [0, 0, 0, 1]
+        assert reader.valid('loss').all()
+
+    def test_step(self):
+        self.record_rows([{'foo': 1.}], step=10)
+        self.record_rows([{'foo': 2.}], step=20)
+        assert ColumnarReader(self.log_dir.name).steps.tolist() == [10, 20]
+
+    def test_missing_keys(self):
+        rows = [{'foo': i} for i in range(5)]
+        for i in range(2, 5):
+            rows[i]['bar'] = float(i)
+        rows[3]['baz'] = 3
+        del rows[4]['foo']
+        self.record_rows(rows[:3])
+        # Rows are split across bytes of the bitmap
+        self.record_rows(rows[3:] * 3)
+
+        reader = ColumnarReader(self.log_dir.name)
+        assert len(reader) == 9
+        foo_valid = [True] * 4 + [False, True, False, True, False]
+        assert reader.valid('foo').tolist() == foo_valid
+        assert reader['foo'][reader.valid('foo')].tolist() == [
+            0, 1, 2, 3, 3, 3
+        ]
+        assert reader.valid('bar').tolist() == [False] * 2 + [True] * 7
+        assert math.isnan(reader['bar'][0])
+        assert reader.valid('baz').tolist() == [False] * 3 + [True, False] * 3
+        assert reader['baz'].tolist() == [0] * 3 + [3, 0] * 3
+
+    @mock.patch('dowel.columnar_output._MAX_OPEN_COLUMNS', 0)
+    def test_missing_keys_closed_files(self):
+        self.test_missing_keys()
+
+    def test_promoted_missing_keys(self):
+        self.record_rows([{'foo': 1, 'bar': 1}, {'bar': 2}])
+        self.record_rows([{'foo': 1.5, 'bar': 3}])
+        reader = ColumnarReader(self.log_dir.name)
+        assert reader['foo'].dtype == np.float64
+        assert reader.valid('foo').tolist() == [True, False, True]
+        assert reader['foo'][0] == 1 and reader['foo'][2] == 1.5
+        assert math.isnan(reader['foo'][1])
+
+    def test_dtypes(self):
+        self.record_rows([{
+            'float32': np.float32(1.5),
+            'bool': True,
+            'promoted': 1
+        }])
+        self.record_rows([{
+            'float32': np.float32(2.5),
+            'bool': False,
+            'promoted': 1.5
+        }])
+
+        reader = ColumnarReader(self.log_dir.name)
+        assert reader['float32'].dtype == np.float32
+        assert reader['float32'].tolist() == [1.5, 2.5]
+        assert reader['bool'].tolist() == [1, 0]
+        assert reader['promoted'].dtype == np.float64
+        assert reader['promoted'].tolist() == [1., 1.5]
+
+    def test_non_numbers(self):
+        with pytest.warns(LoggerWarning):
+            self.record_rows([{'foo': 'bar', 'baz': 1}])
+        reader = ColumnarReader(self.log_dir.name)
+        assert 'foo' not in reader
+        assert reader['baz'].tolist() == [1]
+
+    def test_partial_dump(self):
+        self.record_rows([{'foo': 1}])
+        self.tabular.record('foo', 2)
+        self.columnar_output.record(self.tabular)
+        # Rows which have not been dumped are not visible
+        assert ColumnarReader(self.log_dir.name)['foo'].tolist() == [1]
+        self.columnar_output.close()
+        assert ColumnarReader(self.log_dir.name)['foo'].tolist() == [1, 2]
+
+    def test_chunks(self):
+        self.columnar_output = ColumnarOutput(self.log_dir.name, chunk_rows=3)
+        self.record_rows([{'foo': 1}], step=10)
+        self.record_rows([{'foo': 2.5}], step=20)
+        # Dumped rows are buffered until the chunk is full
+        assert len(ColumnarReader(self.log_dir.name)) == 0
+        self.record_rows([{'foo': 3, 'bar': 1}, {'foo': 4}], step=30)
+        reader = ColumnarReader(self.log_dir.name)
+        assert reader.steps.tolist() == [10, 20, 30, 30]
+        assert reader['foo'].tolist() == [1., 2.5, 3., 4.]
+        assert reader.valid('bar').tolist() == [False, False, True, False]
+
+        self.record_rows([{'foo': 5}], step=40)
+        self.tabular.record('foo', 6)
+        self.columnar_output.record(self.tabular)
+        self.columnar_output.flush()
+        # Rows which have not been dumped are not written by flush()
+        assert ColumnarReader(self.log_dir.name).steps.tolist()[4:] == [40]
+        self.columnar_output.close()
+        assert ColumnarReader(self.log_dir.name)['foo'].tolist()[4:] == [5, 6]
+
+    def test_chunk_seconds(self):
+        self.columnar_output = ColumnarOutput(self.log_dir.name,
+                                              chunk_rows=100,
+                                              chunk_seconds=60.)
+        self.record_rows([{'foo': 1}])
+        assert len(ColumnarReader(self.log_dir.name)) == 0
+        with mock.patch('time.monotonic', return_value=time.monotonic() + 60):
+            self.record_rows([{'foo': 2}])
+        assert ColumnarReader(self.log_dir.name)['foo'].tolist() == [1, 2]
+
+    def test_empty(self):
+        reader = ColumnarReader(self.log_dir.name)
+        assert len(reader) == 0
+        assert reader.keys == []
+        assert len(reader.steps) == 0
+
+    def test_overwrite(self):
+        self.record_rows([{'foo': 1}, {'foo': 2}])
+        self.columnar_output = ColumnarOutput(self.log_dir.name, chunk_rows=1)
+        self.record_rows([{'foo': 3}])
+        assert ColumnarReader(self.log_dir.name)['foo'].tolist() == [3]
+
+    def test_unacceptable_type(self):
+        with pytest.raises(ValueError):
+            self.columnar_output.record('foo')
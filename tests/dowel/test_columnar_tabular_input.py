@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from dowel import ColumnarTabularInput
+from dowel.tabular_input import TabularInputWarning
+from tests.dowel.test_tabular_input import TestTabularInput
+
+
+class TestColumnarTabularInput(TestTabularInput):
+    """Run all TabularInput tests against the columnar backend."""
+
+    def setup_method(self):
+        self.tabular = ColumnarTabularInput(capacity=2)
+
+    def test_slots_survive_clear(self):
+        self.tabular.record('foo', 1)
+        self.tabular.record('bar', 2.)
+        self.tabular.mark_all()
+        self.tabular.clear()
+        assert not self.tabular.as_dict
+
+        self.tabular.record('bar', 3.)
+        assert self.tabular.as_dict == {'bar': 3.}
+        assert self.tabular._size == 2
+
+    def test_grow(self):
+        for i in range(100):
+            self.tabular.record(str(i), i)
+        assert self.tabular.as_dict == {str(i): i for i in range(100)}
+
+    def test_change_kind(self):
+        self.tabular.record('foo', 1)
+        self.tabular.record('foo', 'bar')
+        self.tabular.record('baz', 'qux')
+        self.tabular.record('baz', 2.5)
+        assert self.tabular.as_dict == {'foo': 'bar', 'baz': 2.5}
+
+    def test_numpy_and_large_values(self):
+        self.tabular.record('float', np.float64(0.5))
+        self.tabular.record('int', np.int64(3))
+        self.tabular.record('big', 2**70)
+        self.tabular.record('bool', True)
+        self.tabular.record('array', np.zeros(3))
+        as_dict = self.tabular.as_dict
+        assert type(as_dict['float']) is float
+        assert type(as_dict['int']) is int
+        assert as_dict['big'] == 2**70
+        assert as_dict['bool'] is True
+        assert set(
+            self.tabular.as_primitive_dict) == {'float', 'int', 'big', 'bool'}
+
+    def test_as_dict_updates(self):
+        self.tabular.record('foo', 1)
+        assert self.tabular.as_dict == {'foo': 1}
+        self.tabular.record('foo', 2)
+        assert self.tabular.as_dict == {'foo': 2}
+
+    def test_copy(self):
+        self.tabular.record('foo', 1)
+        copy = self.tabular.copy()
+        self.tabular.record('foo', 2)
+        assert copy.as_dict == {'foo': 1}
+
+    def test_key_order(self):
+        row = {'itr': 1, 'loss': 0.5, 'name': 'foo', 'steps': 10}
+        self.tabular.record_many(row)
+        assert list(self.tabular.as_dict) == list(row)
+        assert list(self.tabular.as_primitive_dict) == list(row)
+        self.tabular.record('itr', 1.5)
+        assert list(self.tabular.as_dict) == list(row)
+
+    def test_record_then_handle(self):
+        handle = self.tabular.handle('foo')
+        self.tabular.record('foo', 1.)
+        handle.set(2.)
+        assert self.tabular.as_dict == {'foo': 2.}
+        self.tabular.record('foo', 3.)
+        self.tabular.record_array(['bar'], np.array([4.]))
+        assert self.tabular.as_dict == {'foo': 3., 'bar': 4.}
+
+    def test_marks_reset_on_clear(self):
+        self.tabular.record('foo', 1.)
+        self.tabular.record('bar', dict())
+        self.tabular.mark_str()
+        assert self.tabular.copy()._recorded == {'foo'}
+        self.tabular.mark('bar')
+        self.tabular.clear()
+        assert not self.tabular._marked.any()
+        self.tabular.record('foo', 2.)
+        with pytest.warns(TabularInputWarning, match='foo'):
+            self.tabular.clear()
@@ -0,0 +1,169 @@
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+import zlib
+
+import pytest
+
+from dowel import CsvOutput, FlushPolicy, read_csv, TabularInput, TextOutput
+from dowel.compression import CompressedTextFile, compression_of
+from dowel.compression import decompress, open_text
+from dowel.csv_output import read_csv_rows
+
+MODULES = {'gzip': gzip, 'bz2': bz2, 'lzma': lzma}
+
+
+def test_compression_of():
+    assert compression_of('progress.csv') is None
+    assert compression_of('progress.csv.gz') == 'gzip'
+    assert compression_of('debug.log.bz2') == 'bz2'
+    assert compression_of('debug.log.xz') == 'lzma'
+    assert compression_of('debug.log', 'gzip') == 'gzip'
+    with pytest.raises(ValueError):
+        compression_of('debug.log', 'zip')
+
+
+@pytest.mark.parametrize('compression', ['gzip', 'bz2', 'lzma'])
+class TestCompressedTextFile:
+
+    def setup_method(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.log_dir.name, 'log')
+
+    def teardown_method(self):
+        self.log_dir.cleanup()
+
+    def test_round_trip(self, compression):
+        file = CompressedTextFile(self.file_name, 'w', compression)
+        file.write('foo\n')
+        file.flush()
+        file.write('é\n')
+        file.close()
+
+        with MODULES[compression].open(self.file_name, 'rt') as f:
+            assert f.read() == 'foo\né\n'
+        with open_text(self.file_name, compression) as f:
+            assert f.read() == 'foo\né\n'
+
+    def test_read_while_written(self, compression):
+        file = CompressedTextFile(self.file_name, 'w', compression)
+        file.write('foo\n')
+        # Sync the stream, and wait for it to be written
+        file.fileno()
+        with open(self.file_name, 'rb') as raw:
+            assert decompress(raw.read(), compression) == b'foo\n'
+        file.write('bar\n')
+        file.close()
+        with open_text(self.file_name, compression) as f:
+            assert f.read() == 'foo\nbar\n'
+
+    def test_streams_outlive_flush(self, compression):
+        file = CompressedTextFile(self.file_name, 'w', compression)
+        file.write('foo\n')
+        file.flush()
+        file.write('bar\n')
+        file.flush()
+        file.close()
+        with open(self.file_name, 'rb') as raw:
+            data = raw.read()
+        decompressor = decompressor_of(compression)
+        assert decompressor.decompress(data) == b'foo\nbar\n'
+        # Both flushes are in the same stream
+        assert decompressor.eof and not decompressor.unused_data
+
+    def test_buffer_size(self, compression):
+        file = CompressedTextFile(self.file_name, 'w', compression, 4)
+        file.write('foo\n')
+        assert not file._buffer
+        file.close()
+        with open_text(self.file_name, compression) as f:
+            assert f.read() == 'foo\n'
+
+    def test_compression_ratio(self, compression):
+        file_name = self.file_name + '.csv'
+        csv_output = CsvOutput(file_name, compression=compression)
+        tabular = TabularInput()
+        for i in range(2000):
+            tabular.record('itr', i)
+            for j in range(20):
+                tabular.record('metric_{}'.format(j), (i * j) % 97 / 7)
+            csv_output.record(tabular)
+            csv_output.dump()
+            tabular.clear()
+        csv_output.close()
+        with open(file_name, 'rb') as raw:
+            data = raw.read()
+        plain = decompress(data, compression)
+        # Flushing on every dump costs little compression
+        assert len(data) < 1.1 * len(MODULES[compression].compress(plain))
+
+
+def decompressor_of(compression):
+    if compression == 'gzip':
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    return {
+        'bz2': bz2.BZ2Decompressor,
+        'lzma': lzma.LZMADecompressor
+    }[compression]()
+
+
+def test_partial_line():
+    with tempfile.TemporaryDirectory() as log_dir:
+        file_name = os.path.join(log_dir, 'log.gz')
+        file = CompressedTextFile(file_name, 'w', 'gzip')
+        file.write('foo\nba')
+        file.fileno()
+        with open(file_name, 'rb') as raw:
+            # Only the complete lines of an unfinished stream are read
+            assert decompress(raw.read(), 'gzip') == b'foo\n'
+        file.close()
+
+
+def test_text_output():
+    with tempfile.TemporaryDirectory() as log_dir:
+        file_name = os.path.join(log_dir, 'debug.log.gz')
+        text_output = TextOutput(file_name, with_timestamp=False)
+        text_output.record('foo')
+        text_output.dump()
+        text_output.record('b\u00e4r')
+        text_output.close()
+        assert text_output.bytes_written == 9
+        with gzip.open(file_name, 'rt') as file:
+            assert file.read() == 'foo\nb\u00e4r\n'
+
+
+@pytest.mark.parametrize('append_only', [False, True])
+@pytest.mark.parametrize('suffix', ['.gz', '.xz'])
+def test_csv_output(append_only, suffix):
+    with tempfile.TemporaryDirectory() as log_dir:
+        file_name = os.path.join(log_dir, 'progress.csv' + suffix)
+        # With fsync, dump() waits for the compressed rows to be written
+        csv_output = CsvOutput(file_name,
+                               append_only=append_only,
+                               flush_policy=FlushPolicy(fsync=True))
+        tabular = TabularInput()
+        for i in range(3):
+            tabular.record('foo', i)
+            if i:
+                # Rewrites the compressed file, unless append_only is True
+                tabular.record('bar', i)
+            csv_output.record(tabular)
+            csv_output.dump()
+
+        correct = [{
+            'foo': '0',
+            'bar': ''
+        }, {
+            'foo': '1',
+            'bar': '1'
+        }, {
+            'foo': '2',
+            'bar': '2'
+        }]
+        assert list(read_csv_rows(file_name)) == correct
+        assert read_csv(file_name)['bar'].tolist()[1:] == [1., 2.]
+        csv_output.close()
+        assert list(read_csv_rows(file_name)) == correct
+        assert os.listdir(log_dir) == ['progress.csv' + suffix]
@@ -0,0 +1,103 @@
+import asyncio
+import sys
+import threading
+
+import pytest
+
+import dowel
+from dowel import Logger, TabularInput
+from tests.dowel.test_logger import RecordingOutput
+
+
+class TestSession:
+
+    def test_default(self):
+        assert isinstance(dowel.logger, Logger)
+        assert isinstance(dowel.tabular, TabularInput)
+        assert dowel.current_logger() is dowel.current_logger()
+
+    def test_session(self):
+        root_logger = dowel.current_logger()
+        root_tabular = dowel.current_tabular()
+        with dowel.session() as (logger, tabular):
+            assert dowel.current_logger() is logger
+            assert dowel.current_tabular() is tabular
+            assert logger is not root_logger
+            assert tabular is not root_tabular
+        assert dowel.current_logger() is root_logger
+        assert dowel.current_tabular() is root_tabular
+
+    def test_nested_session(self):
+        with dowel.session() as (outer, _):
+            with dowel.session() as (inner, _):
+                assert dowel.current_logger() is inner
+            assert dowel.current_logger() is outer
+
+    def test_given_instances(self):
+        logger = Logger()
+        tabular = TabularInput()
+        with dowel.session(logger, tabular):
+            assert dowel.current_logger() is logger
+            assert dowel.current_tabular() is tabular
+
+    def test_proxies_forward(self):
+        output = RecordingOutput()
+        with dowel.session() as (logger, tabular):
+            dowel.logger.add_output(output)
+            with dowel.logger.prefix('a/'):
+                dowel.logger.log('foo')
+            with dowel.tabular.prefix('b/'):
+                dowel.tabular.record('bar', 1)
+            dowel.logger.log(dowel.tabular)
+            assert str(dowel.tabular) == str(tabular)
+            dowel.tabular.clear()
+        assert logger.has_output_type(RecordingOutput)
+        assert output.records == ['a/foo', {'b/bar': 1}]
+        assert not dowel.logger.has_output_type(RecordingOutput)
+
+    def test_threads_are_isolated(self):
+        outputs = [RecordingOutput() for _ in range(4)]
+        barrier = threading.Barrier(len(outputs))
+
+        def trial(i):
+            with dowel.session():
+                dowel.logger.add_output(outputs[i])
+                with dowel.tabular.prefix('trial{}/'.format(i)):
+                    barrier.wait(timeout=5)
+                    for step in range(10):
+                        dowel.tabular.record('step', step)
+                        dowel.logger.log(dowel.tabular)
+                        dowel.tabular.clear()
+
+        threads = [
+            threading.Thread(target=trial, args=(i, ))
+            for i in range(len(outputs))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for i, output in enumerate(outputs):
+            key = 'trial{}/step'.format(i)
+            assert output.records == [{key: step} for step in range(10)]
+
+    @pytest.mark.skipif(sys.version_info < (3, 7),
+                        reason='asyncio tasks have contexts since Python 3.7')
+    def test_asyncio_tasks_are_isolated(self):
+        outputs = [RecordingOutput() for _ in range(3)]
+
+        async def trial(i):
+            with dowel.session():
+                dowel.logger.add_output(outputs[i])
+                with dowel.logger.prefix('{}: '.format(i)):
+                    for step in range(3):
+                        dowel.logger.log(str(step))
+                        await asyncio.sleep(0)
+
+        async def main():
+            await asyncio.gather(*(trial(i) for i in range(len(outputs))))
+
+        asyncio.run(main())
+        for i, output in enumerate(outputs):
+            assert output.records == ['{}: {}'.format(i, s) for s in range(3)]
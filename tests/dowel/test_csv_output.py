@@ -2,9 +2,11 @@ import csv
 import os
 import tempfile
 
+import numpy as np
 import pytest
 
-from dowel import CsvOutput, TabularInput
+from dowel import CsvOutput, read_csv, TabularInput
+from dowel.csv_output import read_csv_rows
 
 
 class TestCsvOutput:
@@ -16,6 +18,7 @@ class TestCsvOutput:
         self.tabular.clear()
 
     def teardown_method(self):
+        self.csv_output.close()
         self.log_file.close()
 
     def test_record(self):
@@ -75,6 +78,104 @@ class TestCsvOutput:
         }]
         self.assert_csv_matches(correct)
 
+    def test_append_only(self):
+        self.csv_output = CsvOutput(self.log_file.name, append_only=True)
+        schema_file_name = self.log_file.name + '.schema'
+        correct = []
+        for i in range(4):
+            self.tabular.record('itr', i)
+            if i > 0:
+                self.tabular.record('x', i)
+            if i > 1:
+                self.tabular.record('y', i + 1)
+            self.csv_output.record(self.tabular)
+            self.csv_output.dump()
+            correct.append({
+                'itr': str(i),
+                'x': str(i) if i > 0 else '',
+                'y': str(i + 1) if i > 1 else ''
+            })
+
+        # Earlier rows are not rewritten while the file is open
+        with open(self.log_file.name, 'r') as file:
+            assert file.readline().strip() == 'itr'
+        assert os.path.exists(schema_file_name)
+        assert list(read_csv_rows(self.log_file.name)) == correct
+
+        self.csv_output.close()
+        assert not os.path.exists(schema_file_name)
+        self.assert_csv_matches(correct)
+        assert list(read_csv_rows(self.log_file.name)) == correct
+
+    def test_read_csv_rows_during_rewrite(self):
+        # The header has every column before the schema file is removed
+        self.csv_output = CsvOutput(self.log_file.name, append_only=True)
+        self.tabular.record('foo', 1)
+        self.csv_output.record(self.tabular)
+        self.tabular.record('bar', 2)
+        self.csv_output.record(self.tabular)
+        self.csv_output._rewrite()
+        self.csv_output.dump()
+        assert list(read_csv_rows(self.log_file.name)) == [{
+            'foo': '1',
+            'bar': ''
+        }, {
+            'foo': '1',
+            'bar': '2'
+        }]
+        os.remove(self.log_file.name + '.schema')
+
+    def test_read_csv(self):
+        self.csv_output = CsvOutput(self.log_file.name, append_only=True)
+        for i in range(3):
+            self.tabular.record('itr', i)
+            if i > 0:
+                self.tabular.record('loss', 1. / i)
+            self.tabular.record('name', 'a,"b"' if i == 2 else 'c')
+            self.csv_output.record(self.tabular)
+            self.tabular.clear()
+        self.csv_output.dump()
+
+        data = read_csv(self.log_file.name)
+        assert list(data) == ['itr', 'name', 'loss']
+        assert data['itr'].dtype == np.float64
+        assert data['itr'].tolist() == [0, 1, 2]
+        assert np.isnan(data['loss'][0])
+        assert data['loss'][1:].tolist() == [1., 0.5]
+        assert data['name'].tolist() == ['c', 'c', 'a,"b"']
+
+    def test_read_csv_columns(self):
+        self.csv_output = CsvOutput(self.log_file.name, append_only=True)
+        for i in range(4):
+            self.tabular.record('foo', i)
+            if i > 1:
+                self.tabular.record('bar', 'x')
+            self.csv_output.record(self.tabular)
+        self.csv_output.dump()
+        with open(self.log_file.name, 'a') as file:
+            # A row which is still being written
+            file.write('4,')
+
+        data = read_csv(self.log_file.name, columns=['foo'])
+        assert list(data) == ['foo']
+        assert data['foo'].tolist() == [0, 1, 2, 3]
+        assert read_csv(self.log_file.name,
+                        ['bar'])['bar'].tolist() == ['', '', 'x', 'x']
+        with pytest.raises(KeyError):
+            read_csv(self.log_file.name, ['baz'])
+
+    def test_read_csv_empty(self):
+        assert read_csv(self.log_file.name) == {}
+        self.tabular.record('foo', 1)
+        self.csv_output.record(self.tabular)
+        self.csv_output.dump()
+        self.tabular.clear()
+        with open(self.log_file.name, 'r') as file:
+            lines = file.read().count('\n')
+        assert lines == 2
+        data = read_csv(self.log_file.name)
+        assert data['foo'].tolist() == [1.]
+
     def test_empty_record(self):
         self.csv_output.record(self.tabular)
         self.csv_output.dump()
@@ -0,0 +1,159 @@
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+
+import pytest
+
+from dowel import ForwardingOutput, Logger, LogListener, TabularInput
+from tests.dowel.test_logger import RecordingOutput
+
+
+def _worker(connection):
+    logger = Logger()
+    tabular = TabularInput()
+    logger.add_output(ForwardingOutput(connection, batch_size=4))
+    for i in range(10):
+        logger.log('step {}'.format(i))
+        tabular.record('itr', i)
+        logger.log(tabular)
+        tabular.clear()
+    logger.close()
+
+
+class TestForwardingOutput:
+
+    def setup_method(self):
+        self.logger = Logger()
+        self.output = RecordingOutput()
+        self.logger.add_output(self.output)
+        self.listener = LogListener(self.logger)
+        self.tabular = TabularInput()
+
+    def teardown_method(self):
+        self.listener.close()
+
+    def test_forward_str(self):
+        forwarding = ForwardingOutput(self.listener.pipe(prefix='w0: '))
+        forwarding.record('foo', prefix='a/')
+        assert self.listener.poll() == 0
+        forwarding.dump()
+        assert self.listener.poll(timeout=1) == 1
+        assert self.output.records == ['w0: a/foo']
+
+    def test_forward_tabular(self):
+        forwarding = ForwardingOutput(self.listener.pipe(prefix='w0/'))
+        self.tabular.record('foo', 1)
+        self.tabular.record('bar', 2.0)
+        self.tabular.record('baz', dict())
+        forwarding.record(self.tabular)
+        self.tabular.record('foo', 3)
+        forwarding.record(self.tabular)
+        forwarding.dump()
+
+        assert self.listener.poll(timeout=1) == 2
+        assert self.output.records == [
+            {'w0/foo': 1, 'w0/bar': 2.0},
+            {'w0/foo': 3, 'w0/bar': 2.0},
+        ]  # yapf: disable
+        assert 'baz' not in self.tabular._recorded
+        assert 'foo' in self.tabular._recorded
+
+    def test_batching(self):
+        forwarding = ForwardingOutput(self.listener.pipe(), batch_size=2)
+        forwarding.record('foo')
+        assert self.listener.poll() == 0
+        forwarding.record('bar')
+        assert self.listener.poll(timeout=1) == 2
+
+    def test_unacceptable_type(self):
+        forwarding = ForwardingOutput(self.listener.pipe())
+        with pytest.raises(ValueError):
+            forwarding.record(dict())
+
+    def test_closed_connection_is_removed(self):
+        forwarding = ForwardingOutput(self.listener.pipe())
+        forwarding.record('foo')
+        forwarding.close()
+        assert self.listener.poll(timeout=1) == 1
+        assert self.listener.poll(timeout=1) == 0
+        assert not self.listener._workers
+
+    def test_worker_process(self):
+        connection = self.listener.pipe(prefix='w/')
+        process = multiprocessing.Process(target=_worker, args=(connection, ))
+        process.start()
+        connection.close()
+        while self.listener._workers:
+            self.listener.poll(timeout=1)
+        process.join()
+        assert len(self.output.records) == 20
+        assert self.output.records[0] == 'w/step 0'
+        assert self.output.records[-1] == {'w/itr': 9}
+
+    @pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'),
+                        reason='Unix sockets not supported')
+    def test_listen_on_address(self):
+        with tempfile.TemporaryDirectory() as log_dir:
+            listener = LogListener(self.logger,
+                                   address=os.path.join(log_dir, 'sock'))
+            forwarding = ForwardingOutput(listener.address, name='w3')
+            forwarding.record('foo')
+            forwarding.close()
+            while not listener._workers:
+                time.sleep(0.01)
+            while listener._workers:
+                listener.poll(timeout=1)
+            listener.close()
+        assert self.output.records == ['w3/foo']
+
+    @pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'),
+                        reason='Unix sockets not supported')
+    def test_worker_numbers_are_not_reused(self):
+        with tempfile.TemporaryDirectory() as log_dir:
+            listener = LogListener(self.logger,
+                                   address=os.path.join(log_dir, 'sock'))
+
+            def connect(num_workers):
+                forwarding = ForwardingOutput(listener.address)
+                while len(listener._workers) < num_workers:
+                    time.sleep(0.01)
+                return forwarding
+
+            first = connect(1)
+            second = connect(2)
+            first.close()
+            while len(listener._workers) > 1:
+                listener.poll(timeout=1)
+            third = connect(2)
+            for forwarding in (second, third):
+                forwarding.record('foo')
+                forwarding.dump()
+            while len(self.output.records) < 2:
+                listener.poll(timeout=1)
+            second.close()
+            third.close()
+            listener.close()
+        assert sorted(self.output.records) == ['worker1/foo', 'worker2/foo']
+
+    @pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'),
+                        reason='Unix sockets not supported')
+    def test_authkey_required(self):
+        with tempfile.TemporaryDirectory() as log_dir:
+            listener = LogListener(self.logger,
+                                   address=os.path.join(log_dir, 'sock'),
+                                   authkey=b'secret')
+            with pytest.raises(multiprocessing.AuthenticationError):
+                ForwardingOutput(listener.address, authkey=b'wrong')
+            forwarding = ForwardingOutput(listener.address,
+                                          name='w0',
+                                          authkey=b'secret')
+            forwarding.record('foo')
+            forwarding.close()
+            while not listener._workers:
+                time.sleep(0.01)
+            while listener._workers:
+                listener.poll(timeout=1)
+            listener.close()
+        assert self.output.records == ['w0/foo']
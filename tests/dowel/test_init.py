@@ -0,0 +1,24 @@
+import subprocess
+import sys
+
+import dowel
+
+
+def test_import_does_not_load_heavy_modules():
+    script = ('import sys; import dowel; '
+              'print(sorted(m for m in ("matplotlib", "scipy", "tensorboardX",'
+              ' "tensorflow") if m in sys.modules))')
+    out = subprocess.run([sys.executable, '-c', script],
+                         check=True,
+                         stdout=subprocess.PIPE,
+                         universal_newlines=True).stdout
+    assert out.strip() == '[]'
+
+
+def test_lazy_tensor_board_output():
+    from dowel.tensor_board_output import TensorBoardOutput
+    assert dowel.TensorBoardOutput is TensorBoardOutput
+
+
+def test_unknown_attribute():
+    assert not hasattr(dowel, 'NotAnAttribute')
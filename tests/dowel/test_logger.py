@@ -1,8 +1,15 @@
+import os
+import tempfile
+import threading
 from unittest import mock
+import warnings
 
 import pytest
 
-from dowel import Logger, LogOutput
+from dowel import CsvOutput, lazy, LazyMessage, Logger, LogOutput
+from dowel import DEBUG, ERROR, INFO, WARNING
+from dowel import TabularInput, TextOutput
+from dowel.csv_output import read_csv_rows
 from dowel.logger import LoggerWarning
 
 
@@ -76,3 +83,473 @@ class TestLogger:
 
         # this should not produce a warning, because we disabled warnings
         self.logger.log(dict())
+
+    def test_log_dispatch_updated_on_add_output(self):
+        self.logger.add_output(self.mock_output)
+        self.logger.log('foo')
+        other_output = mock.Mock(spec=LogOutput, types_accepted=(str, ))
+        self.logger.add_output(other_output)
+        self.logger.log('bar')
+        self.mock_output.record.assert_called_with('bar', prefix='')
+        other_output.record.assert_called_once_with('bar', prefix='')
+
+    def test_log_dispatch_updated_on_remove_output(self):
+        self.logger.add_output(self.mock_output)
+        self.logger.log('foo')
+        self.logger.remove_all()
+        with pytest.warns(LoggerWarning):
+            self.logger.log('bar')
+        self.mock_output.record.assert_called_once_with('foo', prefix='')
+
+    def test_log_dispatch_subclass(self):
+        self.logger.add_output(self.mock_output)
+
+        class StrSubclass(str):
+            pass
+
+        data = StrSubclass('foo')
+        self.logger.log(data)
+        self.mock_output.record.assert_called_with(data, prefix='')
+
+
+class RecordingOutput(LogOutput):
+
+    def __init__(self, block=None):
+        self.records = []
+        self.dumps = []
+        self.block = block
+
+    @property
+    def types_accepted(self):
+        return (str, TabularInput)
+
+    def record(self, data, prefix=''):
+        if self.block is not None:
+            self.block.wait()
+        if isinstance(data, TabularInput):
+            self.records.append(dict(data.as_dict))
+            data.mark_all()
+        else:
+            self.records.append(prefix + data)
+
+    def dump(self, step=None):
+        self.dumps.append(step)
+
+
+class FailingOutput(RecordingOutput):
+
+    def record(self, data, prefix=''):
+        raise RuntimeError('failed')
+
+
+class TestLoggerAsync:
+
+    def setup_method(self):
+        self.logger = Logger()
+
+    def teardown_method(self):
+        self.logger.close()
+
+    def test_log_and_dump(self):
+        output = RecordingOutput()
+        self.logger.add_output(output)
+        self.logger.enable_async()
+        with self.logger.prefix('a/'):
+            self.logger.log('foo')
+        self.logger.dump_all(step=3)
+        self.logger.flush()
+        assert output.records == ['a/foo']
+        assert output.dumps == [3]
+
+    def test_tabular_captured_by_value(self):
+        output = RecordingOutput()
+        self.logger.add_output(output)
+        self.logger.enable_async()
+        tabular = TabularInput()
+        for i in range(3):
+            tabular.record('itr', i)
+            self.logger.log(tabular)
+            tabular.clear()
+        self.logger.flush()
+        assert output.records == [{'itr': 0}, {'itr': 1}, {'itr': 2}]
+
+    def test_drop_oldest(self):
+        block = threading.Event()
+        output = RecordingOutput(block=block)
+        self.logger.add_output(output)
+        self.logger.enable_async(max_queue_size=2, backpressure='drop_oldest')
+        for i in range(5):
+            self.logger.log(str(i))
+        block.set()
+        self.logger.flush()
+        # The first message may already be in progress on the writer thread
+        assert output.records[-2:] == ['3', '4']
+        assert len(output.records) < 5
+
+    def test_coalesce(self):
+        block = threading.Event()
+        output = RecordingOutput(block=block)
+        self.logger.add_output(output)
+        self.logger.enable_async(max_queue_size=1, backpressure='coalesce')
+        tabular = TabularInput()
+        self.logger.log('start')
+        for i in range(4):
+            tabular.record('itr', i)
+            if i == 3:
+                tabular.record('extra', True)
+            self.logger.log(tabular)
+            tabular.clear()
+        block.set()
+        self.logger.flush()
+        assert output.records[0] == 'start'
+        assert output.records[-1] == {'itr': 3, 'extra': True}
+        assert len(output.records) < 5
+
+    def test_coalesce_with_dumps(self):
+        block = threading.Event()
+        output = RecordingOutput(block=block)
+        self.logger.add_output(output)
+        self.logger.enable_async(max_queue_size=4, backpressure='coalesce')
+        tabular = TabularInput()
+        for i in range(20):
+            tabular.record('itr', i)
+            self.logger.log(tabular)
+            self.logger.dump_all(step=i)
+            tabular.clear()
+        block.set()
+        self.logger.flush()
+        assert self.logger._writer.coalesced > 0
+        assert len(output.records) == len(output.dumps) < 20
+        assert output.records[-1] == {'itr': 19}
+        assert output.dumps[-1] == 19
+        assert output.dumps == sorted(output.dumps)
+
+    def test_invalid_backpressure(self):
+        with pytest.raises(ValueError):
+            self.logger.enable_async(backpressure='foo')
+
+    def test_error_propagates(self):
+        self.logger.add_output(FailingOutput())
+        self.logger.enable_async()
+        self.logger.log('foo')
+        with pytest.raises(RuntimeError):
+            self.logger.flush()
+
+    def test_close_returns_to_sync(self):
+        output = RecordingOutput()
+        self.logger.add_output(output)
+        self.logger.enable_async()
+        self.logger.log('foo')
+        self.logger.close()
+        assert output.records == ['foo']
+        self.logger.log('bar')
+        assert output.records == ['foo', 'bar']
+
+
+class SlowOutput(RecordingOutput):
+
+    def __init__(self, barrier):
+        super().__init__()
+        self.barrier = barrier
+
+    def dump(self, step=None):
+        # Only passes if all outputs are dumped at the same time
+        self.barrier.wait(timeout=5)
+        super().dump(step)
+
+
+class FailingDumpOutput(RecordingOutput):
+
+    def dump(self, step=None):
+        raise RuntimeError('failed')
+
+
+class TestLoggerConcurrentDump:
+
+    def setup_method(self):
+        self.logger = Logger()
+
+    def teardown_method(self):
+        self.logger.close()
+
+    def test_dump_concurrently(self):
+        barrier = threading.Barrier(3)
+        outputs = [SlowOutput(barrier) for _ in range(3)]
+        for output in outputs:
+            self.logger.add_output(output)
+        self.logger.set_dump_workers(3)
+        self.logger.dump_all(step=1)
+        self.logger.dump_all(step=2)
+        for output in outputs:
+            assert output.dumps == [1, 2]
+
+    def test_dump_latency(self):
+        outputs = [RecordingOutput(), RecordingOutput()]
+        for output in outputs:
+            self.logger.add_output(output)
+        self.logger.set_dump_workers(2)
+        self.logger.dump_all()
+        latency = self.logger.dump_latency
+        assert set(latency) == set(outputs)
+        assert all(t >= 0 for t in latency.values())
+
+        self.logger.remove_all()
+        assert not self.logger.dump_latency
+
+    def test_dump_exception(self):
+        output = RecordingOutput()
+        self.logger.add_output(FailingDumpOutput())
+        self.logger.add_output(output)
+        self.logger.set_dump_workers(2)
+        with pytest.raises(RuntimeError):
+            self.logger.dump_all(step=1)
+        # The other outputs are still dumped
+        assert output.dumps == [1]
+
+    def test_disable(self):
+        self.logger.add_output(FailingDumpOutput())
+        self.logger.add_output(RecordingOutput())
+        self.logger.set_dump_workers(2)
+        self.logger.set_dump_workers(0)
+        assert self.logger._dump_pool is None
+        with pytest.raises(RuntimeError):
+            self.logger.dump_all()
+
+
+class TestLoggerStats:
+
+    def setup_method(self):
+        self.logger = Logger()
+        self.output = RecordingOutput()
+        self.logger.add_output(self.output)
+
+    def test_disabled(self):
+        self.logger.log('foo')
+        assert self.logger.stats() == {}
+
+    def test_stats(self):
+        self.logger.enable_stats()
+        self.logger.log('foo')
+        self.logger.log('bar')
+        self.logger.dump_all()
+
+        stats = self.logger.stats()['RecordingOutput']
+        assert stats['record_calls'] == 2
+        assert stats['dump_calls'] == 1
+        assert stats['record_max_ns'] <= stats['record_total_ns']
+        assert stats['record_mean_ns'] == stats['record_total_ns'] / 2
+        assert 'bytes_written' not in stats
+
+    def test_stats_names(self):
+        self.logger.add_output(RecordingOutput())
+        self.logger.enable_stats()
+        self.logger.log('foo')
+        assert set(
+            self.logger.stats()) == {'RecordingOutput', 'RecordingOutput_1'}
+
+    def test_stats_dump_output_type(self):
+        self.logger.enable_stats()
+        self.logger.dump_output_type(RecordingOutput)
+        assert self.logger.stats()['RecordingOutput']['dump_calls'] == 1
+
+    def test_stats_bytes_written(self):
+        with tempfile.TemporaryDirectory() as log_dir:
+            text_output = TextOutput(os.path.join(log_dir, 'log.txt'),
+                                     with_timestamp=False)
+            self.logger.add_output(text_output)
+            self.logger.enable_stats()
+            self.logger.log('foo')
+            self.logger.dump_all()
+            stats = self.logger.stats()
+            text_output.close()
+        assert stats['TextOutput']['bytes_written'] == 4
+        assert stats['TextOutput']['bytes_flushed'] == 4
+        assert stats['TextOutput']['flush_count'] == 1
+
+    def test_stats_tabular(self):
+        tabular = TabularInput()
+        self.logger.enable_stats(tabular=tabular)
+        self.logger.log('foo')
+        self.logger.log(tabular)
+        assert tabular.as_dict['dowel/RecordingOutput/record_calls'] == 1
+        assert self.output.records[-1][
+            'dowel/RecordingOutput/record_calls'] == 1
+
+    def test_stats_tabular_csv(self):
+        tabular = TabularInput()
+        with tempfile.TemporaryDirectory() as log_dir:
+            csv_file = os.path.join(log_dir, 'progress.csv')
+            csv_output = CsvOutput(csv_file)
+            self.logger.add_output(csv_output)
+            self.logger.enable_stats(tabular=tabular)
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', LoggerWarning)
+                for i in range(3):
+                    tabular.record('itr', i)
+                    self.logger.log(tabular)
+                    self.logger.dump_all()
+                    tabular.clear()
+            csv_output.close()
+            rows = list(read_csv_rows(csv_file))
+        assert [row['itr'] for row in rows] == ['0', '1', '2']
+        assert [row['dowel/CsvOutput/dump_calls']
+                for row in rows] == ['0', '1', '2']
+
+    def test_disable_stats(self):
+        self.logger.enable_stats()
+        self.logger.log('foo')
+        self.logger.disable_stats()
+        self.logger.log('foo')
+        assert self.logger.stats() == {}
+
+
+class TestLoggerThrottled:
+
+    def setup_method(self):
+        self.logger = Logger()
+        self.output = RecordingOutput()
+        self.logger.add_output(self.output)
+
+    def test_every_n(self):
+        logged = [
+            self.logger.log_throttled('step {}', i, every_n=3)
+            for i in range(7)
+        ]
+        assert logged == [True, False, False, True, False, False, True]
+        assert self.output.records == [
+            'step 0',
+            '[last message repeated 2 times]',
+            'step 3',
+            '[last message repeated 2 times]',
+            'step 6',
+        ]
+
+    def test_every_secs(self):
+        with mock.patch('time.monotonic') as monotonic:
+            monotonic.return_value = 0.
+            assert self.logger.log_throttled('foo', every_secs=10, key='a')
+            monotonic.return_value = 5.
+            assert not self.logger.log_throttled('foo', every_secs=10, key='a')
+            monotonic.return_value = 10.
+            assert self.logger.log_throttled('foo', every_secs=10, key='a')
+
+    def test_per_call_site(self):
+        for _ in range(3):
+            self.logger.log_throttled('foo', every_n=10)
+            self.logger.log_throttled('bar', every_n=10)
+        assert self.output.records == ['foo', 'bar']
+
+    def test_per_key(self):
+        for i in range(4):
+            self.logger.log_throttled('{}', i, every_n=2, key='a')
+        self.logger.log_throttled('b', every_n=2, key='b')
+        assert self.output.records == [
+            '0', '[last message repeated 1 times]', '2', 'b'
+        ]
+
+    def test_suppressed_not_formatted(self):
+        formatted = []
+
+        class Arg:
+
+            def __format__(self, spec):
+                formatted.append(spec)
+                return 'arg'
+
+        for _ in range(3):
+            self.logger.log_throttled('{}', Arg(), every_n=3)
+        assert len(formatted) == 1
+
+    def test_dump_all_logs_suppressed(self):
+        for _ in range(3):
+            self.logger.log_throttled('foo', every_n=10)
+        self.logger.dump_all()
+        self.logger.dump_all()
+        assert self.output.records == [
+            'foo', '[last message repeated 2 times]'
+        ]
+
+
+class TestLoggerLevels:
+
+    def setup_method(self):
+        self.logger = Logger()
+        self.output = RecordingOutput()
+        self.logger.add_output(self.output)
+
+    def test_logger_level(self):
+        self.logger.set_level(WARNING)
+        self.logger.log('foo', level=INFO)
+        self.logger.log('bar', level=ERROR)
+        assert self.output.records == ['bar']
+
+    def test_output_level(self):
+        quiet = RecordingOutput()
+        self.logger.add_output(quiet, level=WARNING)
+        self.logger.log('foo', level=DEBUG)
+        self.logger.log('bar', level=WARNING)
+        assert self.output.records == ['foo', 'bar']
+        assert quiet.records == ['bar']
+
+    def test_set_output_level(self):
+        self.logger.set_output_level(RecordingOutput, ERROR)
+        self.logger.log('foo')
+        assert self.output.records == []
+        self.logger.remove_all()
+        assert not self.logger._output_levels
+
+    def test_lazy_callable(self):
+        self.logger.log(lazy(lambda: 'foo'))
+        assert self.output.records == ['foo']
+
+    def test_callable_not_called(self):
+        payload = mock.Mock(return_value='foo')
+        with pytest.warns(LoggerWarning):
+            self.logger.log(payload)
+        payload.assert_not_called()
+        assert self.output.records == []
+
+    def test_lazy_message(self):
+        self.logger.log(LazyMessage('{} {bar}', 'foo', bar=1))
+        assert self.output.records == ['foo 1']
+
+    def test_lazy_not_evaluated_when_filtered(self):
+        payload = mock.Mock(return_value='foo')
+        self.logger.set_output_level(RecordingOutput, WARNING)
+        self.logger.log(lazy(payload), level=INFO)
+        payload.assert_not_called()
+        self.logger.log(lazy(payload), level=WARNING)
+        payload.assert_called_once_with()
+        assert self.output.records == ['foo']
+
+    def test_lazy_not_evaluated_without_outputs(self):
+        arg = mock.MagicMock()
+        self.logger.remove_all()
+        self.logger.add_output(mock.Mock(spec=LogOutput, types_accepted=()))
+        with pytest.warns(LoggerWarning):
+            self.logger.log(LazyMessage('{}', arg))
+        assert not arg.mock_calls
+
+    def test_lazy_resolved_type(self):
+        tabular = TabularInput()
+        tabular.record('foo', 1)
+        self.logger.log(lazy(lambda: tabular))
+        assert self.output.records == [{'foo': 1}]
+
+    def test_throttled_summary_level(self):
+        self.logger.set_level(WARNING)
+        for _ in range(3):
+            self.logger.log_throttled('foo', every_n=10, level=WARNING)
+        self.logger.dump_all()
+        assert self.output.records == [
+            'foo', '[last message repeated 2 times]'
+        ]
+
+    def test_lazy_throttled(self):
+        for i in range(3):
+            self.logger.log_throttled('{}', i, every_n=2, level=DEBUG)
+        self.logger.set_level(INFO)
+        self.logger.log_throttled('{}', 3, every_n=1, level=DEBUG)
+        assert self.output.records == [
+            '0', '[last message repeated 1 times]', '2'
+        ]
@@ -6,7 +6,7 @@ from unittest import mock
 
 import pytest
 
-from dowel import StdOutput, TabularInput, TextOutput
+from dowel import FlushPolicy, StdOutput, TabularInput, TextOutput
 
 FAKE_TIMESTAMP = '2000-01-01 00:00:00.000000'
 FAKE_TIMESTAMP_SHORT = '2000-01-01 00:00:00'
@@ -85,6 +85,83 @@ class TestTextOutput:
         with pytest.raises(ValueError):
             self.text_output.record(dict())
 
+    def test_bytes_written(self, mock_datetime):
+        self.text_output = TextOutput(self.log_file.name, with_timestamp=False)
+        self.text_output.record('foo')
+        self.text_output.record('bar')
+        assert self.text_output.bytes_written == len('foo\nbar\n')
+
+    def test_bytes_written_non_ascii(self, mock_datetime):
+        with open(self.log_file.name, 'w') as file:
+            file.write('old\n')
+        self.text_output = TextOutput(self.log_file.name, with_timestamp=False)
+        self.text_output.record('d\u00e9j\u00e0')
+        # Text which is not flushed yet counts one byte per character
+        assert self.text_output.bytes_written == 5
+        self.text_output.dump()
+        assert self.text_output.bytes_written == 7
+        assert self.text_output.bytes_flushed == 7
+
+    def test_flush_on_dump(self, mock_datetime):
+        self.text_output = TextOutput(self.log_file.name, with_timestamp=False)
+        self.text_output.record('foo')
+        assert self.text_output.flush_count == 0
+        self.text_output.dump()
+        assert self.text_output.flush_count == 1
+        assert self.text_output.bytes_flushed == 4
+        with open(self.log_file.name, 'r') as file:
+            assert file.read() == 'foo\n'
+
+    def test_flush_every_rows(self, mock_datetime):
+        policy = FlushPolicy(every_rows=2, on_dump=False, buffer_size=1 << 20)
+        self.text_output = TextOutput(self.log_file.name,
+                                      with_timestamp=False,
+                                      flush_policy=policy)
+        self.text_output.record('foo')
+        self.text_output.dump()
+        assert self.text_output.flush_count == 0
+        with open(self.log_file.name, 'r') as file:
+            assert file.read() == ''
+        self.text_output.record('bar')
+        assert self.text_output.flush_count == 1
+        assert self.text_output.bytes_flushed == 8
+        with open(self.log_file.name, 'r') as file:
+            assert file.read() == 'foo\nbar\n'
+
+    def test_flush_every_bytes(self, mock_datetime):
+        policy = FlushPolicy(every_bytes=6)
+        self.text_output = TextOutput(self.log_file.name,
+                                      with_timestamp=False,
+                                      flush_policy=policy)
+        for _ in range(3):
+            self.text_output.record('foo')
+        assert self.text_output.flush_count == 1
+        assert self.text_output.bytes_flushed == 8
+        self.text_output.close()
+        assert self.text_output.flush_count == 2
+        assert self.text_output.bytes_flushed == 12
+
+    def test_flush_every_seconds(self, mock_datetime):
+        policy = FlushPolicy(every_seconds=10)
+        with mock.patch('dowel.simple_outputs.time') as mock_time:
+            mock_time.monotonic.return_value = 0
+            self.text_output = TextOutput(self.log_file.name,
+                                          with_timestamp=False,
+                                          flush_policy=policy)
+            self.text_output.record('foo')
+            assert self.text_output.flush_count == 0
+            mock_time.monotonic.return_value = 10
+            self.text_output.record('bar')
+            assert self.text_output.flush_count == 1
+
+    @mock.patch('dowel.simple_outputs.os.fsync')
+    def test_fsync(self, mock_fsync, mock_datetime):
+        self.text_output = TextOutput(self.log_file.name,
+                                      flush_policy=FlushPolicy(fsync=True))
+        self.text_output.record('foo')
+        self.text_output.dump()
+        mock_fsync.assert_called_once()
+
 
 @mock.patch('dowel.simple_outputs.datetime')
 class TestStdOutput:
@@ -1,5 +1,6 @@
 import math
 
+import numpy as np
 import pytest
 
 from dowel import TabularInput
@@ -68,6 +69,110 @@ class TestTabularInput:
         for k, v in self.tabular.as_dict.items():
             assert correct[k] is math.nan
 
+    def test_record_misc_stat_array(self):
+        values = np.array([3., 1., 2., 5., 4.])
+        self.tabular.record_misc_stat('Foo', values, percentiles=[25, 90])
+        self.tabular.record_misc_stat('Bar', iter(values))
+
+        assert self.tabular.as_dict == pytest.approx({
+            'FooAverage':
+            3.,
+            'FooStd':
+            np.std(values),
+            'FooMedian':
+            3.,
+            'FooMin':
+            1.,
+            'FooMax':
+            5.,
+            'FooP25':
+            2.,
+            'FooP90':
+            np.percentile(values, 90),
+            'BarAverage':
+            3.,
+            'BarStd':
+            np.std(values),
+            'BarMedian':
+            3.,
+            'BarMin':
+            1.,
+            'BarMax':
+            5.,
+        })
+
+    def test_record_misc_stat_nan_values(self):
+        self.tabular.record_misc_stat('Foo', [1., np.nan, 3.])
+        assert all(np.isnan(v) for v in self.tabular.as_dict.values())
+
+    def test_record_misc_stat_axis(self):
+        values = np.array([[1, 10], [2, 20], [6, 60]])
+        self.tabular.record_misc_stat('Env', values, axis=0)
+        self.tabular.record_misc_stat(['a', 'b', 'c'],
+                                      values,
+                                      placement='front',
+                                      percentiles=[50],
+                                      axis=1)
+
+        assert self.tabular.as_dict == pytest.approx({
+            'Env0Average':
+            3.,
+            'Env1Average':
+            30.,
+            'Env0Std':
+            np.std([1, 2, 6]),
+            'Env1Std':
+            np.std([10, 20, 60]),
+            'Env0Median':
+            2.,
+            'Env1Median':
+            20.,
+            'Env0Min':
+            1,
+            'Env1Min':
+            10,
+            'Env0Max':
+            6,
+            'Env1Max':
+            60,
+            'Averagea':
+            5.5,
+            'Averageb':
+            11.,
+            'Averagec':
+            33.,
+            'Stda':
+            4.5,
+            'Stdb':
+            9.,
+            'Stdc':
+            27.,
+            'Mediana':
+            5.5,
+            'Medianb':
+            11.,
+            'Medianc':
+            33.,
+            'Mina':
+            1,
+            'Minb':
+            2,
+            'Minc':
+            6,
+            'Maxa':
+            10,
+            'Maxb':
+            20,
+            'Maxc':
+            60,
+            'P50a':
+            5.5,
+            'P50b':
+            11.,
+            'P50c':
+            33.,
+        })
+
     def test_prefix(self):
         foo = 111
         bar = 222
@@ -175,3 +280,230 @@ class TestTabularInput:
             'str': str('Hello, world!'),
         }
         assert self.tabular.as_primitive_dict == correct
+
+    def test_version(self):
+        version = self.tabular.version
+        self.tabular.record('foo', 1)
+        assert self.tabular.version != version
+        version = self.tabular.version
+        self.tabular.mark_all()
+        assert self.tabular.as_primitive_dict == {'foo': 1}
+        assert self.tabular.version == version
+        self.tabular.clear()
+        assert self.tabular.version != version
+
+    def test_views_cached_until_changed(self):
+        self.tabular.record('foo', 1)
+        self.tabular.record('bar', 2)
+        primitives = self.tabular.as_primitive_dict
+        rendered = str(self.tabular)
+        assert self.tabular.as_primitive_dict is primitives
+        assert str(self.tabular) is rendered
+        assert self.tabular.primitive_keys == ('bar', 'foo')
+
+        self.tabular.record('baz', 3)
+        assert self.tabular.as_primitive_dict == {'foo': 1, 'bar': 2, 'baz': 3}
+        assert self.tabular.primitive_keys == ('bar', 'baz', 'foo')
+        assert 'baz' in str(self.tabular)
+
+        self.tabular.mark_all()
+        self.tabular.clear()
+        assert self.tabular.as_primitive_dict == {}
+        assert str(self.tabular) == ''
+
+    def test_record_many(self):
+        with self.tabular.prefix('env/'):
+            self.tabular.record_many({'foo': 1, 'bar': 'baz'})
+            self.tabular.record_many([('qux', 2.5), (3, [1])])
+        assert self.tabular.as_dict == {
+            'env/foo': 1,
+            'env/bar': 'baz',
+            'env/qux': 2.5,
+            'env/3': [1]
+        }
+
+    def test_record_array(self):
+        keys = ['a', 'b', 'c']
+        with self.tabular.prefix('env/'):
+            self.tabular.record_array(keys, np.array([1., 2., 3.]))
+            self.tabular.record_array(keys[:2], np.array([4, 5]))
+            self.tabular.record_array(['d', 'e'], [True, 'x'])
+        assert self.tabular.as_primitive_dict == {
+            'env/a': 4,
+            'env/b': 5,
+            'env/c': 3.,
+            'env/d': True,
+            'env/e': 'x'
+        }
+
+    def test_record_array_repeated_keys(self):
+        keys = ['foo', 'bar']
+        for i in range(3):
+            for prefix in ('a/', 'b/'):
+                with self.tabular.prefix(prefix):
+                    self.tabular.record_array(keys, np.array([i, -i]))
+                    self.tabular.record_many({'baz': i})
+        assert self.tabular.as_dict == {
+            'a/foo': 2,
+            'a/bar': -2,
+            'a/baz': 2,
+            'b/foo': 2,
+            'b/bar': -2,
+            'b/baz': 2
+        }
+
+    def test_record_array_wrong_shape(self):
+        with pytest.raises(ValueError):
+            self.tabular.record_array(['a', 'b'], np.zeros(3))
+        with pytest.raises(ValueError):
+            self.tabular.record_array(['a', 'b'], np.zeros((2, 2)))
+        assert not self.tabular.as_dict
+
+    def test_record_array_mark_and_clear(self):
+        self.tabular.record_array(['foo', 'bar'], np.arange(2.))
+        self.tabular.mark('foo')
+        with pytest.warns(TabularInputWarning, match='bar'):
+            self.tabular.clear()
+        assert not self.tabular.as_dict
+
+    def test_handle(self):
+        with self.tabular.prefix('train/'):
+            loss = self.tabular.handle('loss')
+        assert loss.key == 'train/loss'
+        loss.set(1.5)
+        assert self.tabular.as_dict == {'train/loss': 1.5}
+
+        version = self.tabular.version
+        loss.set('diverged')
+        assert self.tabular.version != version
+        assert self.tabular.as_primitive_dict == {'train/loss': 'diverged'}
+        assert 'train/loss  diverged' in str(self.tabular)
+
+    def test_handle_survives_clear(self):
+        loss = self.tabular.handle('loss')
+        loss.set(1.)
+        self.tabular.mark_str()
+        self.tabular.clear()
+        assert not self.tabular.as_dict
+        loss.set(2.)
+        self.tabular.record('foo', 3)
+        assert self.tabular.as_dict == {'loss': 2., 'foo': 3}
+
+    def test_accumulator(self):
+        with self.tabular.prefix('train/'):
+            returns = self.tabular.accumulator('Return', percentiles=[50])
+        lengths = self.tabular.accumulator('Length', placement='front')
+        returns.add_batch([1., 2.])
+        returns.add(6.)
+        lengths.add(10)
+
+        assert self.tabular.as_primitive_dict == pytest.approx({
+            'train/ReturnAverage':
+            3.,
+            'train/ReturnStd':
+            np.std([1., 2., 6.]),
+            'train/ReturnMedian':
+            2.,
+            'train/ReturnMin':
+            1.,
+            'train/ReturnMax':
+            6.,
+            'train/ReturnP50':
+            2.,
+            'AverageLength':
+            10.,
+            'StdLength':
+            0.,
+            'MedianLength':
+            10.,
+            'MinLength':
+            10.,
+            'MaxLength':
+            10.,
+        })
+
+        version = self.tabular.version
+        returns.add(3.)
+        assert self.tabular.version != version
+        assert self.tabular.as_dict['train/ReturnAverage'] == 3.
+
+    def test_accumulator_reset_on_clear(self):
+        returns = self.tabular.accumulator('Return')
+        returns.add(1.)
+        self.tabular.mark_all()
+        self.tabular.clear()
+        assert returns.count == 0
+        assert math.isnan(self.tabular.as_dict['ReturnAverage'])
+        returns.add(2.)
+        assert self.tabular.as_dict['ReturnAverage'] == 2.
+
+    def test_rolling_and_ema(self):
+        with self.tabular.prefix('train/'):
+            rolling = self.tabular.rolling('Loss', window=2)
+        ema = self.tabular.ema('Loss', alpha=0.5, placement='front')
+        for value in (4., 2.):
+            rolling.add(value)
+            ema.add(value)
+        assert self.tabular.as_dict == {
+            'train/LossRollingAverage': 3.,
+            'train/LossRollingMin': 2.,
+            'train/LossRollingMax': 4.,
+            'EMALoss': 3.,
+        }
+
+        self.tabular.mark_all()
+        self.tabular.clear()
+        rolling.add(6.)
+        assert self.tabular.as_dict == {
+            'train/LossRollingAverage': 4.,
+            'train/LossRollingMin': 2.,
+            'train/LossRollingMax': 6.,
+            'EMALoss': 3.,
+        }
+
+    def test_snapshot(self):
+        self.tabular.record('foo', 1)
+        snapshot = self.tabular.snapshot()
+        assert self.tabular.snapshot() is snapshot
+        assert snapshot.snapshot() is snapshot
+
+        self.tabular.record('foo', 2)
+        self.tabular.record('bar', 3)
+        assert snapshot.as_dict == {'foo': 1}
+        assert self.tabular.snapshot() is not snapshot
+        assert self.tabular.snapshot().as_dict == {'foo': 2, 'bar': 3}
+
+        self.tabular.mark_all()
+        self.tabular.clear()
+        assert snapshot.as_dict == {'foo': 1}
+        assert str(snapshot) == '---  -\nfoo  1\n---  -'
+        assert not self.tabular.as_dict
+
+    def test_snapshot_read_only(self):
+        snapshot = self.tabular.snapshot()
+        with pytest.raises(TypeError):
+            snapshot.record('foo', 1)
+        with pytest.raises(TypeError):
+            snapshot.record_array(['foo'], np.zeros(1))
+        with pytest.raises(TypeError):
+            snapshot.handle('foo')
+        with pytest.raises(TypeError):
+            snapshot.clear()
+        copy = snapshot.copy()
+        copy.record('foo', 1)
+        assert copy.as_dict == {'foo': 1}
+        assert not self.tabular.as_dict
+
+    def test_snapshot_marks_table(self):
+        self.tabular.record('foo', 1)
+        self.tabular.record('bar', 2)
+        snapshot = self.tabular.snapshot()
+        snapshot.mark('foo')
+        with pytest.warns(TabularInputWarning, match='bar'):
+            self.tabular.clear()
+
+        # After clear, the snapshot's marks belong to an old row
+        self.tabular.record('foo', 'baz')
+        snapshot.mark_all()
+        with pytest.warns(TabularInputWarning, match='foo'):
+            self.tabular.clear()
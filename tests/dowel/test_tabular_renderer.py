@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+import pytest
+import tabulate
+
+from dowel.tabular_renderer import TabularRenderer
+
+
+def check(rows):
+    keys = tuple(key for key, _ in rows)
+    expected = tabulate.tabulate(rows)
+    renderer = TabularRenderer()
+    assert renderer.render(keys, dict(rows)) == expected
+    # Again, with the cached key layout
+    assert renderer.render(keys, dict(rows)) == expected
+
+
+@pytest.mark.parametrize('values', [
+    [1, 22, -333],
+    [1.5, 2, -0.25],
+    [1e-5, 123456789., 1e20, 3],
+    [math.nan, -math.inf, 1.5, 2],
+    [10**20, 1.],
+    [np.int64(5), np.int32(-7), np.int8(3)],
+    [np.float32(0.1), np.float64(2.75),
+     np.float16(1.5), 4],
+    [True, 1, 2.5],
+    ['foo', 1.5, 2],
+    ['1.5', 2., 3],
+    [np.bool_(True), 1.],
+])
+def test_values(values):
+    check([('key{}'.format(i), v) for i, v in enumerate(values)])
+
+
+@pytest.mark.parametrize('keys', [
+    ['a', 'bb', 'ccc'],
+    ['1', '2', '3'],
+    ['1', 'two', '3.5'],
+    ['True', 'False'],
+    ['inf', 'nan'],
+    ['1,000', '2'],
+    [' padded', 'key '],
+    ['café', 'x'],
+    ['a b', 'c/d'],
+])
+def test_keys(keys):
+    check([(key, float(i)) for i, key in enumerate(keys)])
+
+
+def test_empty():
+    assert TabularRenderer().render((), {}) == ''
+
+
+def test_random():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        size = rng.integers(1, 20)
+        values = rng.choice([
+            lambda: float(rng.normal() * 10.**rng.integers(-8, 8)),
+            lambda: int(rng.integers(-10**6, 10**6)),
+            lambda: np.float32(rng.normal()),
+        ],
+                            size=size)
+        check([('metric/{}'.format(i), value())
+               for i, value in enumerate(values)])
+
+
+def test_layout_changes():
+    renderer = TabularRenderer()
+    renderer.render(('a', 'b'), {'a': 1, 'b': 2})
+    rows = [('a', 1), ('b', 2), ('longer', 3)]
+    assert renderer.render(('a', 'b', 'longer'),
+                           dict(rows)) == tabulate.tabulate(rows)
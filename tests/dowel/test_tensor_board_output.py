@@ -101,6 +101,16 @@ class TestTensorBoardOutputMocked(TBOutputTest):
             self.mock_writer.add_scalar.assert_any_call('foo', foo, 0)
             self.mock_writer.add_scalar.assert_any_call('bar', bar, 0)
 
+    def test_record_tabular_changed_before_dump(self):
+        with mock.patch('tensorboardX.SummaryWriter'):
+            self.tabular.record('foo', 5)
+            self.tensor_board_output.record(self.tabular)
+            self.tabular.clear()
+            self.tabular.record('foo', 6)
+            self.tensor_board_output.dump()
+
+            self.mock_writer.add_scalar.assert_called_once_with('foo', 5, 0)
+
     def test_record_figure(self):
         with mock.patch('tensorboardX.SummaryWriter'):
             fig = plt.figure()
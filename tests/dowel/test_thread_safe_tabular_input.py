@@ -0,0 +1,120 @@
+import threading
+
+import pytest
+
+from dowel import ThreadSafeTabularInput
+from tests.dowel.test_tabular_input import TestTabularInput
+
+# Fail tests if one of their threads raises
+pytestmark = pytest.mark.filterwarnings(
+    'error::pytest.PytestUnhandledThreadExceptionWarning')
+
+
+class TestThreadSafeTabularInput(TestTabularInput):
+    """Run all TabularInput tests against the thread-safe table."""
+
+    def setup_method(self):
+        self.tabular = ThreadSafeTabularInput()
+
+    def run_threads(self, target, num_threads=4):
+        barrier = threading.Barrier(num_threads)
+
+        def run(i):
+            barrier.wait()
+            target(i)
+
+        threads = [
+            threading.Thread(target=run, args=(i, ))
+            for i in range(num_threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_concurrent_record(self):
+
+        def record(i):
+            for j in range(1000):
+                self.tabular.record('{}/{}'.format(i, j), j)
+                if j % 100 == 0:
+                    # Reads merge the shards while others record
+                    assert self.tabular.as_primitive_dict is not None
+
+        self.run_threads(record)
+        assert self.tabular.as_dict == {
+            '{}/{}'.format(i, j): j
+            for i in range(4)
+            for j in range(1000)
+        }
+
+    def test_prefix_per_thread(self):
+        started = threading.Barrier(2)
+        recorded = threading.Event()
+
+        def record(i):
+            with self.tabular.prefix('thread{}/'.format(i)):
+                started.wait()
+                if i == 0:
+                    recorded.wait()
+                self.tabular.record('foo', i)
+                self.tabular.handle('bar').set(i)
+                if i == 1:
+                    recorded.set()
+
+        self.run_threads(record, num_threads=2)
+        assert self.tabular.as_dict == {
+            'thread0/foo': 0,
+            'thread0/bar': 0,
+            'thread1/foo': 1,
+            'thread1/bar': 1,
+        }
+
+    def test_clear_during_record(self):
+        stop = threading.Event()
+
+        def record(i):
+            if i == 0:
+                for _ in range(100):
+                    self.tabular.mark_all()
+                    self.tabular.clear()
+                stop.set()
+            else:
+                while not stop.is_set():
+                    self.tabular.record('foo', i)
+
+        self.run_threads(record, num_threads=3)
+        assert set(self.tabular.as_dict) <= {'foo'}
+
+    def test_version_after_concurrent_record(self):
+        versions = []
+
+        def record(i):
+            for j in range(1000):
+                self.tabular.record('{}/{}'.format(i, j), j)
+                if j % 100 == 0:
+                    version = self.tabular.version
+                    keys = set(self.tabular.as_primitive_dict)
+                    versions.append(version)
+                    # A view cached at a version has every entry merged
+                    # up to it
+                    assert '{}/{}'.format(i, j) in keys
+
+        self.run_threads(record)
+        version = self.tabular.version
+        assert len(self.tabular.as_primitive_dict) == 4000
+        assert version >= max(versions)
+
+    def test_exited_threads_drop_shards(self):
+
+        def record(i):
+            self.tabular.record('thread_{}'.format(i), i)
+
+        for i in range(100):
+            thread = threading.Thread(target=record, args=(i, ))
+            thread.start()
+            thread.join()
+            if i % 10 == 9:
+                assert len(self.tabular.as_dict) == i + 1
+                assert not self.tabular._shards
+            assert len(self.tabular._shards) <= 10